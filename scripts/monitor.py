@@ -2,293 +2,720 @@
 """
 monitor.py — Lightweight host-side surveillance loop for NanoClaw.
 
-Bypasses Claude entirely. Captures frames from a USB camera, runs YOLOv5s
-on the NPU, and writes IPC task files to send results via WhatsApp.
+Bypasses Claude entirely. Captures frames from one or more USB cameras,
+runs YOLOv5s on the NPU (or the CPU where there is none), and sends alerts
+to WhatsApp through NanoClaw. Each camera runs its own pipeline; all share
+one model load through a fair scheduler.
 
 Controlled via JSON config file; nanoclaw's IPC handler writes/deletes
-this file to start/stop monitoring.
+this file to start/stop monitoring, and changes apply to running cameras
+in place.
 
 Config file: /tmp/nanoclaw-monitor.json
   {
     "chatJid": "17038709442@s.whatsapp.net",
     "interval": 10,
+    "adaptive": false,         // optional, adapt the interval to activity and load
+    "intervalMin": 1,          //   interval while targets or strong motion are seen
+    "intervalMax": 30,         //   empty cycles back off towards this interval
+    "backoff": 2,              //   factor per empty cycle
+    "activeMotion": 0.02,      //   motion score that counts as activity (motionGate on)
+    "thermalLimit": 80,        //   °C (hottest thermal zone) above which to throttle
+    "loadLimit": 0.9,          //   CPU busy fraction above which to throttle
+    "throttleFactor": 2,       //   interval multiplier while throttled
     "detectLabels": ["person"],
     "confidenceThreshold": 0.5,
     "sendAnnotated": true,
-    "groupFolder": "main"
+    "groupFolder": "main",
+    "backend": "auto",         // optional, "rknn", "onnxruntime" or "opencv"; auto: NPU, else CPU
+    "model": "/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/yolov5s.rknn",  // CPU backends load the .onnx beside it
+    "npuCores": 2,             // optional, NPU cores to spread inference over
+    "cpuWorkers": 1,           // optional, concurrent inferences on a CPU backend
+    "cpuThreads": 0,           //   threads they share (0: every CPU)
+    "motionGate": false,       // optional, only run inference when the scene changes
+    "motionSensitivity": 25,   //   per-pixel delta (0-255) that counts as change
+    "motionThreshold": 0.005,  //   fraction of changed pixels that counts as motion
+    "motionHeartbeat": 60,     //   force an inference at least this often (s)
+    "dedupAlerts": true,       // optional, alert only on new/returning tracks or count changes
+    "alertCooldown": 60,       //   seconds before a returning track or count change re-alerts
+    "clip": false,             // optional, also send a short clip around each alert
+    "clipPre": 5,              //   seconds before the alert to include
+    "clipPost": 3,             //   seconds after the alert to include
+    "clipFps": 5,              //   frames per second kept in the pre-event ring
+    "clipWidth": 640,          //   ring frames are downscaled to this width
+    "clipFormat": "mp4",       //   "mp4" or "gif" (gif needs Pillow)
+    "clipMemoryMB": 16,        //   per-camera cap on the ring's JPEG bytes
+    "zones": [                 // optional, only detect inside these regions (fractions or pixels)
+      {"name": "door", "rect": [0.55, 0.2, 0.75, 0.95]},
+      {"name": "drive", "polygon": [[0, 0.6], [0.4, 0.5], [0.5, 1], [0, 1]]}
+    ],
+    "zoneOverlap": 0.2,        //   overlap between tiles of a zone larger than 640 px
+    "jpegQuality": 80,         // optional, alert image JPEG quality
+    "jpegMaxSide": 1280,       //   alert images are downscaled to this long side
+    "metrics": true,           // optional, false turns all instrumentation off
+    "metricsListen": "127.0.0.1:9464",  // HTTP /metrics + /stats; a path for a Unix socket, "" for none
+    "metricsFile": "/tmp/nanoclaw-monitor-stats.json",  // optional, JSON stats every STATS_INTERVAL
+    "ipcWindow": 5,            // optional, seconds after a task file during which alerts are merged
+    "ipcMaxPending": 8,        //   task files waiting for NanoClaw before new ones are held back
+    "captureWidth": 1280,      // optional, camera mode requested from the driver
+    "captureHeight": 720,
+    "mjpeg": true,             //   ask for MJPEG and decode it ourselves
+    "decodeWidth": 0,          //   decode at 1/2, 1/4 or 1/8 scale while at least this wide (0: full)
+    "cameras": [               // optional, one entry per camera (default: one on /dev/video0);
+                               //   device is /dev/videoN, an index or "synthetic[:objects]"
+      {"device": "/dev/video0", "name": "door"},
+      {"device": "/dev/video2", "name": "yard", "interval": 30,
+       "detectLabels": ["person", "dog"], "confidenceThreshold": 0.6,
+       "chatJid": "...", "groupFolder": "..."}
+    ]
   }
 
+A camera entry overrides the top-level per-stream keys for that camera.
+backend, model, npuCores, cpuWorkers, cpuThreads, metrics and ipc keys
+are global. How each part works is described in its nanovision module:
+watch (config reload), capture, cadence, motion, zones, engine and backends
+(inference), tracker (alert dedup), clip, handoff and tasks (delivery) and
+metrics.
+
+Usage: python3 scripts/monitor.py   (normally spawned by NanoClaw)
+
 To stop: delete the config file or write {"stop": true}.
 """
 
 import json
 import os
+import queue
+import re
 import signal
 import sys
+import threading
 import time
+from concurrent.futures import CancelledError
 
-import cv2
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nanovision.annotate import annotate
+from nanovision.backends import load_backend
+from nanovision.cadence import Cadence
+from nanovision.capture import ReopeningCamera, V4L2Camera, open_source
+from nanovision.clip import ENCODERS, ClipExporter, ClipJob, FrameRing
+from nanovision.decoder import NUM_CLASSES, decode_candidates, select_detections
+from nanovision.engine import DEFAULT_CORES, EngineError, FairScheduler, InferencePool
+from nanovision.handoff import JPEG_MAX_SIDE, JPEG_QUALITY, ImageSender, encode_jpeg
+from nanovision.labels import class_ids, label_name, load_labels
+from nanovision.metrics import MetricsServer, Registry, rss_bytes, write_json
+from nanovision.motion import MotionGate
+from nanovision.pipeline import DropOldestQueue, StageStats
+from nanovision.preprocess import Preprocessor
+from nanovision.tasks import COALESCE_WINDOW, MAX_PENDING, TaskWriter
+from nanovision.tracker import AlertPolicy, Tracker
+from nanovision.watch import ConfigWatcher
+from nanovision.zones import TILE_OVERLAP, Crop, Zone, detect_in_crops, parse_zones, plan_crops, zone_index
+
 # ─── Paths ────────────────────────────────────────────────────────────────────
 CONFIG_PATH    = "/tmp/nanoclaw-monitor.json"
 IPC_BASE       = os.path.expanduser("~/nanoclaw/data/ipc")
 MODEL_PATH     = "/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/yolov5s.rknn"
 LABELS_PATH    = "/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/coco_labels.txt"
 CAMERA_DEVICE  = "/dev/video0"
+METRICS_LISTEN = "127.0.0.1:9464"
 
-# ─── YOLOv5 constants ─────────────────────────────────────────────────────────
-MODEL_INPUT  = 640
-NUM_CLASSES  = 80
-MAX_DETS     = 50
-ANCHORS = [
-    [(10, 13), (16, 30),  (33, 23)],
-    [(30, 61), (62, 45),  (59, 119)],
-    [(116, 90),(156, 198),(373, 326)],
-]
-STRIDES = [8, 16, 32]
-
-def load_labels(path: str) -> list[str]:
-    with open(path) as f:
-        return [ln.strip() for ln in f if ln.strip()]
-
-def nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float) -> list[int]:
-    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
-    areas  = (x2 - x1) * (y2 - y1)
-    order  = scores.argsort()[::-1]
-    keep: list[int] = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(int(i))
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
-        iou   = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
-        order = order[np.where(iou <= iou_thresh)[0] + 1]
-    return keep
-
-def decode_outputs(outputs, img_h, img_w, conf_thresh, nms_thresh):
-    all_boxes = []
-    for head_idx, feat in enumerate(outputs):
-        feat = feat[0]
-        gh, gw = feat.shape[1], feat.shape[2]
-        feat = feat.reshape(3, NUM_CLASSES + 5, gh, gw).transpose(0, 2, 3, 1)
-        stride  = STRIDES[head_idx]
-        anchors = ANCHORS[head_idx]
-        for a_idx in range(3):
-            data     = feat[a_idx]
-            box_xy   = data[..., :2]
-            box_wh   = data[..., 2:4]
-            obj_conf = data[..., 4]
-            cls_conf = data[..., 5:]
-            if obj_conf.max() < conf_thresh:
-                continue
-            scores     = obj_conf[..., None] * cls_conf
-            max_scores = scores.max(axis=-1)
-            mask       = max_scores > conf_thresh
-            if not mask.any():
-                continue
-            ys, xs = np.where(mask)
-            for y, x in zip(ys, xs):
-                bx = (box_xy[y, x, 0] * 2.0 - 0.5 + x) * stride
-                by = (box_xy[y, x, 1] * 2.0 - 0.5 + y) * stride
-                bw = (box_wh[y, x, 0] * 2.0) ** 2 * anchors[a_idx][0]
-                bh = (box_wh[y, x, 1] * 2.0) ** 2 * anchors[a_idx][1]
-                x1 = (bx - bw / 2) / MODEL_INPUT * img_w
-                y1 = (by - bh / 2) / MODEL_INPUT * img_h
-                x2 = (bx + bw / 2) / MODEL_INPUT * img_w
-                y2 = (by + bh / 2) / MODEL_INPUT * img_h
-                conf   = float(max_scores[y, x])
-                cls_id = int(scores[y, x].argmax())
-                all_boxes.append([x1, y1, x2, y2, conf, cls_id])
-    if not all_boxes:
-        return np.empty((0, 6), dtype=np.float32)
-    boxes = np.array(all_boxes, dtype=np.float32)
-    keep  = nms(boxes[:, :4], boxes[:, 4], nms_thresh)
-    result = boxes[keep]
-    return result[:MAX_DETS] if len(result) > MAX_DETS else result
-
-def annotate(frame, detections, labels):
-    out = frame.copy()
-    for det in detections:
-        x1, y1, x2, y2, conf, cls_id = det
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-        label = labels[int(cls_id)] if int(cls_id) < len(labels) else str(int(cls_id))
-        text  = f"{label} {conf:.2f}"
-        cv2.rectangle(out, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-        ty = max(y1 - 4, th + 4)
-        cv2.rectangle(out, (x1, ty - th - 4), (x1 + tw, ty), (0, 255, 0), -1)
-        cv2.putText(out, text, (x1, ty - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-    return out
-
-def read_config():
-    """Read monitor config. Returns None if monitoring should stop."""
-    if not os.path.exists(CONFIG_PATH):
+STATS_INTERVAL = 60     # seconds between pipeline stats log lines
+
+def read_config(watcher: ConfigWatcher):
+    """Read monitor config (cached by mtime). Returns None if monitoring should stop."""
+    cfg = watcher.read()
+    if cfg is None or cfg.get("stop"):
         return None
+    return cfg
+
+def send_image(sender: ImageSender, tasks: TaskWriter, group_folder: str, data: bytes, caption: str,
+               chat_jid: str, fallback_path: str, source: str = "monitor"):
+    """Send JPEG bytes over the image socket, else via a file and an IPC task."""
+    header = {"type": "send_image", "chatJid": chat_jid, "groupFolder": group_folder,
+              "caption": caption, "mime": "image/jpeg"}
+    if sender.send(header, data):
+        return
+    with open(fallback_path, "wb") as f:
+        f.write(data)
+    tasks.submit(group_folder, chat_jid, fallback_path, caption, source=source)
+
+def camera_configs(cfg: dict) -> dict[str, dict]:
+    """Expand the config into {camera name: effective per-camera config}."""
+    base = {k: v for k, v in cfg.items() if k != "cameras"}
+    entries = cfg.get("cameras") or [{"device": CAMERA_DEVICE}]
+    cameras: dict[str, dict] = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("device"):
+            print(f"[monitor] Ignoring camera entry without a device: {entry!r}")
+            continue
+        # The name goes into /tmp file names, thread names and metric labels.
+        name = re.sub(r"[^\w-]", "_", str(entry.get("name") or os.path.basename(str(entry["device"]))))
+        while name in cameras:
+            name += "_"
+        camera = {**base, **entry, "name": name}
+        if camera.get("clipFormat", "mp4") not in ENCODERS:
+            print(f"[monitor] {name}: unknown clipFormat {camera['clipFormat']!r}, using mp4")
+            camera["clipFormat"] = "mp4"
+        cameras[name] = camera
+    return cameras
+
+def capture_key(cfg: dict) -> tuple:
+    """The config a camera is opened with; a change reopens it."""
+    return (cfg["device"], cfg.get("captureWidth", 1280), cfg.get("captureHeight", 720),
+            cfg.get("decodeWidth", 0), cfg.get("mjpeg", True))
+
+def open_camera(cfg: dict):
+    """Open and warm up the camera (or synthetic source). Returns None on failure."""
+    device, width, height, decode_width, mjpeg = capture_key(cfg)
     try:
-        with open(CONFIG_PATH) as f:
-            cfg = json.load(f)
-        if cfg.get("stop"):
-            return None
-        return cfg
-    except (json.JSONDecodeError, IOError):
+        cap = open_source(device, width, height, decode_width, mjpeg)
+    except ValueError as e:
+        print(f"[monitor] {e}, retrying in {ReopeningCamera.RETRY:.0f}s")
         return None
+    if not cap.isOpened():
+        print(f"[monitor] Cannot open camera {device}, retrying in {ReopeningCamera.RETRY:.0f}s")
+        cap.release()
+        return None
+    mode = ""
+    if isinstance(cap, V4L2Camera):
+        mode = (f" ({cap.width}x{cap.height}, {'MJPEG 1/' + str(cap.factor) if cap.raw else 'BGR'} decode, "
+                f"{'drained' if cap.buffered else 'single'} buffer)")
+    print(f"[monitor] Camera {device} opened and warmed up{mode}")
+    return cap
+
+def load_pool(model: str, backend: str, cores: int, workers: int = 1, threads: int | None = None):
+    """Load the model (see nanovision.backends). Returns None on failure."""
+    # Suppress RKNN stdout noise
+    devnull_fd = os.open(os.devnull, os.O_WRONLY)
+    old_stdout_fd = os.dup(1)
+    os.dup2(devnull_fd, 1)
+    try:
+        pool = load_backend(model, backend, cores=cores, workers=workers, threads=threads)
+    except EngineError as e:
+        pool = None
+        error = e
+    finally:
+        os.dup2(old_stdout_fd, 1)
+        os.close(devnull_fd)
+        os.close(old_stdout_fd)
+    if pool is None:
+        print(f"[monitor] {error}")
+        return None
+    print(f"[monitor] Model loaded: {pool.describe()}")
+    return pool
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+class MonitorMetrics:
+    """The daemon's metric families; no-ops if the registry is disabled."""
+
+    def __init__(self, registry: Registry):
+        self.registry = registry
+        self.stage    = registry.histogram("monitor_stage_seconds", "Time spent in each pipeline stage",
+                                           ("camera", "stage"))
+        self.frames   = registry.counter("monitor_frames_total", "Frames handed to the infer stage",
+                                         ("camera",))
+        self.alerts   = registry.counter("monitor_alerts_total", "Alerts sent", ("camera",))
+        self.skipped  = registry.counter("monitor_skipped_cycles_total",
+                                         "Inference cycles skipped (motion, no_frame, engine, error)",
+                                         ("camera", "reason"))
+        self.interval = registry.gauge("monitor_interval_seconds", "Current inference interval",
+                                       ("camera",))
+        self.reopens  = registry.counter("monitor_camera_reopens_total",
+                                         "Camera reopens after a failed grab", ("camera",))
+        self.engine_failures = registry.counter("monitor_engine_init_failures_total",
+                                                "Failed model loads")
+        registry.gauge("process_resident_memory_bytes", "Resident memory of the daemon").set_function(rss_bytes)
+
+# ─── Shared engine ────────────────────────────────────────────────────────────
+class SharedEngine:
+    """One model load and inference pool for every camera, behind a FairScheduler.
+
+    Loaded by whichever camera needs it first; if loading fails, callers
+    get None and the next attempt waits RETRY seconds, doubling per failure
+    up to RETRY_MAX.
+    """
+
+    RETRY     = 5
+    RETRY_MAX = 300
+
+    def __init__(self, cores: int, metrics: MonitorMetrics, backend: str = "auto",
+                 model: str = MODEL_PATH, workers: int = 1, threads: int | None = None):
+        self.cores = cores
+        self.backend = backend
+        self.model   = model
+        self.workers = workers
+        self.threads = threads
+        self.metrics = metrics
+        self.pool: InferencePool | None = None
+        self.scheduler: FairScheduler | None = None
+        self._lock     = threading.Lock()
+        self._retry_at = 0.0
+        self._delay    = self.RETRY
+
+    def get(self) -> FairScheduler | None:
+        with self._lock:
+            if self.scheduler is None and time.monotonic() >= self._retry_at:
+                self.pool = load_pool(self.model, self.backend, self.cores, self.workers, self.threads)
+                if self.pool is None:
+                    self.metrics.engine_failures.inc()
+                    print(f"[monitor] Retrying model load in {self._delay:.0f}s")
+                    self._retry_at = time.monotonic() + self._delay
+                    self._delay    = min(self._delay * 2, self.RETRY_MAX)
+                else:
+                    self.scheduler = FairScheduler(self.pool)
+                    self._delay    = self.RETRY
+            return self.scheduler
+
+    def snapshot(self) -> dict:
+        if self.pool is None:
+            return {"loaded": False}
+        return {"loaded": True, **self.pool.describe(), "scheduler": self.scheduler.snapshot()}
+
+    def release(self) -> None:
+        with self._lock:
+            if self.scheduler is not None:
+                self.scheduler.close()
+                self.pool.release()
+            self.pool, self.scheduler = None, None
+
+# ─── Pipeline ─────────────────────────────────────────────────────────────────
+class CameraPipeline:
+    """Capture, inference and alert stages for one camera, each on its own thread.
+
+    capture — owns the camera. Grabs continuously so the driver queue never
+              goes stale, and decodes a frame only when inference asks (or,
+              with clips on, at clipFps into the pre-event ring).
+              Reopens the device in the background on failure, without
+              affecting other cameras.
+    infer   — paces itself with a Cadence (fixed or adaptive interval) and
+              runs preprocess + decode around an inference submitted to
+              the shared engine.
+    post    — filters target labels, tracks them across cycles, and for
+              alert-worthy frames annotates, encodes and hands off the JPEG.
+
+    Stages are linked by drop-oldest queues, so a slow JPEG encode or IPC
+    write never delays the next inference.
+    """
+
+    def __init__(self, name: str, labels: list[str], cfg: dict, engine: SharedEngine,
+                 clips: ClipExporter, sender: ImageSender, tasks: TaskWriter, metrics: MonitorMetrics):
+        self.name    = name
+        self.labels  = labels
+        self.cfg     = cfg                      # replaced wholesale by reconfigure()
+        self.engine  = engine
+        self.clips   = clips
+        self.sender  = sender
+        self.tasks   = tasks
+        self.ring: FrameRing | None = None      # pre-event frames, filled by capture
+        self._ring_key: tuple | None = None
+        self.tagged  = False                    # prefix captions with the camera name
+        self.reopens = 0
+        self.frames  = DropOldestQueue(1)       # capture → infer
+        self.results = DropOldestQueue(2)       # infer → post
+        self.metrics = metrics
+        self.stats   = {stage: StageStats(stage, metrics.stage.labels(name, stage) if stage in ("capture", "motion")
+                                          else None)
+                        for stage in ("capture", "motion", "infer", "post")}
+        self.motion: MotionGate | None = None   # motion/cadence: infer thread only
+        self.cadence = Cadence(log=lambda msg: print(f"[monitor] {name}: {msg}"))
+        self.preprocess = Preprocessor()         # reused input buffer: infer thread only
+        self.zones: list[Zone] = []              # zones/crops: written by the infer thread only
+        self._zones_spec = None
+        self._crops: list[Crop] = []
+        self._crops_key: tuple | None = None
+        self.tracker = Tracker()                 # tracker/alerts: post thread only
+        self.alerts  = AlertPolicy()
+        self.alerts_sent = 0
+        self._stop       = threading.Event()
+        self._wake       = threading.Event()    # stop()/reconfigure() → infer loop
+        self._want_frame = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for name, target in (("capture", self._capture_loop),
+                             ("infer",   self._infer_loop),
+                             ("post",    self._post_loop)):
+            t = threading.Thread(target=target, name=f"monitor-{self.name}-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def reconfigure(self, cfg: dict) -> None:
+        """Swap in a new config; a pending interval wait re-evaluates at once."""
+        self.cfg = cfg
+        self._wake.set()
+
+    def signal_stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def join(self) -> None:
+        for t in self._threads:
+            t.join(timeout=10)
+        self._threads.clear()
+
+    def stop(self) -> None:
+        self.signal_stop()
+        self.join()
+
+    def _timer(self, stage: str):
+        """Context manager feeding this camera's `stage` latency histogram."""
+        return self.metrics.stage.labels(self.name, stage).time()
+
+    def _skip(self, reason: str) -> None:
+        self.metrics.skipped.labels(self.name, reason).inc()
+
+    def snapshot(self) -> dict:
+        """Per-stage latency plus the depth/drops of each stage's input queue."""
+        return {
+            "device":  self.cfg.get("device"),
+            "capture": {**self.stats["capture"].snapshot(), "reopens": self.reopens},
+            "cadence": self.cadence.snapshot(),
+            "motion":  {**self.stats["motion"].snapshot(),
+                        **(self.motion.snapshot() if self.motion else {})},
+            "infer":   {**self.stats["infer"].snapshot(),
+                        "queue": len(self.frames), "dropped": self.frames.dropped,
+                        **({"zones": len(self.zones), "crops": len(self._crops)} if self.zones else {})},
+            "post":    {**self.stats["post"].snapshot(),
+                        "queue": len(self.results), "dropped": self.results.dropped},
+            "alerts":  {"sent": self.alerts_sent, "suppressed": self.alerts.suppressed,
+                        "tracks": len(self.tracker)},
+            **({"clip": self.ring.snapshot()} if self.ring else {}),
+        }
+
+    def _update_ring(self, cfg: dict) -> None:
+        """Create, resize or drop the pre-event ring to match the clip config."""
+        if not cfg.get("clip", False):
+            self.ring, self._ring_key = None, None
+            return
+        key = (cfg.get("clipPre", 5), cfg.get("clipPost", 3),
+               cfg.get("clipWidth", 640), cfg.get("clipMemoryMB", 16))
+        if key != self._ring_key:
+            pre, post, width, mb = key
+            # Hold the post window too, plus slack for the exporter to catch up.
+            self.ring = FrameRing(pre + post + 2, int(mb * 1024 * 1024), width=width)
+            self._ring_key = key
+
+    def _update_zones(self, cfg: dict, width: int, height: int) -> None:
+        """Re-parse zones and re-plan crops when the config or frame size changes."""
+        spec = cfg.get("zones")
+        if spec != self._zones_spec:
+            self._zones_spec, self._crops_key = spec, None
+            try:
+                self.zones = parse_zones(spec) if spec else []
+            except (ValueError, TypeError) as e:
+                print(f"[monitor] {self.name}: ignoring invalid zones: {e}")
+                self.zones = []
+        key = (width, height, cfg.get("zoneOverlap", TILE_OVERLAP))
+        if self.zones and key != self._crops_key:
+            self._crops = plan_crops(self.zones, width, height, overlap=key[2])
+            self._crops_key = key
+            print(f"[monitor] {self.name}: {len(self.zones)} zone(s) → "
+                  f"{len(self._crops)} crop(s) {[tuple(c) for c in self._crops]}")
+
+    def _on_camera_lost(self) -> None:
+        print(f"[monitor] {self.name}: frame capture failed, reopening camera")
+        self.reopens += 1
+        self.metrics.reopens.labels(self.name).inc()
+
+    def _capture_loop(self) -> None:
+        cfg = self.cfg
+        cap = ReopeningCamera(lambda: open_camera(cfg), on_lost=self._on_camera_lost,
+                              name=f"monitor-{self.name}")
+        next_clip = 0.0
+        while not self._stop.is_set():
+            if not cap.grab():
+                self._stop.wait(0.1)            # (re)opening in the background
+                continue
+            cfg = self.cfg
+            self._update_ring(cfg)
+            now = time.monotonic()
+            want_clip = self.ring is not None and now >= next_clip
+            if self._want_frame.is_set() or want_clip:
+                with self.stats["capture"].timed():
+                    ok, frame = cap.retrieve()
+                if not ok or frame is None:
+                    continue
+                if self._want_frame.is_set():
+                    self._want_frame.clear()
+                    self.frames.put(frame)
+                if self.ring is not None:
+                    self.ring.add(frame, now)
+                    next_clip = max(next_clip + 1.0 / cfg.get("clipFps", 5), now)
+        cap.release()
+
+    def _infer_loop(self) -> None:
+        interval = self.metrics.interval.labels(self.name)
+        while not self._stop.is_set():
+            cfg = self.cfg
+            self.cadence.configure(cfg)
+            interval.set(self.cadence.interval)
+            wait = self.cadence.due() - time.monotonic()
+            if wait > 0:
+                # Interruptible: a new interval or a stop takes effect at once.
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            self.cadence.begin()
+
+            scheduler = self.engine.get()
+            if scheduler is None:
+                self._skip("engine")
+                self._stop.wait(SharedEngine.RETRY)
+                continue
+
+            self._want_frame.set()
+            try:
+                frame = self.frames.get(timeout=5)
+            except queue.Empty:
+                self._skip("no_frame")
+                continue                        # camera (re)opening
+            self.metrics.frames.labels(self.name).inc()
+
+            # Optional motion gate: skip the NPU while the scene is static
+            if cfg.get("motionGate", False):
+                if self.motion is None:
+                    self.motion = MotionGate()
+                self.motion.configure(cfg)
+                with self.stats["motion"].timed():
+                    moving = self.motion.should_infer(frame)
+                if not moving:
+                    self._skip("motion")
+                    self.cadence.observe(active=False)
+                    continue
+            else:
+                self.motion = None
+
+            with self.stats["infer"].timed():
+                img_h, img_w = frame.shape[:2]
+                conf, classes = cfg.get("confidenceThreshold", 0.5), self._class_ids(cfg)
+                self._update_zones(cfg, img_w, img_h)
+                try:
+                    if self.zones:
+                        dets = detect_in_crops(frame, self._crops,
+                                               lambda inp: scheduler.infer(self.name, [inp]),
+                                               self.preprocess, conf, 0.45, classes, timer=self._timer)
+                        dets = dets[zone_index(dets, self.zones, img_w, img_h) >= 0]
+                    else:
+                        with self._timer("preprocess"):
+                            inp, meta = self.preprocess(frame)
+                        with self._timer("inference"):
+                            outputs = scheduler.infer(self.name, [inp])
+                        with self._timer("decode"):
+                            cands = decode_candidates(outputs, img_h, img_w, conf, letterbox=meta)
+                        with self._timer("nms"):
+                            dets = select_detections(cands, 0.45, classes)
+                except CancelledError:
+                    continue                    # engine shutting down
+                except RuntimeError as e:
+                    print(f"[monitor] {self.name}: inference failed: {e}")
+                    self._skip("error")
+                    continue
+            strong_motion = self.motion is not None and self.cadence.motion_active(self.motion.last_score)
+            self.cadence.observe(active=len(dets) > 0 or strong_motion)
+            self.results.put((frame, dets, cfg, time.monotonic()))
+
+    def _class_ids(self, cfg: dict) -> list[int]:
+        """Ids of the detectLabels classes, so NMS never sees the others."""
+        return class_ids(self.labels, cfg.get("detectLabels", ["person"]), NUM_CLASSES)
+
+    def _post_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                frame, dets, cfg, ts = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self.stats["post"].timed():
+                self._alert(frame, dets, cfg, ts)
+
+    def _alert(self, frame: np.ndarray, dets: np.ndarray, cfg: dict, ts: float) -> None:
+        detect_labels = set(cfg.get("detectLabels", ["person"]))
 
-def send_via_ipc(group_folder: str, image_path: str, caption: str, chat_jid: str):
-    """Write an IPC task file for nanoclaw to send the image."""
-    tasks_dir = os.path.join(IPC_BASE, group_folder, "tasks")
-    os.makedirs(tasks_dir, exist_ok=True)
-    task = {
-        "type": "send_image",
-        "chatJid": chat_jid,
-        "imagePath": image_path,
-        "caption": caption,
-    }
-    task_file = os.path.join(tasks_dir, f"monitor_{int(time.time() * 1000)}.json")
-    with open(task_file, "w") as f:
-        json.dump(task, f)
+        # Filter for target labels
+        keep = []
+        for i, det in enumerate(dets):
+            if label_name(self.labels, det[5]) in detect_labels:
+                keep.append(i)
+
+        if not keep:
+            return
+
+        # Track targets across cycles; alert only on new/returning tracks or
+        # a changed count, unless dedupAlerts is turned off.
+        tracked, gaps = self.tracker.update(dets[keep], ts)
+        self.alerts.cooldown = cfg.get("alertCooldown", 60)
+        reason = self.alerts.check(gaps, ts)
+        if reason is None and cfg.get("dedupAlerts", True):
+            return
+
+        # Build summary
+        summary_lines = []
+        zones = self.zones
+        in_zone = zone_index(tracked, zones, frame.shape[1], frame.shape[0]) if zones else None
+        for i, det in enumerate(tracked[:10]):
+            label = label_name(self.labels, det[5])
+            in_name = f" in {zones[in_zone[i]].name}" if in_zone is not None and in_zone[i] >= 0 else ""
+            summary_lines.append(f"• {label} #{int(det[6])}{in_name} ({det[4]*100:.0f}%)")
+        where   = f" on {self.name}" if self.tagged else ""
+        caption = f"🚨 Detected {len(tracked)} target(s){where}:\n" + "\n".join(summary_lines)
+
+        # Encode once and hand over the bytes
+        stamp = f"{int(time.time() * 1000)}-{self.alerts_sent}"    # unique per camera, even within 1 ms
+        image = frame
+        if cfg.get("sendAnnotated", True):
+            with self._timer("annotate"):
+                image = annotate(frame, tracked, self.labels)
+        with self._timer("encode"):
+            data = encode_jpeg(image, cfg.get("jpegQuality", JPEG_QUALITY), cfg.get("jpegMaxSide", JPEG_MAX_SIDE))
+        with self._timer("ipc"):
+            send_image(self.sender, self.tasks, cfg.get("groupFolder", "main"), data, caption,
+                       cfg.get("chatJid", ""), f"/tmp/nanoclaw-monitor-{self.name}-{stamp}.jpg",
+                       source=f"monitor_{self.name}")
+        if self.ring is not None:
+            fmt = cfg.get("clipFormat", "mp4")
+            clip_path = f"/tmp/nanoclaw-monitor-{self.name}-{stamp}.{fmt}"
+            clip_caption = f"🎞️ Clip{where}: {len(tracked)} target(s)"
+            self.clips.submit(ClipJob(
+                self.ring, ts, cfg.get("clipPre", 5), cfg.get("clipPost", 3),
+                cfg.get("clipFps", 5), fmt, clip_path,
+                lambda path: self.tasks.submit(cfg.get("groupFolder", "main"), cfg.get("chatJid", ""), path,
+                                               clip_caption, source=f"monitor_{self.name}_clip")))
+        self.alerts_sent += 1
+        self.metrics.alerts.labels(self.name).inc()
+        print(f"[monitor] {self.name}: alert sent ({reason or 'every cycle'}): "
+              f"{len(tracked)} target(s) detected")
+
+# ─── Monitor ──────────────────────────────────────────────────────────────────
+class Monitor:
+    """The set of running CameraPipelines plus the engine they share."""
+
+    def __init__(self, labels: list[str], cfg: dict):
+        self.labels  = labels
+        self.metrics = MonitorMetrics(Registry(enabled=cfg.get("metrics", True)))
+        self.engine  = SharedEngine(cfg.get("npuCores", DEFAULT_CORES), self.metrics,
+                                    cfg.get("backend", "auto"), cfg.get("model", MODEL_PATH),
+                                    cfg.get("cpuWorkers", 1), cfg.get("cpuThreads") or None)
+        self.clips   = ClipExporter()
+        self.sender  = ImageSender()
+        self.tasks   = TaskWriter(IPC_BASE, window=cfg.get("ipcWindow", COALESCE_WINDOW),
+                                  max_pending=cfg.get("ipcMaxPending", MAX_PENDING))
+        self.tasks.prune()                      # leftovers of an earlier run
+        self.cameras: dict[str, CameraPipeline] = {}
+        self.cfg: dict | None = None
+        self.stats_file = cfg.get("metricsFile") if self.metrics.registry.enabled else None
+        self.server: MetricsServer | None = None
+        listen = cfg.get("metricsListen", METRICS_LISTEN)
+        if self.metrics.registry.enabled and listen:
+            try:
+                self.server = MetricsServer(self.metrics.registry, listen, extra=self.snapshot)
+                print(f"[monitor] Metrics on {listen}")
+            except (OSError, ValueError) as e:
+                print(f"[monitor] Metrics endpoint {listen} unavailable: {e}")
+
+    def apply(self, cfg: dict) -> None:
+        """Start, stop or reconfigure cameras to match `cfg`."""
+        self.cfg = cfg
+        wanted = camera_configs(cfg)
+        gone = [name for name, cam in self.cameras.items()
+                if name not in wanted or capture_key(wanted[name]) != capture_key(cam.cfg)]
+        for name in gone:
+            self.cameras[name].signal_stop()
+        for name in gone:
+            self.cameras.pop(name).join()
+            if self.engine.scheduler is not None:
+                self.engine.scheduler.forget(name)
+            print(f"[monitor] Camera {name} stopped")
+        for name, cam_cfg in wanted.items():
+            cam = self.cameras.get(name)
+            if cam is None:
+                cam = self.cameras[name] = CameraPipeline(name, self.labels, cam_cfg, self.engine,
+                                                              self.clips, self.sender, self.tasks, self.metrics)
+                cam.start()
+                print(f"[monitor] Camera {name} started on {cam_cfg['device']}")
+            else:
+                cam.reconfigure(cam_cfg)
+        for cam in self.cameras.values():
+            cam.tagged = len(self.cameras) > 1
+
+    def snapshot(self) -> dict:
+        return {"engine":  self.engine.snapshot(),
+                "clips":   self.clips.snapshot(),
+                "handoff": self.sender.snapshot(),
+                "ipc":     self.tasks.snapshot(),
+                "cameras": {name: cam.snapshot() for name, cam in self.cameras.items()}}
+
+    def write_stats(self) -> None:
+        """Replace the metricsFile, if configured, with the snapshot and metrics."""
+        if not self.stats_file:
+            return
+        try:
+            write_json(self.stats_file, {"time": time.time(), **self.snapshot(),
+                                         "metrics": self.metrics.registry.snapshot()})
+        except OSError as e:
+            print(f"[monitor] Cannot write {self.stats_file}: {e}")
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        for cam in self.cameras.values():
+            cam.signal_stop()
+        for cam in self.cameras.values():
+            cam.join()
+        self.cameras.clear()
+        self.clips.close()
+        self.sender.close()
+        self.tasks.close()
+        self.engine.release()
 
 def main():
     print("[monitor] Starting monitor daemon, waiting for config...")
 
+    watcher = ConfigWatcher(CONFIG_PATH)
     running = True
     def handle_signal(sig, _frame):
         nonlocal running
         print(f"[monitor] Signal {sig} received, shutting down")
         running = False
+        watcher.wake()
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
 
     labels = load_labels(LABELS_PATH)
-    rknn = None
-    cap = None
+    monitor = None
+    last_stats = time.monotonic()
+    print(f"[monitor] Watching {CONFIG_PATH} ({watcher.mode})")
 
     while running:
-        cfg = read_config()
+        cfg = read_config(watcher)
         if cfg is None:
-            # No active monitoring — sleep and check again
-            if cap is not None:
-                cap.release()
-                cap = None
-            if rknn is not None:
-                rknn.release()
-                rknn = None
-            time.sleep(2)
+            # No active monitoring — release camera/NPU until the config returns
+            if monitor is not None:
+                monitor.stop()
+                monitor = None
+                print("[monitor] Monitoring paused")
+            watcher.wait()
             continue
 
-        chat_jid   = cfg.get("chatJid", "")
-        interval   = max(cfg.get("interval", 10), 3)  # minimum 3 seconds
-        detect_labels = set(cfg.get("detectLabels", ["person"]))
-        conf_thresh = cfg.get("confidenceThreshold", 0.5)
-        send_annotated = cfg.get("sendAnnotated", True)
-        group_folder = cfg.get("groupFolder", "main")
-
-        # Lazy-init camera
-        if cap is None:
-            cap = cv2.VideoCapture(CAMERA_DEVICE)
-            if not cap.isOpened():
-                print(f"[monitor] Cannot open camera {CAMERA_DEVICE}, retrying in 5s")
-                cap = None
-                time.sleep(5)
-                continue
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-            # Warm up auto-exposure
-            for _ in range(20):
-                cap.read()
-            print("[monitor] Camera opened and warmed up")
-
-        # Lazy-init RKNN
-        if rknn is None:
-            # Suppress RKNN stdout noise
-            devnull_fd = os.open(os.devnull, os.O_WRONLY)
-            old_stdout_fd = os.dup(1)
-            os.dup2(devnull_fd, 1)
-
-            from rknnlite.api import RKNNLite
-            rknn = RKNNLite()
-            ret = rknn.load_rknn(MODEL_PATH)
-            if ret != 0:
-                os.dup2(old_stdout_fd, 1)
-                os.close(devnull_fd)
-                os.close(old_stdout_fd)
-                print(f"[monitor] Failed to load RKNN model (ret={ret})")
-                time.sleep(5)
-                rknn = None
-                continue
-            ret = rknn.init_runtime()
-            os.dup2(old_stdout_fd, 1)
-            os.close(devnull_fd)
-            os.close(old_stdout_fd)
-            if ret != 0:
-                print(f"[monitor] Failed to init RKNN runtime (ret={ret})")
-                rknn.release()
-                rknn = None
-                time.sleep(5)
-                continue
-            print("[monitor] RKNN model loaded")
-
-        # Capture frame
-        ret_cap, frame = cap.read()
-        if not ret_cap or frame is None:
-            print("[monitor] Frame capture failed, reopening camera")
-            cap.release()
-            cap = None
-            time.sleep(2)
-            continue
+        if monitor is None:
+            monitor = Monitor(labels, cfg)
+            monitor.apply(cfg)
+            last_stats = time.monotonic()
+        elif cfg is not monitor.cfg:            # read_config() returns the cached dict until the file changes
+            monitor.apply(cfg)
+            print("[monitor] Config updated")
 
-        img_h, img_w = frame.shape[:2]
+        if time.monotonic() - last_stats >= STATS_INTERVAL:
+            print(f"[monitor] Stats: {json.dumps(monitor.snapshot())}")
+            monitor.write_stats()
+            last_stats = time.monotonic()
 
-        # Inference
-        rgb     = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        resized = cv2.resize(rgb, (MODEL_INPUT, MODEL_INPUT))
-        inp     = np.expand_dims(resized, 0)
-
-        outputs = rknn.inference(inputs=[inp])
-        if outputs is None:
-            print("[monitor] Inference returned None")
-            time.sleep(interval)
-            continue
-
-        dets = decode_outputs(outputs, img_h, img_w, conf_thresh, 0.45)
-
-        # Filter for target labels
-        matched = []
-        for det in dets:
-            cls_id = int(det[5])
-            label  = labels[cls_id] if cls_id < len(labels) else str(cls_id)
-            if label in detect_labels:
-                matched.append((label, float(det[4]), det))
-
-        if matched:
-            # Build summary
-            summary_lines = [f"• {lbl} ({conf*100:.0f}%)" for lbl, conf, _ in matched[:10]]
-            caption = f"🚨 Detected {len(matched)} target(s):\n" + "\n".join(summary_lines)
-
-            # Save image
-            ts = int(time.time() * 1000)
-            if send_annotated:
-                annotated_frame = annotate(frame, np.array([d for _, _, d in matched]), labels)
-                img_path = f"/tmp/nanoclaw-monitor-{ts}.jpg"
-                cv2.imwrite(img_path, annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 92])
-            else:
-                img_path = f"/tmp/nanoclaw-monitor-{ts}.jpg"
-                cv2.imwrite(img_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 92])
-
-            send_via_ipc(group_folder, img_path, caption, chat_jid)
-            print(f"[monitor] Alert sent: {len(matched)} target(s) detected")
-
-        # Sleep until next cycle
-        time.sleep(interval)
+        watcher.wait(timeout=max(0.0, last_stats + STATS_INTERVAL - time.monotonic()))
 
     # Cleanup
-    if cap is not None:
-        cap.release()
-    if rknn is not None:
-        rknn.release()
+    if monitor is not None:
+        monitor.stop()
+    watcher.close()
     print("[monitor] Stopped")
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+"""
+nanovision — shared YOLOv5/RKNN vision helpers for the NanoClaw host scripts.
+
+Imported by scripts/monitor.py, scripts/yolo-detect.py and
+scripts/vision-bench.py. The scripts put their own directory on sys.path, so
+`import nanovision` works without installing anything.
+
+backends, cache, cadence, engine, labels, metrics, pipeline, tasks and watch
+load only the standard library at import; the rest import NumPy and/or
+OpenCV. Scripts that must answer fast (--help, bad arguments, missing
+files) import the heavy modules only when needed.
+"""
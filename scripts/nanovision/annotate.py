@@ -0,0 +1,32 @@
+"""
+annotate.py — Draw detections onto a frame for alerts and --annotate output.
+"""
+
+import cv2
+import numpy as np
+
+from .labels import label_name
+
+BOX_COLOR  = (0, 255, 0)
+TEXT_COLOR = (0, 0, 0)
+FONT       = cv2.FONT_HERSHEY_SIMPLEX
+
+def annotate(frame: np.ndarray, detections: np.ndarray, labels: list[str]) -> np.ndarray:
+    """Copy of `frame` with a labelled box per detection row.
+
+    Rows are [x1, y1, x2, y2, conf, class_id] with an optional 7th column
+    holding a track id, drawn as "person #3 0.91".
+    """
+    out = frame.copy()
+    for det in detections:
+        x1, y1, x2, y2, conf, cls_id = det[:6]
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        track = f" #{int(det[6])}" if len(det) > 6 else ""
+        text  = f"{label_name(labels, cls_id)}{track} {conf:.2f}"
+
+        cv2.rectangle(out, (x1, y1), (x2, y2), BOX_COLOR, 2)
+        (tw, th), _ = cv2.getTextSize(text, FONT, 0.6, 2)
+        ty = max(y1 - 4, th + 4)
+        cv2.rectangle(out, (x1, ty - th - 4), (x1 + tw, ty), BOX_COLOR, -1)
+        cv2.putText(out, text, (x1, ty - 2), FONT, 0.6, TEXT_COLOR, 2)
+    return out
@@ -0,0 +1,203 @@
+"""
+backends.py — Inference backends: RKNN on the NPU, or YOLOv5s on the CPU.
+
+Every backend is an engine.InferencePool (the constructor loads the model,
+then submit / infer / imap, describe() and release()), so the monitor, the
+FairScheduler and yolo-detect don't care where inference runs.
+
+CpuPool runs the ONNX export the RKNN model was converted from (same graph,
+same three (1, 255, H, W) heads) with ONNX Runtime or OpenCV DNN. It takes
+the Preprocessor's letterboxed (1, 640, 640, 3) uint8 RGB input and applies
+the normalization RKNN folds into its model (NCHW, /255), so preprocessing
+and decode_candidates() are shared with the NPU path. `workers` inferences
+run at once and split `threads` intra-op threads between them: one worker
+on every CPU gives the lowest latency, two keep the CPU busy while the
+other worker's frame is being pre- or post-processed.
+
+load_backend() picks one. "auto" tries rknn, then onnxruntime, then opencv
+and keeps the first that loads; naming a backend tries only that one. Each
+looks for the model next to the given path with its own suffix
+(yolov5s.rknn ↔ yolov5s.onnx), so one model path works on every host.
+
+Like engine, this module imports only the standard library up front; NumPy,
+OpenCV and ONNX Runtime are loaded with the backend that needs them.
+
+Usage:
+  pool = load_backend("/models/yolov5s.rknn", "auto", cores=2)
+  pool.describe()         # {"backend": "onnxruntime", "workers": 1, "threads": 8, ...}
+  outputs = pool.infer([inp])
+  pool.release()
+"""
+
+import os
+from typing import Callable
+
+from .engine import DEFAULT_CORES, EngineError, InferencePool, NpuPool, _Worker, rknnlite_backend
+
+BACKENDS = ("rknn", "onnxruntime", "opencv")         # the order "auto" tries them in
+SUFFIXES = {"rknn": ".rknn", "onnxruntime": ".onnx", "opencv": ".onnx"}
+INSTALL  = {"rknn": "pip3 install rknn-toolkit-lite2",
+            "onnxruntime": "pip3 install onnxruntime",
+            "opencv": "pip3 install opencv-python-headless"}
+HEAD_CHANNELS = 255                                  # 3 anchors × (5 + 80 classes)
+MODEL_INPUT   = 640                                  # decoder.MODEL_INPUT, without importing NumPy
+
+def backend_order(backend: str) -> tuple[str, ...]:
+    """Backends load_backend() tries for `backend` ("auto" or one of BACKENDS)."""
+    if backend == "auto":
+        return BACKENDS
+    if backend not in BACKENDS:
+        raise EngineError(f"Unknown backend {backend!r} (choose auto, {', '.join(BACKENDS)})")
+    return (backend,)
+
+def model_for(model_path: str, backend: str) -> str:
+    """The file `backend` loads for `model_path`: yolov5s.rknn ↔ yolov5s.onnx."""
+    root, ext = os.path.splitext(model_path)
+    return root + SUFFIXES[backend] if ext in (".rknn", ".onnx") else model_path
+
+def find_model(model_path: str, backend: str) -> str | None:
+    """The first model file `backend` would try that exists, if any."""
+    for name in backend_order(backend):
+        path = model_for(model_path, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+def cpu_threads() -> int:
+    """CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:                  # not on Linux
+        return os.cpu_count() or 1
+
+# ─── CPU runtimes ─────────────────────────────────────────────────────────────
+def heads(outputs: list) -> list:
+    """The three YOLOv5 heads in stride order (80×80, 40×40, 20×20 at 640)."""
+    ordered = sorted(outputs, key=lambda o: -o.shape[-1])
+    if len(ordered) != 3 or any(o.ndim != 4 or o.shape[1] != HEAD_CHANNELS for o in ordered):
+        raise EngineError(f"Expected three (1, {HEAD_CHANNELS}, H, W) heads, got "
+                          f"{[tuple(o.shape) for o in outputs]}; use the export the RKNN model was "
+                          "converted from, without the Detect layer's decode")
+    return ordered
+
+class CpuRuntime:
+    """One CPU model instance, with the inference / release calls a worker makes.
+
+    Subclasses load the model and implement _run(blob) → list of outputs.
+    Not thread-safe: the input buffer is reused, so each worker owns one.
+    """
+
+    shares_threads = False                  # True if `threads` is process-wide
+
+    def __init__(self, size: int):
+        import numpy as np
+        self._blob = np.empty((1, 3, size, size), dtype=np.float32)
+
+    def inference(self, inputs: list) -> list:
+        import numpy as np
+        np.multiply(inputs[0].transpose(0, 3, 1, 2), 1 / 255, out=self._blob)
+        return heads(self._run(self._blob))
+
+    def _run(self, blob) -> list:
+        raise NotImplementedError
+
+    def release(self) -> None:
+        pass
+
+class OrtRuntime(CpuRuntime):
+    """ONNX Runtime session on the CPU execution provider."""
+
+    def __init__(self, model_path: str, threads: int, size: int):
+        import onnxruntime as ort
+        super().__init__(size)
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        opts.log_severity_level   = 3       # errors only
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self._input  = self.session.get_inputs()[0].name
+
+    def _run(self, blob) -> list:
+        return self.session.run(None, {self._input: blob})
+
+class OpenCVRuntime(CpuRuntime):
+    """cv2.dnn network on OpenCV's default (CPU) backend."""
+
+    shares_threads = True                   # cv2.setNumThreads() sets one pool for the process
+
+    def __init__(self, model_path: str, threads: int, size: int):
+        import cv2
+        super().__init__(size)
+        cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self._names = self.net.getUnconnectedOutLayersNames()
+
+    def _run(self, blob) -> list:
+        self.net.setInput(blob)
+        return list(self.net.forward(self._names))
+
+RUNTIMES: dict[str, Callable] = {"onnxruntime": OrtRuntime, "opencv": OpenCVRuntime}
+
+class CpuPool(InferencePool):
+    """`workers` CPU runtimes (ONNX Runtime or OpenCV DNN), fed round-robin."""
+
+    def __init__(
+        self,
+        model_path: str,
+        backend: str = "onnxruntime",
+        workers: int = 1,
+        threads: int | None = None,
+        runtime: Callable | None = None,
+        size: int = MODEL_INPUT,
+    ):
+        import numpy as np
+        super().__init__()
+        if not os.path.exists(model_path):
+            raise EngineError(f"ONNX model not found: {model_path}")
+        factory = runtime or RUNTIMES[backend]
+        workers = max(workers, 1)
+        self.name    = backend
+        self.model   = model_path
+        self.threads = threads or cpu_threads()
+        per_worker   = self.threads if factory.shares_threads else max(self.threads // workers, 1)
+        try:
+            for i in range(workers):
+                rt = factory(model_path, per_worker, size)
+                # Warm up, and check the output layout before the first frame.
+                rt.inference([np.zeros((1, size, size, 3), dtype=np.uint8)])
+                self._workers.append(_Worker(rt, None, f"cpu-{backend}-{i}"))
+        except BaseException:
+            self.release()
+            raise
+
+    def describe(self) -> dict:
+        return {**super().describe(), "threads": self.threads, "model": os.path.basename(self.model)}
+
+# ─── Selection ────────────────────────────────────────────────────────────────
+def load_backend(
+    model_path: str,
+    backend: str = "auto",
+    cores: int = DEFAULT_CORES,
+    workers: int = 1,
+    threads: int | None = None,
+    rknn: Callable[[], object] = rknnlite_backend,
+) -> InferencePool:
+    """Load the model on `backend`, or with "auto" on the first of BACKENDS
+    that can; raises EngineError listing why each one failed.
+
+    `cores` applies to rknn, `workers` and `threads` to the CPU.
+    """
+    errors = []
+    for name in backend_order(backend):
+        path = model_for(model_path, name)
+        try:
+            if not os.path.exists(path):
+                raise EngineError(f"model not found: {path}")
+            if name == "rknn":
+                return NpuPool(path, cores=cores, backend=rknn)
+            return CpuPool(path, name, workers=workers, threads=threads)
+        except ImportError:
+            errors.append(f"{name}: not installed ({INSTALL[name]})")
+        except Exception as e:              # cv2.error, ONNX Runtime's own errors, EngineError
+            errors.append(f"{name}: {e}")
+    raise EngineError("No inference backend could load the model (" + "; ".join(errors) + ")")
@@ -0,0 +1,187 @@
+"""
+cache.py — Content-addressed cache of decoded detection candidates.
+
+Agents often ask about the same snapshot more than once. ResultCache maps
+a hash of the encoded image bytes, the model file's identity and the
+decode parameters to the pre-NMS candidates decode_candidates() produced
+at a low confidence floor. Any later request with conf >= that floor and
+any NMS threshold is answered from the entry exactly: keeping the rows
+scoring above conf reproduces what a decode at conf would have returned,
+in the same order, so select_detections() gives identical detections.
+
+The memory tier is an LRU bounded by entry count and bytes. With
+`directory`, entries are also written there as small .npy files (atomic
+rename) and read back on a memory miss, so a one-shot CLI run can skip
+loading the model altogether; the directory is pruned oldest-first past
+`max_disk_entries`.
+
+Usage:
+  cache = ResultCache(directory="/tmp/nanoclaw-yolo-cache")
+  key   = cache_key(jpeg_bytes, model_id(model_path), input=640)
+  cands = cache.get(key, conf)
+  if cands is None:
+      floor = min(conf, CACHE_FLOOR)
+      cands = decode_candidates(outputs, h, w, floor, letterbox)
+      cache.put(key, cands, floor)
+  dets  = select_detections(cands[cands[:, 4] > conf], nms)
+
+Only the standard library loads with the module: NumPy is imported when a
+ResultCache first stores or reads an array, so a one-shot CLI run that
+fails early (or never caches) doesn't pay for it.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CACHE_FLOOR   = 0.1     # candidates are kept down to this confidence
+CACHE_VERSION = 1       # bump when decoding changes what a key maps to
+
+def model_id(path: str) -> str:
+    """Identity of a model file: path, size and mtime, so a replaced model misses."""
+    st = os.stat(path)
+    return f"{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+def cache_key(data: bytes, model: str, **params) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps([CACHE_VERSION, model, params], sort_keys=True).encode())
+    h.update(data)
+    return h.hexdigest()
+
+class ResultCache:
+    """LRU of candidate arrays keyed by cache_key(), with an optional disk tier."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024,
+                 directory: str | None = None, max_disk_entries: int = 4096):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.directory   = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries: collections.OrderedDict = collections.OrderedDict()  # key → (floor, array)
+        self._bytes = 0
+        self._lock  = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._disk_count = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_count = len(self._disk_files())
+
+    def get(self, key: str, conf: float) -> np.ndarray | None:
+        """Candidates for `key` if cached at a floor <= conf, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= conf:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1]
+        entry = self._load(key)
+        with self._lock:
+            if entry is None or entry[0] > conf:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._insert(key, entry)
+            return entry[1]
+
+    def put(self, key: str, candidates: np.ndarray, floor: float) -> None:
+        import numpy as np
+        candidates = np.ascontiguousarray(candidates, dtype=np.float32)
+        candidates.flags.writeable = False
+        entry = (float(floor), candidates)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] <= floor:
+                return                          # already as complete
+            self._insert(key, entry)
+        self._store(key, entry)
+
+    def _insert(self, key: str, entry: tuple) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1].nbytes
+        self._entries[key] = entry
+        self._bytes += entry[1].nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.counters["evictions"] += 1
+
+    # ─── Disk tier ────────────────────────────────────────────────────────────
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npy")
+
+    def _disk_files(self) -> list[str]:
+        return [os.path.join(self.directory, n) for n in os.listdir(self.directory) if n.endswith(".npy")]
+
+    def _load(self, key: str) -> tuple | None:
+        if not self.directory:
+            return None
+        import numpy as np
+        path = self._path(key)
+        try:
+            stored = np.load(path, allow_pickle=False)
+            os.utime(path)                      # recently used: pruned last
+        except (OSError, ValueError):
+            return None
+        if stored.ndim != 2 or stored.shape[1] != 7 or not len(stored):
+            return None
+        # Row 0 carries the floor, the rest are candidates.
+        candidates = np.ascontiguousarray(stored[1:, :6])
+        candidates.flags.writeable = False
+        return float(stored[0, 6]), candidates
+
+    def _store(self, key: str, entry: tuple) -> None:
+        if not self.directory:
+            return
+        import numpy as np
+        floor, candidates = entry
+        stored = np.zeros((len(candidates) + 1, 7), dtype=np.float32)
+        stored[0, 6] = floor
+        stored[1:, :6] = candidates
+        path = self._path(key)
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".npy", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, stored)
+            existed = os.path.exists(path)
+            os.replace(tmp, path)
+        except OSError:
+            with contextlib.suppress(OSError, UnboundLocalError):
+                os.unlink(tmp)
+            return
+        with self._lock:
+            self._disk_count += not existed
+            prune = self._disk_count > self.max_disk_entries
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the least recently used files down to 90% of max_disk_entries."""
+        files = []
+        for path in self._disk_files():
+            with contextlib.suppress(OSError):
+                files.append((os.stat(path).st_mtime_ns, path))
+        files.sort()
+        excess = len(files) - int(self.max_disk_entries * 0.9)
+        for _, path in files[:max(excess, 0)]:
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+        with self._lock:
+            self._disk_count = len(files) - max(excess, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            looked = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hit_rate = (self.counters["hits"] + self.counters["disk_hits"]) / looked if looked else 0.0
+            return {**self.counters, "hit_rate": round(hit_rate, 3), "entries": len(self._entries),
+                    "bytes": self._bytes, **({"disk_entries": self._disk_count} if self.directory else {})}
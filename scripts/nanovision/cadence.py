@@ -0,0 +1,189 @@
+"""
+cadence.py — Inference interval that adapts to scene activity and system load.
+
+A fixed interval is either too slow while someone is at the door or wasteful
+when the yard has been empty for an hour. With adaptive cadence on, Cadence
+drops to `intervalMin` as soon as a cycle finds targets (or, with the motion
+gate, strong motion), then backs off by `backoff`× per empty cycle up to
+`intervalMax`. While the SoC is hotter than `thermalLimit` °C or the CPUs
+are busier than `loadLimit`, the interval is stretched by `throttleFactor`.
+Sensors are read at most every SENSOR_PERIOD seconds.
+
+Cycles are paced from their scheduled start rather than from when the last
+one finished, so processing time doesn't add to the interval; after a stall
+the schedule restarts from now instead of bursting to catch up.
+
+Usage:
+  cadence = Cadence(log=print)
+  while running:
+      cadence.configure(cfg)
+      wait(cadence.due() - clock())     # interruptible
+      cadence.begin()
+      ...                               # capture, infer
+      cadence.observe(active=len(dets) > 0)
+"""
+
+import glob
+import os
+import time
+from typing import Callable, NamedTuple
+
+MIN_INTERVAL  = 0.5     # seconds, floor for any interval
+THERMAL_GLOB  = "/sys/class/thermal/thermal_zone*/temp"
+SENSOR_PERIOD = 5.0     # seconds between temperature / CPU readings
+
+def soc_temperature(pattern: str = THERMAL_GLOB) -> float | None:
+    """Hottest thermal zone in °C, or None if there are none."""
+    temps = []
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as f:
+                temps.append(int(f.read()) / 1000.0)    # millidegrees
+        except (OSError, ValueError):
+            continue
+    return max(temps) if temps else None
+
+class CpuLoad:
+    """Busy fraction of all CPUs (0–1) since the previous call, from /proc/stat.
+
+    Falls back to the 1-minute load average per CPU where /proc is missing.
+    """
+
+    def __init__(self, path: str = "/proc/stat"):
+        self.path  = path
+        self._prev: tuple[int, int] | None = None
+
+    def _read(self) -> tuple[int, int] | None:
+        try:
+            with open(self.path) as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)     # idle + iowait
+        return sum(fields), idle
+
+    def __call__(self) -> float | None:
+        sample = self._read()
+        if sample is None:
+            try:
+                return os.getloadavg()[0] / (os.cpu_count() or 1)
+            except OSError:
+                return None
+        prev, self._prev = self._prev, sample
+        if prev is None or sample[0] <= prev[0]:
+            return None                         # first reading: no interval yet
+        total, idle = sample[0] - prev[0], sample[1] - prev[1]
+        return 1.0 - idle / total
+
+class Decision(NamedTuple):
+    interval: float
+    reason: str
+
+class Cadence:
+    """Paces one inference loop; see the module docstring."""
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        temperature: Callable[[], float | None] = soc_temperature,
+        cpu_load: Callable[[], float | None] | None = None,
+        log: Callable[[str], None] | None = None,
+    ):
+        self.clock       = clock
+        self.temperature = temperature
+        self.cpu_load    = cpu_load or CpuLoad()
+        self.log         = log
+        self.adaptive    = False
+        self.interval    = 10.0                 # current interval, seconds
+        self.reason      = ""                   # empty until configured
+        self.fixed       = 10.0
+        self.min         = 1.0
+        self.max         = 30.0
+        self.backoff     = 2.0
+        self.active_motion  = 0.02
+        self.thermal_limit  = 80.0
+        self.load_limit     = 0.9
+        self.throttle_factor = 2.0
+        self.throttled   = 0                    # cycles stretched by temperature or load
+        self._base       = None                 # unthrottled adaptive interval
+        self._last       = -float("inf")        # scheduled start of the current cycle
+        self._sensed_at  = -float("inf")
+        self._hot: str | None = None            # why we're throttling, if we are
+
+    def configure(self, cfg: dict) -> None:
+        """Apply interval / adaptive / intervalMin / intervalMax / backoff /
+        activeMotion / thermalLimit / loadLimit / throttleFactor."""
+        self.fixed    = max(float(cfg.get("interval", 10)), MIN_INTERVAL)
+        self.adaptive = bool(cfg.get("adaptive", False))
+        self.min      = max(float(cfg.get("intervalMin", 1.0)), MIN_INTERVAL)
+        self.max      = max(float(cfg.get("intervalMax", 30.0)), self.min)
+        self.backoff  = max(float(cfg.get("backoff", 2.0)), 1.0)
+        self.active_motion   = float(cfg.get("activeMotion", 0.02))
+        self.thermal_limit   = float(cfg.get("thermalLimit", 80.0))
+        self.load_limit      = float(cfg.get("loadLimit", 0.9))
+        self.throttle_factor = max(float(cfg.get("throttleFactor", 2.0)), 1.0)
+        if not self.adaptive:
+            self._base = None
+            self._set(Decision(self.fixed, "fixed"))
+        elif self._base is None:
+            self._base = min(max(self.fixed, self.min), self.max)
+            self._set(self._decide("start"))
+        else:
+            self._base = min(max(self._base, self.min), self.max)
+
+    def due(self) -> float:
+        """Clock time at which the next cycle should start."""
+        return self._last + self.interval
+
+    def begin(self) -> None:
+        """Mark the start of a cycle at its scheduled time, or now if we fell behind."""
+        now, due = self.clock(), self.due()
+        self._last = due if now - due < self.interval else now
+
+    def observe(self, active: bool) -> Decision:
+        """Feed back whether the cycle saw activity; sets the next interval."""
+        if not self.adaptive:
+            return Decision(self.interval, self.reason)
+        if active:
+            self._base = self.min
+            reason = "active"
+        else:
+            self._base = min(self._base * self.backoff, self.max)
+            reason = "idle"
+        return self._set(self._decide(reason))
+
+    def motion_active(self, score: float) -> bool:
+        """Whether a motion-gate score counts as activity."""
+        return score >= self.active_motion
+
+    def _decide(self, reason: str) -> Decision:
+        hot = self._sense()
+        if hot:
+            self.throttled += 1
+            return Decision(self._base * self.throttle_factor, f"{reason}, throttled: {hot}")
+        return Decision(self._base, reason)
+
+    def _sense(self) -> str | None:
+        """Re-read the sensors every SENSOR_PERIOD; the reason to throttle, if any."""
+        now = self.clock()
+        if now - self._sensed_at >= SENSOR_PERIOD:
+            self._sensed_at = now
+            temp, load = self.temperature(), self.cpu_load()
+            if temp is not None and temp >= self.thermal_limit:
+                self._hot = f"{temp:.0f}°C"
+            elif load is not None and load >= self.load_limit:
+                self._hot = f"CPU {load * 100:.0f}%"
+            else:
+                self._hot = None
+        return self._hot
+
+    def _set(self, decision: Decision) -> Decision:
+        changed = (round(decision.interval, 2) != round(self.interval, 2)
+                   or decision.reason.split(",")[0] != self.reason.split(",")[0])
+        if self.log is not None and self.reason and changed:
+            self.log(f"interval {self.interval:.1f}s → {decision.interval:.1f}s ({decision.reason})")
+        self.interval, self.reason = decision
+        return decision
+
+    def snapshot(self) -> dict:
+        return {"interval": round(self.interval, 2), "reason": self.reason, "throttled": self.throttled}
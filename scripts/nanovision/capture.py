@@ -0,0 +1,344 @@
+"""
+capture.py — Frame sources: low-latency V4L2 camera, file playback, background reopen.
+
+Every source implements the part of the cv2.VideoCapture API the scripts use
+(isOpened / grab / retrieve / read / release), as synthetic.SyntheticCamera
+does, so the monitor, yolo-detect and the bench can swap them freely;
+open_source() picks one from a device string; files are only played when
+the caller allows them.
+
+V4L2Camera asks the camera for MJPEG with a one-buffer driver queue, so a
+grab() after a long interval lands on a fresh frame instead of one that sat
+in the queue. It takes the compressed frame as-is (CONVERT_RGB off) and
+decodes it with libjpeg's DCT scaling (IMREAD_REDUCED_COLOR_2/4/8) straight
+to the smallest power-of-two reduction still `decode_width` wide — much
+cheaper than a full-size BGR decode followed by a resize. Where the driver
+won't shrink its queue, latest() drains it; where OpenCV won't hand out the
+raw JPEG, its own conversion is used and resized to the same size. Warm-up
+frames are grabbed but never decoded.
+
+FileSource plays a video file or a directory of JPEGs as if it were a live
+camera: at `fps`, grab() waits for the next frame like a camera would and
+skips frames the consumer was too slow for, so pipelines see real-time
+behaviour. JPEGs go through the same reduced-scale decode.
+
+ReopeningCamera wraps a source factory and opens it on a background thread,
+again after a failed grab; meanwhile grab() returns False at once, so the
+caller stays responsive to stop requests and config changes.
+
+Usage:
+  cam = ReopeningCamera(lambda: open_source("/dev/video0", 1280, 720, decode_width=640))
+  if cam.grab():
+      ok, frame = cam.retrieve()
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+WARMUP_FRAMES = 20      # grabbed (not decoded) after opening, for auto-exposure
+DRAIN_MAX     = 8       # most queued frames latest() discards
+DRAIN_WAIT    = 0.005   # a grab slower than this waited for a new frame: queue empty
+IMAGE_FPS     = 5.0     # playback rate of a JPEG directory
+IMAGE_EXTS    = (".jpg", ".jpeg")
+
+_REDUCED = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+def reduction(width: int, decode_width: int) -> int:
+    """Largest JPEG scale-down (1, 2, 4 or 8) that keeps the image decode_width wide."""
+    if decode_width <= 0:
+        return 1
+    for factor in (8, 4, 2):
+        if -(-width // factor) >= decode_width:     # libjpeg rounds up
+            return factor
+    return 1
+
+def decode_jpeg(data, factor: int = 1) -> np.ndarray | None:
+    """Decode JPEG bytes (or a uint8 buffer) at 1/factor scale; None if invalid."""
+    buf = np.frombuffer(data, np.uint8) if isinstance(data, (bytes, bytearray)) else data.reshape(-1)
+    return cv2.imdecode(buf, _REDUCED.get(factor, cv2.IMREAD_COLOR))
+
+def _shrink(frame: np.ndarray, factor: int) -> np.ndarray:
+    """What a 1/factor decode would have produced, for frames already decoded."""
+    if factor == 1:
+        return frame
+    h, w = frame.shape[:2]
+    return cv2.resize(frame, (-(-w // factor), -(-h // factor)), interpolation=cv2.INTER_AREA)
+
+# ─── V4L2 camera ──────────────────────────────────────────────────────────────
+class V4L2Camera:
+    """USB camera through OpenCV's V4L2 backend, tuned for fresh frames."""
+
+    def __init__(
+        self,
+        device: str,
+        width: int = 1280,
+        height: int = 720,
+        decode_width: int = 0,
+        mjpeg: bool = True,
+        warmup: int = WARMUP_FRAMES,
+        backend: Callable = cv2.VideoCapture,
+    ):
+        self.device = device
+        index = int(device) if str(device).isdigit() else device
+        self.cap = backend(index, cv2.CAP_V4L2)
+        self.raw      = False                   # retrieve() yields undecoded JPEG
+        self.buffered = True                    # driver queue longer than one frame
+        self.width, self.height, self.factor = width, height, 1
+        if not self.cap.isOpened():
+            return
+        if mjpeg:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.buffered = not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.raw      = mjpeg and bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+        self.width    = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or width
+        self.height   = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height
+        self.factor   = reduction(self.width, decode_width)
+        for _ in range(warmup):
+            self.cap.grab()
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        return self.cap.set(prop, value)
+
+    def get(self, prop: int) -> float:
+        return self.cap.get(prop)
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        ok, buf = self.cap.retrieve()
+        if not ok or buf is None:
+            return False, None
+        if buf.ndim == 3:                       # OpenCV converted it after all
+            return True, _shrink(buf, self.factor)
+        frame = decode_jpeg(buf, self.factor)
+        return frame is not None, frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def latest(self) -> tuple[bool, np.ndarray | None]:
+        """The newest frame, for callers that don't grab continuously."""
+        if not self.grab():
+            return False, None
+        if self.buffered:
+            # Queued frames come back at once; stop at the first grab that
+            # had to wait for the sensor.
+            for _ in range(DRAIN_MAX):
+                t0 = time.monotonic()
+                if not self.grab():
+                    return False, None
+                if time.monotonic() - t0 > DRAIN_WAIT:
+                    break
+        return self.retrieve()
+
+    def release(self) -> None:
+        self.cap.release()
+
+# ─── File playback ────────────────────────────────────────────────────────────
+class FileSource:
+    """A video file or JPEG directory played back like a live camera."""
+
+    def __init__(
+        self,
+        path: str,
+        fps: float | None = None,
+        loop: bool = True,
+        decode_width: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.path, self.loop = path, loop
+        self.decode_width = decode_width
+        self.clock, self.sleep = clock, sleep
+        self.images: list[str] | None = None
+        self.video = None
+        if os.path.isdir(path):
+            self.images = sorted(p for p in glob.glob(os.path.join(path, "*"))
+                                 if p.lower().endswith(IMAGE_EXTS))
+            self.fps = fps if fps is not None else IMAGE_FPS
+            first = cv2.imread(self.images[0]) if self.images else None
+            self.factor = reduction(first.shape[1], decode_width) if first is not None else 1
+        else:
+            self.video = cv2.VideoCapture(path)
+            self.fps = fps if fps is not None else (self.video.get(cv2.CAP_PROP_FPS) or IMAGE_FPS)
+            self.factor = reduction(int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH)), decode_width)
+        self.index   = -1                       # frame position, counting across loops
+        self.skipped = 0                        # frames dropped to stay real-time
+        self._t0: float | None = None
+        self._open = self.isOpened()
+
+    def isOpened(self) -> bool:
+        if self.images is not None:
+            return bool(self.images)
+        return self.video is not None and self.video.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        return False
+
+    def get(self, prop: int) -> float:
+        return float(self.fps) if prop == cv2.CAP_PROP_FPS else 0.0
+
+    def _due_index(self) -> int:
+        """Frame the stream is at now; waits if the consumer is ahead of it."""
+        if not self.fps:
+            return self.index + 1
+        now = self.clock()
+        if self._t0 is None:
+            self._t0 = now - (self.index + 1) / self.fps
+        target = int((now - self._t0) * self.fps)
+        if target <= self.index:
+            self.sleep(self._t0 + (self.index + 1) / self.fps - now)
+            target = self.index + 1
+        return target
+
+    def grab(self) -> bool:
+        if not self._open:
+            return False
+        target = self._due_index()
+        self.skipped += target - self.index - 1
+        if self.images is not None:
+            if target >= len(self.images) and not self.loop:
+                return False
+            self.index = target
+            return True
+        while self.index < target:
+            if not self.video.grab():
+                if not self.loop:
+                    return False
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                if not self.video.grab():
+                    return False
+            self.index += 1
+        return True
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        if not self._open or self.index < 0:
+            return False, None
+        if self.images is not None:
+            with open(self.images[self.index % len(self.images)], "rb") as f:
+                frame = decode_jpeg(f.read(), self.factor)
+            return frame is not None, frame
+        ok, frame = self.video.retrieve()
+        if not ok or frame is None:
+            return False, None
+        return True, _shrink(frame, self.factor)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self) -> None:
+        self._open = False
+        if self.video is not None:
+            self.video.release()
+
+def open_source(device: str, width: int = 1280, height: int = 720, decode_width: int = 0,
+                mjpeg: bool = True, warmup: int = WARMUP_FRAMES, allow_files: bool = False):
+    """A source for `device`: /dev/videoN or an index → V4L2Camera,
+    "synthetic[:objects]" → SyntheticCamera, and with `allow_files` a video
+    file or JPEG directory → FileSource. Anything else raises ValueError:
+    a device from a chat-supplied config must not read arbitrary host files."""
+    device = str(device)
+    if device.startswith("/dev/") or device.isdigit():
+        return V4L2Camera(device, width, height, decode_width, mjpeg, warmup)
+    if device.split(":")[0] == "synthetic":
+        from .synthetic import SyntheticCamera
+        objects = int(device.split(":")[1]) if ":" in device else 1
+        return SyntheticCamera(width, height, objects=objects, fps=IMAGE_FPS)
+    if allow_files:
+        return FileSource(device, decode_width=decode_width)
+    raise ValueError(f"Not a camera device: {device!r}")
+
+# ─── Background reopen ────────────────────────────────────────────────────────
+class ReopeningCamera:
+    """A source that (re)opens itself on a background thread.
+
+    `open_source` returns an opened source or None. It is retried every
+    RETRY seconds until it succeeds; after a failed grab the source is
+    released and reopened REOPEN_DELAY seconds later. `on_lost` is called
+    on the grabbing thread whenever that happens.
+    """
+
+    RETRY        = 5.0
+    REOPEN_DELAY = 2.0
+
+    # grab / retrieve / release belong to one thread (the capture loop);
+    # only the opener thread runs alongside it.
+
+    def __init__(self, open_source: Callable[[], object | None], on_lost: Callable[[], None] | None = None,
+                 name: str = "camera"):
+        self._open_source = open_source
+        self.on_lost = on_lost
+        self.name    = name
+        self.reopens = 0
+        self._source = None
+        self._lock   = threading.Lock()
+        self._closed = threading.Event()
+        self._ready  = threading.Event()
+        self._start(0.0)
+
+    def _start(self, delay: float) -> None:
+        threading.Thread(target=self._open_loop, args=(delay,), name=f"{self.name}-open", daemon=True).start()
+
+    def _open_loop(self, delay: float) -> None:
+        while not self._closed.wait(delay):
+            source = self._open_source()
+            if source is not None and source.isOpened():
+                with self._lock:
+                    if not self._closed.is_set():
+                        self._source = source
+                        self._ready.set()
+                        return
+                source.release()                # released while we were opening
+                return
+            if source is not None:
+                source.release()
+            delay = self.RETRY
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def isOpened(self) -> bool:
+        return self._source is not None
+
+    def grab(self) -> bool:
+        source = self._source
+        if source is None:
+            return False
+        if source.grab():
+            return True
+        with self._lock:
+            self._source = None
+            self._ready.clear()
+        source.release()
+        self.reopens += 1
+        if self.on_lost is not None:
+            self.on_lost()
+        if not self._closed.is_set():
+            self._start(self.REOPEN_DELAY)
+        return False
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        source = self._source
+        return source.retrieve() if source is not None else (False, None)
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self) -> None:
+        self._closed.set()
+        with self._lock:
+            source, self._source = self._source, None
+        if source is not None:
+            source.release()
@@ -0,0 +1,176 @@
+"""
+clip.py — Pre-event frame ring and background clip export for alerts.
+
+FrameRing keeps the last few seconds of a camera as downscaled JPEGs, bounded
+both in time and in bytes, so memory stays flat however long the monitor
+runs. When an alert fires, ClipExporter waits for the post-event window on
+its own thread, cuts the frames around the event out of the ring and
+encodes them, then hands the file to a callback (the monitor sends it via
+IPC). Capture and inference never wait on encoding.
+
+MP4 goes through the `ffmpeg` binary when present: H.264 that WhatsApp plays,
+and the stored JPEGs are piped in without re-decoding. Otherwise OpenCV's
+VideoWriter is used (avc1 if the build has it, else mp4v). GIF needs Pillow.
+"""
+
+import collections
+import io
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+# ─── Frame ring ───────────────────────────────────────────────────────────────
+class FrameRing:
+    """Time- and size-bounded ring of (timestamp, JPEG bytes) frames."""
+
+    def __init__(self, seconds: float, max_bytes: int, width: int = 640, quality: int = 70):
+        self.seconds   = seconds
+        self.max_bytes = max_bytes
+        self.width     = width
+        self.quality   = quality
+        self._frames: collections.deque = collections.deque()
+        self._bytes    = 0
+        self._lock     = threading.Lock()
+        self.evicted   = 0
+
+    def add(self, frame: np.ndarray, ts: float) -> None:
+        """Downscale to `width`, JPEG-encode and append; evicts old frames."""
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, round(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        data = buf.tobytes()
+        with self._lock:
+            self._frames.append((ts, data))
+            self._bytes += len(data)
+            while self._frames and (self._bytes > self.max_bytes or
+                                    self._frames[0][0] < ts - self.seconds):
+                _, old = self._frames.popleft()
+                self._bytes -= len(old)
+                self.evicted += 1
+
+    def between(self, start: float, end: float) -> list[bytes]:
+        """JPEGs with start <= timestamp <= end, oldest first."""
+        with self._lock:
+            return [data for ts, data in self._frames if start <= ts <= end]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            span = self._frames[-1][0] - self._frames[0][0] if self._frames else 0.0
+            return {"frames": len(self._frames), "bytes": self._bytes,
+                    "seconds": round(span, 1), "evicted": self.evicted}
+
+# ─── Encoders ─────────────────────────────────────────────────────────────────
+def encode_mp4(jpegs: list[bytes], fps: float, path: str) -> None:
+    if shutil.which("ffmpeg"):
+        cmd = ["ffmpeg", "-loglevel", "error", "-y", "-f", "image2pipe", "-framerate", str(fps),
+               "-c:v", "mjpeg", "-i", "-", "-c:v", "libx264", "-preset", "veryfast",
+               "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+               "-movflags", "+faststart", path]
+        subprocess.run(cmd, input=b"".join(jpegs), check=True, timeout=60)
+        return
+    frames = [cv2.imdecode(np.frombuffer(j, np.uint8), cv2.IMREAD_COLOR) for j in jpegs]
+    h, w = frames[0].shape[:2]
+    for fourcc in ("avc1", "mp4v"):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+        if writer.isOpened():
+            break
+    else:
+        raise RuntimeError("no MP4 encoder available (install ffmpeg)")
+    try:
+        for frame in frames:
+            writer.write(frame)
+    finally:
+        writer.release()
+
+def encode_gif(jpegs: list[bytes], fps: float, path: str) -> None:
+    from PIL import Image                   # optional dependency, GIF only
+    images = [Image.open(io.BytesIO(j)).convert("P", palette=Image.ADAPTIVE) for j in jpegs]
+    images[0].save(path, save_all=True, append_images=images[1:],
+                   duration=round(1000 / fps), loop=0, optimize=True)
+
+ENCODERS = {"mp4": encode_mp4, "gif": encode_gif}
+
+# ─── Exporter ─────────────────────────────────────────────────────────────────
+class ClipJob:
+    __slots__ = ("ring", "event_ts", "pre", "post", "fps", "fmt", "path", "on_done")
+
+    def __init__(self, ring: FrameRing, event_ts: float, pre: float, post: float, fps: float,
+                 fmt: str, path: str, on_done: Callable[[str], None]):
+        self.ring, self.event_ts, self.pre, self.post = ring, event_ts, pre, post
+        self.fps, self.fmt, self.path, self.on_done   = fps, fmt, path, on_done
+
+class ClipExporter:
+    """One background thread that turns ClipJobs into files.
+
+    A job waits until its post-event window has been captured. A job whose
+    event falls inside a clip already exported from the same ring is
+    skipped, so a burst of alerts yields one clip. At most `backlog` jobs
+    wait; beyond that the oldest is dropped.
+    """
+
+    def __init__(self, backlog: int = 4):
+        self._jobs: queue.Queue = queue.Queue()
+        self._backlog = backlog
+        self._stop    = threading.Event()
+        self._last_end: dict[int, float] = {}   # id(ring) → end of its last clip
+        self.exported = 0
+        self.skipped  = 0
+        self.failed   = 0
+        self.dropped  = 0
+        self._thread  = threading.Thread(target=self._run, name="clip-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: ClipJob) -> None:
+        while self._jobs.qsize() >= self._backlog:
+            try:
+                self._jobs.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                break
+        self._jobs.put(job)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self._jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if job.event_ts <= self._last_end.get(id(job.ring), -float("inf")):
+                self.skipped += 1
+                continue
+            end = job.event_ts + job.post
+            if self._stop.wait(max(0.0, end - time.monotonic())):
+                break
+            jpegs = job.ring.between(job.event_ts - job.pre, end)
+            if len(jpegs) < 2:
+                self.skipped += 1
+                continue
+            try:
+                ENCODERS[job.fmt](jpegs, job.fps, job.path)
+            except Exception as e:
+                self.failed += 1
+                print(f"[clip] Export of {job.path} failed: {type(e).__name__}: {e}")
+                continue
+            self._last_end[id(job.ring)] = end
+            self.exported += 1
+            job.on_done(job.path)
+
+    def snapshot(self) -> dict:
+        return {"exported": self.exported, "skipped": self.skipped, "failed": self.failed,
+                "dropped": self.dropped, "pending": self._jobs.qsize()}
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
@@ -0,0 +1,444 @@
+"""
+decoder.py — YOLOv5 head decoding and NMS for RKNN outputs.
+
+`decode_outputs` processes all three anchors of a head at once with NumPy, in
+the tensor's native (3, 85, H*W) layout: grid/anchor tensors are built once
+per head shape and cached, candidates come from one masked gather per head,
+and class ids from one argmax over the gathered rows. Candidates then go
+through `batched_nms`: class-aware, top-k limited, blocked IoU.
+`decode_outputs_reference` is the original per-cell loop and `nms` the
+original class-agnostic loop, kept as the ground truth for tests and
+benchmarks.
+
+`decode_candidates_int8` reads the runtime's native int8 NHWC tensors
+(NativeOutputs) instead of dequantized float32 ones: cells are screened on
+their quantized objectness through a precomputed 256-entry table, and only
+the few survivors are dequantized. It returns exactly what the float path
+returns for dequantize_outputs() of the same tensors, which remains the
+reference. decode_candidates() dispatches on the outputs' type, so callers
+don't need to know which kind they have. RKNNLite's Python API only returns
+dequantized float32 and has no native-output switch, so no engine produces
+NativeOutputs: the int8 path is bench-only, run on outputs quantized with
+quantize_outputs() by the tests, `vision-bench.py quant` and `scenarios
+--native`.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+# ─── YOLOv5 constants ─────────────────────────────────────────────────────────
+MODEL_INPUT  = 640
+NUM_CLASSES  = 80
+MAX_DETS     = 50
+NMS_TOP_K    = 1000     # candidates considered by NMS, highest scores first
+NMS_BLOCK    = 512      # boxes per IoU block; bounds the matrix at 512×512
+
+ANCHORS = [
+    [(10, 13), (16, 30),  (33, 23)],       # P3 / stride 8
+    [(30, 61), (62, 45),  (59, 119)],      # P4 / stride 16
+    [(116, 90),(156, 198),(373, 326)],     # P5 / stride 32
+]
+STRIDES = [8, 16, 32]
+
+# ─── NMS ──────────────────────────────────────────────────────────────────────
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float) -> list[int]:
+    """Original class-agnostic greedy NMS; reference for batched_nms.
+    Equal scores are visited latest first (a reversed stable argsort)."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas  = (x2 - x1) * (y2 - y1)
+    order  = scores.argsort(kind="stable")[::-1]
+    keep: list[int] = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(int(i))
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou   = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
+        order = order[np.where(iou <= iou_thresh)[0] + 1]
+    return keep
+
+def _iou_exceeds(x1, y1, x2, y2, areas, a, b, iou_thresh: float) -> np.ndarray:
+    """IoU > iou_thresh between boxes `a` and `b` (indices into the coordinate
+    columns; a column vector of `a` gives a matrix). Same formula as nms()."""
+    xx1 = np.maximum(x1[a], x1[b])
+    yy1 = np.maximum(y1[a], y1[b])
+    xx2 = np.minimum(x2[a], x2[b])
+    yy2 = np.minimum(y2[a], y2[b])
+    inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+    return inter / (areas[a] + areas[b] - inter + 1e-6) > iou_thresh
+
+def batched_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_thresh: float,
+    class_ids: np.ndarray | None = None,
+    top_k: int | None = NMS_TOP_K,
+    max_dets: int | None = None,
+    block: int = NMS_BLOCK,
+) -> np.ndarray:
+    """Greedy NMS returning kept indices in descending score order, equal
+    scores latest first as in nms().
+
+    With `class_ids`, boxes only suppress boxes of the same class: each
+    class is shifted by a multiple of the coordinates' full span (negative
+    ones included), so boxes of different classes can never overlap. Only
+    the `top_k` best scores are considered. Each block of candidates is
+    first checked against all boxes kept so far in one (kept × block) IoU
+    matrix; survivors are then resolved greedily, each kept box dropping
+    what it covers from the shrinking list of survivors. The loop runs once
+    per kept box and stops at `max_dets`, so thousands of low-threshold
+    candidates cost a few dozen IoU rows.
+    """
+    n = len(scores)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k is not None and n > top_k:
+        order = np.sort(np.argpartition(-scores, top_k - 1)[:top_k])
+    else:
+        order = np.arange(n)
+    order = order[np.argsort(scores[order], kind="stable")[::-1]]
+
+    coords = boxes[order, :4].astype(np.float64)
+    if class_ids is not None:
+        offset = coords.max() - coords.min() + 1.0
+        coords += (class_ids[order].astype(np.float64) * offset)[:, None]
+    x1, y1, x2, y2 = (np.ascontiguousarray(coords[:, j]) for j in range(4))
+    cols  = (x1, y1, x2, y2, (x2 - x1) * (y2 - y1))
+    limit = max_dets if max_dets is not None else len(order)
+
+    keep: list[int] = []
+    for start in range(0, len(order), block):
+        alive = np.arange(start, min(start + block, len(order)))
+        if keep:
+            # One (kept × block) matrix drops everything earlier boxes cover.
+            k = np.asarray(keep)[:, None]
+            alive = alive[~_iou_exceeds(*cols, k, alive, iou_thresh).any(axis=0)]
+        while alive.size:                                   # survivors, in score order
+            i, rest = alive[0], alive[1:]
+            keep.append(int(i))
+            if len(keep) >= limit:
+                return order[keep]
+            alive = rest[~_iou_exceeds(*cols, i, rest, iou_thresh)]
+    return order[keep]
+
+# ─── Grid / anchor tensors ────────────────────────────────────────────────────
+_GRID_CACHE: dict[tuple[int, int, int], tuple[np.ndarray, ...]] = {}
+
+def head_grid(head_idx: int, gh: int, gw: int) -> tuple[np.ndarray, ...]:
+    """Return flat (3*gh*gw,) arrays (grid_x, grid_y, anchor_w, anchor_h) for one head.
+
+    Cells are laid out anchor-major then row-major, matching the order in
+    which the reference loop visits them. Grid offsets stay integer and
+    anchor sizes float32 so the box arithmetic promotes exactly like the
+    scalar code did.
+    """
+    key = (head_idx, gh, gw)
+    cached = _GRID_CACHE.get(key)
+    if cached is not None:
+        return cached
+    n_anchor = len(ANCHORS[head_idx])
+    ys, xs = np.meshgrid(np.arange(gh, dtype=np.intp), np.arange(gw, dtype=np.intp), indexing="ij")
+    grid_x = np.tile(xs.ravel(), n_anchor)
+    grid_y = np.tile(ys.ravel(), n_anchor)
+    anchors = np.asarray(ANCHORS[head_idx], dtype=np.float32)
+    anchor_w = np.repeat(anchors[:, 0], gh * gw)
+    anchor_h = np.repeat(anchors[:, 1], gh * gw)
+    cached = (grid_x, grid_y, anchor_w, anchor_h)
+    _GRID_CACHE[key] = cached
+    return cached
+
+# ─── Decoder ──────────────────────────────────────────────────────────────────
+def _head_boxes(head_idx, gh, gw, idx, rows, scores, img_h, img_w, letterbox) -> np.ndarray:
+    """(N, 6) candidates for one head from its gathered (N, 85) float rows.
+
+    `idx` holds flat anchor-major cell indices (anchor * gh * gw + cell).
+    """
+    cls_id = (rows[:, 5:] * rows[:, 4:5]).argmax(axis=1)
+    grid_x, grid_y, anchor_w, anchor_h = head_grid(head_idx, gh, gw)
+    stride = STRIDES[head_idx]
+
+    # Same operand types as the scalar loop: float32 box terms, integer
+    # grid offsets (promoting xy to float64), float32 anchors.
+    bx = (rows[:, 0] * 2.0 - 0.5 + grid_x[idx]) * stride
+    by = (rows[:, 1] * 2.0 - 0.5 + grid_y[idx]) * stride
+    bw = (rows[:, 2] * 2.0) ** 2 * anchor_w[idx]
+    bh = (rows[:, 3] * 2.0) ** 2 * anchor_h[idx]
+
+    head = np.empty((idx.size, 6), dtype=np.float32)
+    if letterbox is None:
+        head[:, 0] = (bx - bw / 2) / MODEL_INPUT * img_w
+        head[:, 1] = (by - bh / 2) / MODEL_INPUT * img_h
+        head[:, 2] = (bx + bw / 2) / MODEL_INPUT * img_w
+        head[:, 3] = (by + bh / 2) / MODEL_INPUT * img_h
+    else:
+        bx = bx - letterbox.pad_x
+        by = by - letterbox.pad_y
+        head[:, 0] = (bx - bw / 2) / letterbox.scale
+        head[:, 1] = (by - bh / 2) / letterbox.scale
+        head[:, 2] = (bx + bw / 2) / letterbox.scale
+        head[:, 3] = (by + bh / 2) / letterbox.scale
+        np.clip(head[:, 0:4:2], 0, letterbox.width, out=head[:, 0:4:2])
+        np.clip(head[:, 1:4:2], 0, letterbox.height, out=head[:, 1:4:2])
+    head[:, 4] = scores
+    head[:, 5] = cls_id
+    return head
+
+def decode_candidates(
+    outputs: list,
+    img_h: int,
+    img_w: int,
+    conf_thresh: float,
+    letterbox=None,
+) -> np.ndarray:
+    """Return pre-NMS (N, 6) candidates [x1, y1, x2, y2, confidence, class_id].
+
+    Rows come out in head → anchor → row → column order, the order the
+    reference loop appends them in, so NMS tie-breaking is unchanged.
+
+    With a nanovision.preprocess.Letterbox, boxes are un-padded, un-scaled
+    and clipped to the frame; without one, the input is assumed to be a
+    plain stretch of the frame to MODEL_INPUT×MODEL_INPUT.
+
+    NativeOutputs are decoded by decode_candidates_int8.
+    """
+    if isinstance(outputs, NativeOutputs):
+        return decode_candidates_int8(outputs, outputs.quant, img_h, img_w, conf_thresh, letterbox)
+    parts: list[np.ndarray] = []
+
+    for head_idx, feat in enumerate(outputs):
+        feat = feat[0]                                      # (255, H, W)
+        gh, gw = feat.shape[1], feat.shape[2]
+        feat = feat.reshape(3, NUM_CLASSES + 5, gh * gw)    # (3, 85, HW), no transpose
+
+        obj = feat[:, 4, :]                                 # (3, HW)
+        live = obj.max(axis=1) >= conf_thresh               # per-anchor early-out
+        if not live.any():
+            continue
+
+        # max_c(obj * cls_c) == obj * max_c(cls_c) bit-for-bit when obj >= 0
+        # (float rounding is monotonic), which avoids the (3, 80, HW) product.
+        cls = feat[:, 5:, :]
+        max_scores = obj * cls.max(axis=1)                  # (3, HW)
+        if obj.min() < 0:
+            np.copyto(max_scores, obj * cls.min(axis=1), where=obj < 0)
+        mask = (max_scores > conf_thresh) & live[:, None]
+        idx  = np.flatnonzero(mask)                         # anchor → row → col order
+        if idx.size == 0:
+            continue
+
+        a_idx, cell = np.divmod(idx, gh * gw)
+        rows = feat[a_idx, :, cell]                         # (N, 85) gather
+        parts.append(_head_boxes(head_idx, gh, gw, idx, rows, max_scores.ravel()[idx],
+                                 img_h, img_w, letterbox))
+
+    if not parts:
+        return np.empty((0, 6), dtype=np.float32)
+    return np.concatenate(parts)
+
+# ─── Quantized decoder ────────────────────────────────────────────────────────
+class QuantParams(NamedTuple):
+    """Affine int8 quantization of one output: real = (q - zero_point) * scale."""
+    zero_point: int
+    scale: float
+
+class NativeOutputs(list):
+    """Head outputs as the runtime's native int8 (1, H, W, 255) NHWC tensors,
+    with the QuantParams of each in `quant`."""
+
+    def __init__(self, tensors, quant):
+        super().__init__(tensors)
+        self.quant = [QuantParams(int(zp), float(scale)) for zp, scale in quant]
+
+def calibrate(outputs: list) -> list[QuantParams]:
+    """Per-output parameters covering each float tensor's range, as the
+    model converter's asymmetric int8 quantization would choose them."""
+    params = []
+    for out in outputs:
+        lo, hi = min(float(out.min()), 0.0), max(float(out.max()), 0.0)
+        scale = (hi - lo) / 255.0 or 1.0
+        params.append(QuantParams(int(np.clip(round(-128 - lo / scale), -128, 127)), scale))
+    return params
+
+def quantize_outputs(outputs: list, quant: list) -> NativeOutputs:
+    """Float (1, 255, H, W) outputs → NativeOutputs, as the NPU would hand them back."""
+    tensors = []
+    for out, (zp, scale) in zip(outputs, quant):
+        q = np.clip(np.rint(out / np.float32(scale)) + zp, -128, 127).astype(np.int8)
+        tensors.append(np.ascontiguousarray(q.transpose(0, 2, 3, 1)))
+    return NativeOutputs(tensors, quant)
+
+def _dequantize(q: np.ndarray, zp: int, scale: float) -> np.ndarray:
+    return (q.astype(np.float32) - np.float32(zp)) * np.float32(scale)
+
+def dequantize_outputs(native: NativeOutputs) -> list[np.ndarray]:
+    """Float32 (1, 255, H, W) outputs; feeds the float path as the reference."""
+    return [np.ascontiguousarray(_dequantize(q, zp, scale).transpose(0, 3, 1, 2))
+            for q, (zp, scale) in zip(native, native.quant)]
+
+_LUT_CACHE: dict[tuple[int, float, float], np.ndarray] = {}
+
+def score_table(zp: int, scale: float, conf_thresh: float) -> np.ndarray:
+    """256 bools, indexed by a quantized objectness viewed as uint8: whether
+    any class score representable in this tensor could lift the cell's
+    obj * cls above conf_thresh. A conservative screen; survivors are
+    checked exactly after dequantizing."""
+    key = (zp, scale, conf_thresh)
+    table = _LUT_CACHE.get(key)
+    if table is None:
+        obj = _dequantize(np.arange(256, dtype=np.uint8).view(np.int8), zp, scale)
+        lo, hi = _dequantize(np.array([-128, 127], dtype=np.int8), zp, scale)
+        # obj * cls is monotonic in cls, also after float rounding.
+        table = np.where(obj >= 0, obj * hi, obj * lo) > conf_thresh
+        _LUT_CACHE[key] = table
+    return table
+
+def decode_candidates_int8(
+    native: list,
+    quant: list,
+    img_h: int,
+    img_w: int,
+    conf_thresh: float,
+    letterbox=None,
+) -> np.ndarray:
+    """decode_candidates() for native int8 NHWC outputs; identical rows to
+    decode_candidates(dequantize_outputs(native), ...)."""
+    parts: list[np.ndarray] = []
+
+    for head_idx, (q, (zp, scale)) in enumerate(zip(native, quant)):
+        gh, gw = q.shape[1], q.shape[2]
+        cells = q.reshape(gh * gw, 3, NUM_CLASSES + 5)      # NHWC: anchors innermost
+        obj_q = np.ascontiguousarray(cells[:, :, 4].T)      # (3, HW), 1/85 of the tensor
+
+        # Same per-anchor early-out as the float path, on 3 int8 maxima.
+        live = _dequantize(obj_q.max(axis=1), zp, scale) >= conf_thresh
+        if not live.any():
+            continue
+        screen = score_table(zp, scale, conf_thresh)[obj_q.view(np.uint8)] & live[:, None]
+        a_idx, cell = np.nonzero(screen)                    # anchor → row → col order
+        if cell.size == 0:
+            continue
+
+        rows = _dequantize(cells[cell, a_idx], zp, scale)   # (N, 85), survivors only
+        obj  = rows[:, 4]
+        scores = obj * rows[:, 5:].max(axis=1)
+        if obj.min() < 0:
+            np.copyto(scores, obj * rows[:, 5:].min(axis=1), where=obj < 0)
+        hit = scores > conf_thresh
+        if not hit.any():
+            continue
+        idx = a_idx[hit] * (gh * gw) + cell[hit]
+        parts.append(_head_boxes(head_idx, gh, gw, idx, rows[hit], scores[hit],
+                                 img_h, img_w, letterbox))
+
+    if not parts:
+        return np.empty((0, 6), dtype=np.float32)
+    return np.concatenate(parts)
+
+def select_detections(boxes: np.ndarray, nms_thresh: float, classes=None) -> np.ndarray:
+    """Class-aware NMS over decoded candidates, capped at MAX_DETS.
+
+    `classes` (class ids) drops every other class before NMS.
+    """
+    if classes is not None and len(boxes):
+        boxes = boxes[np.isin(boxes[:, 5], np.asarray(list(classes), dtype=np.float32))]
+    if len(boxes) == 0:
+        return boxes
+    keep = batched_nms(boxes, boxes[:, 4], nms_thresh, class_ids=boxes[:, 5], max_dets=MAX_DETS)
+    return boxes[keep]
+
+def select_detections_reference(boxes: np.ndarray, nms_thresh: float) -> np.ndarray:
+    """Original selection: class-agnostic nms() over all candidates, then the MAX_DETS cap."""
+    if len(boxes) == 0:
+        return boxes
+    keep   = nms(boxes[:, :4], boxes[:, 4], nms_thresh)
+    result = boxes[keep]
+
+    if len(result) > MAX_DETS:
+        result = result[:MAX_DETS]
+
+    return result
+
+def decode_outputs(
+    outputs: list,
+    img_h: int,
+    img_w: int,
+    conf_thresh: float,
+    nms_thresh: float,
+    letterbox=None,
+    classes=None,
+) -> np.ndarray:
+    """Return (N, 6) array: [x1, y1, x2, y2, confidence, class_id]
+
+    `classes`, if given, restricts the result to those class ids.
+    """
+    candidates = decode_candidates(outputs, img_h, img_w, conf_thresh, letterbox)
+    return select_detections(candidates, nms_thresh, classes)
+
+# ─── Reference decoder ────────────────────────────────────────────────────────
+def decode_candidates_reference(
+    outputs: list,
+    img_h: int,
+    img_w: int,
+    conf_thresh: float,
+) -> np.ndarray:
+    """Original per-cell loop; ground truth for tests and benchmarks."""
+    all_boxes: list = []
+
+    for head_idx, feat in enumerate(outputs):
+        feat = feat[0]                                      # (255, H, W)
+        gh, gw = feat.shape[1], feat.shape[2]
+        feat = feat.reshape(3, NUM_CLASSES + 5, gh, gw).transpose(0, 2, 3, 1)  # (3,H,W,85)
+
+        stride  = STRIDES[head_idx]
+        anchors = ANCHORS[head_idx]
+
+        for a_idx in range(3):
+            data    = feat[a_idx]                           # (H, W, 85)
+            box_xy  = data[..., :2]                         # already sigmoid
+            box_wh  = data[..., 2:4]
+            obj_conf= data[..., 4]                          # (H, W)
+            cls_conf= data[..., 5:]                         # (H, W, 80)
+
+            if obj_conf.max() < conf_thresh:
+                continue
+
+            scores       = obj_conf[..., None] * cls_conf  # (H, W, 80)
+            max_scores   = scores.max(axis=-1)              # (H, W)
+            mask         = max_scores > conf_thresh
+            if not mask.any():
+                continue
+
+            ys, xs = np.where(mask)
+            for y, x in zip(ys, xs):
+                bx = (box_xy[y, x, 0] * 2.0 - 0.5 + x) * stride
+                by = (box_xy[y, x, 1] * 2.0 - 0.5 + y) * stride
+                bw = (box_wh[y, x, 0] * 2.0) ** 2 * anchors[a_idx][0]
+                bh = (box_wh[y, x, 1] * 2.0) ** 2 * anchors[a_idx][1]
+
+                x1 = (bx - bw / 2) / MODEL_INPUT * img_w
+                y1 = (by - bh / 2) / MODEL_INPUT * img_h
+                x2 = (bx + bw / 2) / MODEL_INPUT * img_w
+                y2 = (by + bh / 2) / MODEL_INPUT * img_h
+
+                conf   = float(max_scores[y, x])
+                cls_id = int(scores[y, x].argmax())
+                all_boxes.append([x1, y1, x2, y2, conf, cls_id])
+
+    if not all_boxes:
+        return np.empty((0, 6), dtype=np.float32)
+    return np.array(all_boxes, dtype=np.float32)
+
+def decode_outputs_reference(
+    outputs: list,
+    img_h: int,
+    img_w: int,
+    conf_thresh: float,
+    nms_thresh: float,
+) -> np.ndarray:
+    """Original pipeline: per-cell loop, then class-agnostic nms() and the MAX_DETS cap."""
+    return select_detections_reference(decode_candidates_reference(outputs, img_h, img_w, conf_thresh),
+                                       nms_thresh)
@@ -0,0 +1,299 @@
+"""
+engine.py — Inference pools: the backend interface, the RKNN NPU pool, fair sharing.
+
+InferencePool is the interface every inference backend implements: the
+constructor loads the model, then submit / infer / imap, describe() and
+release(). Each worker owns one runtime and its own thread; frames are
+dealt round-robin across workers and `imap` yields results in submission
+order. NpuPool is the RKNN backend; nanovision.backends adds CPU ones and
+picks between them.
+
+NpuPool owns one runtime per NPU core, each pinned with a core mask and
+driven by its own thread (an RKNNLite context must not be shared between
+threads).
+
+NpuPool's backend is any zero-argument callable returning an object with the
+RKNNLite API (load_rknn / init_runtime / inference / release), so scheduling
+can be exercised with nanovision.fake.FakeRKNN on machines without an NPU.
+
+FairScheduler shares one pool between several producers (e.g. cameras),
+taking their requests in rotation so a busy producer can't starve the rest.
+"""
+
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
+
+# RKNNLite.NPU_CORE_0 / _1 / _2. RK3576 has two cores, RK3588 three.
+CORE_MASKS    = [1, 2, 4]
+NPU_CORE_AUTO = 0
+DEFAULT_CORES = 2
+
+class EngineError(RuntimeError):
+    """The model could not be loaded (on any core, or by any backend)."""
+
+def rknnlite_backend():
+    from rknnlite.api import RKNNLite
+    return RKNNLite()
+
+class _Worker:
+    def __init__(self, runtime, core_mask: int | None, name: str):
+        self.runtime   = runtime
+        self.core_mask = core_mask
+        self.jobs: queue.Queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            inputs, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                outputs = self.runtime.inference(inputs=inputs)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if outputs is None:
+                future.set_exception(RuntimeError("Inference returned None"))
+            else:
+                future.set_result(outputs)
+        self.runtime.release()
+
+class InferencePool:
+    """Workers fed round-robin; subclasses load a runtime per worker."""
+
+    name  = ""                                  # backend name, as load_backend() takes it
+    model = ""                                  # the model file this pool loaded
+
+    def __init__(self):
+        self._workers: list[_Worker] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "workers": len(self._workers)}
+
+    def submit(self, inputs: list) -> Future:
+        """Queue one inference on the next worker; the future yields its outputs."""
+        future: Future = Future()
+        with self._lock:
+            worker = self._workers[self._next % len(self._workers)]
+            self._next += 1
+        worker.jobs.put((inputs, future))
+        return future
+
+    def infer(self, inputs: list) -> list:
+        return self.submit(inputs).result()
+
+    def imap(self, inputs_iter: Iterable[list], prefetch: int | None = None) -> Iterator[list]:
+        """Run inference over an iterable, yielding outputs in input order.
+
+        Keeps up to `prefetch` (default 2 per worker) inferences in flight.
+        """
+        limit = prefetch or 2 * len(self._workers)
+        pending: collections.deque = collections.deque()
+        for inputs in inputs_iter:
+            pending.append(self.submit(inputs))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def release(self) -> None:
+        for worker in self._workers:
+            worker.jobs.put(None)
+        for worker in self._workers:
+            worker.thread.join()
+        self._workers.clear()
+
+class NpuPool(InferencePool):
+    """N runtime instances pinned to NPU cores, fed round-robin."""
+
+    name = "rknn"
+
+    def __init__(
+        self,
+        model_path: str,
+        cores: int = DEFAULT_CORES,
+        backend: Callable[[], object] = rknnlite_backend,
+    ):
+        super().__init__()
+        self.model = model_path
+        self.failed_cores: list[int] = []
+
+        # A single instance keeps the runtime's own core selection.
+        masks = [NPU_CORE_AUTO] if cores <= 1 else CORE_MASKS[:cores]
+        for mask in masks:
+            runtime = self._init_runtime(backend, model_path, mask)
+            if runtime is None:
+                self.failed_cores.append(mask)
+            else:
+                self._add_worker(runtime, mask)
+
+        # Degrade to one auto-placed instance if every pinned core failed.
+        if not self._workers and masks != [NPU_CORE_AUTO]:
+            runtime = self._init_runtime(backend, model_path, NPU_CORE_AUTO)
+            if runtime is not None:
+                self._add_worker(runtime, NPU_CORE_AUTO)
+        if not self._workers:
+            raise EngineError(f"Failed to init RKNN runtime on any core (masks={masks})")
+
+    @staticmethod
+    def _init_runtime(backend, model_path: str, core_mask: int):
+        runtime = backend()
+        ret = runtime.load_rknn(model_path)
+        if ret != 0:
+            runtime.release()
+            raise EngineError(f"Failed to load RKNN model (ret={ret})")
+        if core_mask == NPU_CORE_AUTO:
+            ret = runtime.init_runtime()
+        else:
+            ret = runtime.init_runtime(core_mask=core_mask)
+        if ret != 0:
+            runtime.release()
+            return None
+        return runtime
+
+    def _add_worker(self, runtime, core_mask: int) -> None:
+        self._workers.append(_Worker(runtime, core_mask, f"npu-core-{core_mask}"))
+
+    def describe(self) -> dict:
+        return {
+            **super().describe(),
+            "core_masks":   [w.core_mask for w in self._workers],
+            "failed_cores": list(self.failed_cores),
+        }
+
+# ─── Fair scheduling ──────────────────────────────────────────────────────────
+class _Request:
+    __slots__ = ("inputs", "future", "queued_at")
+
+    def __init__(self, inputs: list):
+        self.inputs    = inputs
+        self.future    = Future()
+        self.queued_at = time.monotonic()
+
+class FairScheduler:
+    """Round-robin access to an InferencePool for several keyed producers.
+
+    Each key holds at most `depth` queued requests; submitting another
+    cancels the oldest (its future raises CancelledError), since a newer
+    frame from the same camera supersedes it. A dispatcher thread keeps at
+    most `max_inflight` (default: one per worker) requests on the pool and
+    takes the next one from the keys in turn, so a camera on a 0.5 s
+    interval and one on 10 s each get their share.
+    """
+
+    def __init__(self, pool: InferencePool, depth: int = 1, max_inflight: int | None = None):
+        self.pool         = pool
+        self.depth        = depth
+        self.max_inflight = max_inflight or pool.size
+        self._cond    = threading.Condition()
+        self._queues: dict = {}                 # key → deque[_Request], in rotation order
+        self._keys: list = []
+        self._turn    = 0
+        self._inflight = 0
+        self._closed  = False
+        self._stats: dict = {}
+        self._thread  = threading.Thread(target=self._dispatch, name="npu-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, inputs: list) -> Future:
+        req = _Request(inputs)
+        with self._cond:
+            if self._closed:
+                raise EngineError("scheduler is closed")
+            q = self._queues.get(key)
+            if q is None:
+                q = self._queues[key] = collections.deque()
+                self._keys.append(key)
+                self._stats[key] = {"submitted": 0, "dispatched": 0, "dropped": 0, "wait_ms": 0.0}
+            stats = self._stats[key]
+            stats["submitted"] += 1
+            while len(q) >= self.depth:
+                q.popleft().future.cancel()
+                stats["dropped"] += 1
+            q.append(req)
+            self._cond.notify()
+        return req.future
+
+    def infer(self, key, inputs: list) -> list:
+        return self.submit(key, inputs).result()
+
+    def forget(self, key) -> None:
+        """Drop a producer that has gone away, cancelling its queued requests."""
+        with self._cond:
+            for req in self._queues.pop(key, ()):
+                req.future.cancel()
+            if key in self._keys:
+                self._keys.remove(key)
+            self._stats.pop(key, None)
+
+    def _next(self) -> tuple | None:
+        """Pop the next request in rotation (call with the lock held)."""
+        n = len(self._keys)
+        for i in range(n):
+            key = self._keys[(self._turn + i) % n]
+            q = self._queues[key]
+            if q:
+                self._turn = (self._turn + i + 1) % n
+                return key, q.popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                item = None
+                while not self._closed:
+                    if self._inflight < self.max_inflight:
+                        item = self._next()
+                        if item is not None:
+                            break
+                    self._cond.wait()
+                if item is None:
+                    return
+                key, req = item
+                if not req.future.set_running_or_notify_cancel():
+                    continue
+                self._inflight += 1
+                stats = self._stats[key]
+                stats["dispatched"] += 1
+                # Running mean of queue wait, so the snapshot stays O(1).
+                stats["wait_ms"] += ((time.monotonic() - req.queued_at) * 1000.0 - stats["wait_ms"]) / stats["dispatched"]
+            self.pool.submit(req.inputs).add_done_callback(lambda f, req=req: self._finish(req, f))
+
+    def _finish(self, req: _Request, done: Future) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify()
+        if done.exception() is not None:
+            req.future.set_exception(done.exception())
+        else:
+            req.future.set_result(done.result())
+
+    def snapshot(self) -> dict:
+        """Per-key submitted / dispatched / dropped counts and mean queue wait."""
+        with self._cond:
+            return {key: {**s, "wait_ms": round(s["wait_ms"], 2), "queued": len(self._queues[key])}
+                    for key, s in self._stats.items()}
+
+    def close(self) -> None:
+        """Stop dispatching and cancel queued requests; the pool is left to the caller."""
+        with self._cond:
+            self._closed = True
+            for q in self._queues.values():
+                while q:
+                    q.popleft().future.cancel()
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,56 @@
+"""
+fake.py — Stand-in for rknnlite.api.RKNNLite on machines without an NPU.
+
+FakeRKNN has the same load_rknn / init_runtime / inference / release API and
+replays recorded output tensors in a loop, with optional per-call latency and
+cores that refuse to init, so pools and pipelines can be tested anywhere.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+class FakeRKNN:
+    NPU_CORE_AUTO = 0
+    NPU_CORE_0    = 1
+    NPU_CORE_1    = 2
+    NPU_CORE_2    = 4
+
+    def __init__(
+        self,
+        recorded: list[list[np.ndarray]],
+        latency: float = 0.0,
+        fail_cores: tuple[int, ...] = (),
+        load_ret: int = 0,
+    ):
+        if not recorded:
+            raise ValueError("FakeRKNN needs at least one recorded output set")
+        self.recorded   = recorded
+        self.latency    = latency
+        self.fail_cores = fail_cores
+        self.load_ret   = load_ret
+        self.core_mask: int | None = None
+        self.calls      = 0
+        self.released   = False
+        self._lock      = threading.Lock()
+
+    def load_rknn(self, path: str) -> int:
+        return self.load_ret
+
+    def init_runtime(self, core_mask: int = NPU_CORE_AUTO) -> int:
+        if core_mask in self.fail_cores:
+            return -1
+        self.core_mask = core_mask
+        return 0
+
+    def inference(self, inputs: list) -> list[np.ndarray]:
+        with self._lock:
+            i = self.calls % len(self.recorded)
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.recorded[i]
+
+    def release(self) -> None:
+        self.released = True
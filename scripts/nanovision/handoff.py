@@ -0,0 +1,153 @@
+"""
+handoff.py — Hand encoded images to the NanoClaw process over a Unix socket.
+
+Alerts used to go through the filesystem: a JPEG in /tmp, a JSON task file
+next to it, and the IPC watcher polling for both. ImageSender instead writes
+each image straight to the socket NanoClaw listens on (src/image-socket.ts),
+so nothing touches the SD card and the send starts as soon as the frame
+arrives. If NanoClaw isn't listening, send() returns False and the caller
+falls back to the task-file path with the same bytes.
+
+Wire format, both directions, all lengths unsigned 32-bit big-endian:
+  request: <header length> <header JSON> <payload length> <payload bytes>
+  reply:   <length> <JSON {"ok": true} | {"ok": false, "error": "..."}>
+
+The header is a send_image task without imagePath:
+  {"type": "send_image", "chatJid": ..., "groupFolder": ..., "caption": ..., "mime": "image/jpeg"}
+
+Usage:
+  sender = ImageSender()
+  data   = encode_jpeg(frame, quality=80, max_side=1280)
+  if not sender.send({"type": "send_image", ...}, data):
+      ...  # write `data` to a file and use the task-file IPC instead
+"""
+
+import json
+import socket
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_SOCKET  = "/tmp/nanoclaw-images.sock"
+JPEG_QUALITY  = 80      # WhatsApp re-compresses anyway; 92 only cost bytes
+JPEG_MAX_SIDE = 1280    # long side, pixels; WhatsApp shows images at most ~1600
+MAX_FRAME     = 16 * 1024 * 1024    # matches MAX_IMAGE_BYTES on the Node side
+
+_LEN = struct.Struct(">I")
+
+def encode_jpeg(frame: np.ndarray, quality: int = JPEG_QUALITY, max_side: int = JPEG_MAX_SIDE) -> bytes:
+    """Downscale so the long side is at most `max_side`, then JPEG-encode once."""
+    h, w = frame.shape[:2]
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        frame = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes()
+
+def pack_frame(header: dict, payload: bytes) -> bytes:
+    head = json.dumps(header).encode()
+    if len(payload) > MAX_FRAME:
+        raise ValueError(f"payload of {len(payload)} bytes exceeds {MAX_FRAME}")
+    return b"".join((_LEN.pack(len(head)), head, _LEN.pack(len(payload)), payload))
+
+def _read_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("image socket closed mid-reply")
+        buf += chunk
+    return bytes(buf)
+
+def read_reply(sock: socket.socket) -> dict:
+    (length,) = _LEN.unpack(_read_exact(sock, _LEN.size))
+    return json.loads(_read_exact(sock, length))
+
+class ImageSender:
+    """A persistent connection to the NanoClaw image socket, shared by threads.
+
+    send() reconnects on demand; after a failed connect it waits RETRY
+    seconds before trying again, so a stopped NanoClaw costs callers one
+    failed connect per RETRY rather than one per image. Only a failed
+    connect or send is retried: once the whole frame has gone out, a
+    missing or late reply counts as `unconfirmed` and the image is not
+    sent again, since NanoClaw may already have delivered it.
+    """
+
+    RETRY = 5.0
+
+    def __init__(self, path: str = IMAGE_SOCKET, timeout: float = 10.0):
+        self.path     = path
+        self.timeout  = timeout
+        self._sock: socket.socket | None = None
+        self._lock    = threading.Lock()
+        self._retry_at = 0.0
+        self.sent     = 0
+        self.rejected = 0
+        self.failed   = 0
+        self.unconfirmed = 0
+
+    def send(self, header: dict, payload: bytes) -> bool:
+        """Deliver one image. True once the frame is sent (and NanoClaw has
+        replied, even to reject it, or failed to reply); False if nothing is
+        listening, so the caller should fall back."""
+        frame = pack_frame(header, payload)
+        with self._lock:
+            # A kept-alive connection may have died with a NanoClaw restart:
+            # that shows up on first use, so retry once on a fresh socket.
+            for fresh in (self._sock is None, True):
+                if fresh and time.monotonic() < self._retry_at:
+                    break
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    self._sock.sendall(frame)
+                except OSError:
+                    self._close()
+                    if fresh:
+                        self._retry_at = time.monotonic() + self.RETRY
+                        break
+                    continue
+                try:
+                    reply = read_reply(self._sock)
+                except (OSError, ValueError) as e:
+                    self._close()
+                    self.unconfirmed += 1
+                    print(f"[handoff] No reply from NanoClaw after sending an image ({e}); not resending")
+                    return True
+                if reply.get("ok"):
+                    self.sent += 1
+                else:
+                    self.rejected += 1
+                    print(f"[handoff] NanoClaw rejected image: {reply.get('error')}")
+                return True
+            self.failed += 1
+            return False
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def snapshot(self) -> dict:
+        return {"sent": self.sent, "rejected": self.rejected, "failed": self.failed,
+                "unconfirmed": self.unconfirmed, "connected": self._sock is not None}
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
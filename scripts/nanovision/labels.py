@@ -0,0 +1,21 @@
+"""
+labels.py — Class-name helpers for the YOLO label file.
+
+Standard library only, so the scripts can load and check labels before
+paying for NumPy and OpenCV imports.
+"""
+
+def load_labels(path: str) -> list[str]:
+    """One class name per non-empty line, indexed by class id."""
+    with open(path) as f:
+        return [ln.strip() for ln in f if ln.strip()]
+
+def label_name(labels: list[str], cls_id) -> str:
+    """Name of class `cls_id`, or the id itself when the label file is short."""
+    cls_id = int(cls_id)
+    return labels[cls_id] if 0 <= cls_id < len(labels) else str(cls_id)
+
+def class_ids(labels: list[str], names, num_classes: int) -> list[int]:
+    """Ids whose name (as label_name() reports it) is in `names`."""
+    names = set(names)
+    return [i for i in range(num_classes) if label_name(labels, i) in names]
@@ -0,0 +1,367 @@
+"""
+metrics.py — Counters, gauges and latency histograms in the Prometheus text format.
+
+Cheap enough for the per-frame hot path: timing a stage is two clock reads,
+a bisect into a dozen bucket bounds and three additions under a per-series
+lock, a few microseconds against the tens of milliseconds of a cycle. A
+disabled Registry hands out shared no-op series, so call sites stay
+unconditional and cost a couple of method calls.
+
+MetricsServer serves the registry over HTTP on a local TCP port or on a
+Unix socket:
+  GET /metrics   Prometheus text exposition (format 0.0.4)
+  GET /stats     JSON: the registry snapshot plus an optional extra dict
+
+Usage:
+  metrics = Registry()
+  stage   = metrics.histogram("monitor_stage_seconds", "Stage latency", ("camera", "stage"))
+  with stage.labels("door", "inference").time():
+      ...
+  metrics.counter("monitor_frames_total", "Frames", ("camera",)).labels("door").inc()
+  server  = MetricsServer(metrics, "127.0.0.1:9464")   # or "/tmp/metrics.sock"
+"""
+
+import bisect
+import contextlib
+import http.server
+import json
+import math
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Callable
+
+# Upper bounds in seconds: 1 ms (preprocess, NMS) up to 10 s (camera reopen).
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def rss_bytes() -> float:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024.0   # peak, KiB on Linux
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# ─── Series ───────────────────────────────────────────────────────────────────
+class Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+    def snapshot(self):
+        return self.value
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from `fn` at collection time instead."""
+        self._fn = fn
+
+    def get(self) -> float:
+        return self._fn() if self._fn is not None else self.value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f"{name}{labels} {_format_value(self.get())}"]
+
+    def snapshot(self):
+        return self.get()
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: "Histogram"):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.monotonic() - self.t0)
+        return False
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self._lock  = threading.Lock()
+        self.counts = [0] * (len(self.bounds) + 1)   # per bucket, last is +Inf
+        self.count  = 0
+        self.sum    = 0.0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum   += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the seconds spent inside it."""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside one."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for i, n in enumerate(counts):
+            if seen + n >= rank and n:
+                lo = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lo                        # beyond the last bound
+                return lo + (self.bounds[i] - lo) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        with self._lock:
+            counts, total, acc = list(self.counts), self.count, self.sum
+        inner = labels[1:-1] + "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{inner}le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format_value(acc)}")
+        lines.append(f"{name}_count{labels} {total}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, acc = self.count, self.sum
+        return {"count":   count,
+                "mean_ms": round(acc / count * 1000, 2) if count else 0.0,
+                "p50_ms":  round(self.quantile(0.5) * 1000, 2),
+                "p95_ms":  round(self.quantile(0.95) * 1000, 2)}
+
+class _NullSeries:
+    """Stands in for every series of a disabled registry."""
+
+    value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, fn) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self):
+        return _NULL_TIMER
+
+    def labels(self, *values) -> "_NullSeries":
+        return self
+
+_NULL_TIMER  = contextlib.nullcontext()
+_NULL_SERIES = _NullSeries()
+
+# ─── Families and registry ────────────────────────────────────────────────────
+class Family:
+    """One metric name: a series per combination of label values."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: tuple, factory: Callable):
+        self.kind       = kind
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self._factory   = factory
+        self._series: dict[tuple, object] = {}
+        self._lock      = threading.Lock()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                series = self._series.setdefault(key, self._factory())
+        return series
+
+    # An unlabelled family is its own single series.
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self.labels().set_function(fn)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _label_str(self, key: tuple) -> str:
+        if not key:
+            return ""
+        pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key))
+        return "{" + pairs + "}"
+
+    def _items(self) -> list[tuple]:
+        with self._lock:                        # series may be added mid-scrape
+            return sorted(self._series.items())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, series in self._items():
+            lines.extend(series.samples(self.name, self._label_str(key)))
+        return lines
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self.labels().snapshot()
+        return {",".join(key): series.snapshot() for key, series in self._items()}
+
+class Registry:
+    """Creates and collects metric families; disabled, it hands out no-ops."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._families: dict[str, Family] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind: str, name: str, help: str, labelnames: tuple, factory: Callable):
+        if not self.enabled:
+            return _NULL_SERIES
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = Family(kind, name, help, labelnames, factory)
+                if not family.labelnames:
+                    family.labels()             # export 0 before the first event
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered as a different {family.kind}")
+            return family
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Family:
+        return self._family("counter", name, help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Family:
+        return self._family("gauge", name, help, labelnames, Gauge)
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Family:
+        return self._family("histogram", name, help, labelnames, lambda: Histogram(buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self._families.values())
+        return "".join(line + "\n" for f in families for line in f.render())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            families = list(self._families.values())
+        return {f.name: f.snapshot() for f in families}
+
+def write_json(path: str, data: dict) -> None:
+    """Replace `path` atomically, so readers never see a half-written file."""
+    fd, tmp = tempfile.mkstemp(prefix=".stats-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+# ─── HTTP endpoint ────────────────────────────────────────────────────────────
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "nanovision-metrics"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, ctype = self.server.registry.render().encode(), "text/plain; version=0.0.4"
+        elif path == "/stats":
+            extra = self.server.extra() if self.server.extra else {}
+            body  = json.dumps({**extra, "metrics": self.server.registry.snapshot()}).encode()
+            ctype = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return str(self.client_address or "unix")
+
+    def log_message(self, format, *args):
+        pass                                    # one line per scrape is noise
+
+class _TcpServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class MetricsServer:
+    """Serve a Registry on "host:port", ":port" (localhost) or a Unix socket path.
+
+    `extra` is called per /stats request for a dict to merge into the JSON.
+    Raises OSError if the address can't be bound.
+    """
+
+    def __init__(self, registry: Registry, listen: str, extra: Callable[[], dict] | None = None):
+        self.listen = listen
+        self.unix   = "/" in listen
+        if self.unix:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(listen)               # stale socket from a previous run
+            self._server = _UnixServer(listen, _Handler)
+            os.chmod(listen, 0o600)
+        else:
+            host, _, port = listen.rpartition(":")
+            self._server = _TcpServer((host or "127.0.0.1", int(port)), _Handler)
+        self._server.registry = registry
+        self._server.extra    = extra
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
+        if self.unix:
+            with contextlib.suppress(OSError):
+                os.unlink(self.listen)
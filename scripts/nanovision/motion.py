@@ -0,0 +1,70 @@
+"""
+motion.py — Cheap motion pre-filter that decides whether a frame needs the NPU.
+
+Each frame is shrunk to a small grayscale thumbnail and compared against a
+running-average background. Inference runs when enough pixels changed, or
+when `heartbeat` seconds have passed since the last inference so a subject
+that stopped moving is still re-checked.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+THUMB_WIDTH = 160       # thumbnail width; height follows the frame's aspect
+BG_ALPHA    = 0.5       # weight of the newest frame in the running background
+
+class MotionGate:
+    def __init__(
+        self,
+        sensitivity: int = 25,
+        threshold: float = 0.005,
+        heartbeat: float = 60.0,
+        clock=time.monotonic,
+    ):
+        self.sensitivity = sensitivity      # per-pixel intensity delta that counts as change
+        self.threshold   = threshold        # fraction of changed pixels that counts as motion
+        self.heartbeat   = heartbeat        # force an inference at least this often (seconds)
+        self.clock       = clock
+        self.last_score  = 0.0
+        self.counters    = {"checked": 0, "skipped": 0, "motion": 0, "heartbeat": 0}
+        self._bg: np.ndarray | None = None
+        self._last_infer: float | None = None
+
+    def configure(self, cfg: dict) -> None:
+        """Apply motionSensitivity / motionThreshold / motionHeartbeat config keys."""
+        self.sensitivity = int(cfg.get("motionSensitivity", self.sensitivity))
+        self.threshold   = float(cfg.get("motionThreshold", self.threshold))
+        self.heartbeat   = float(cfg.get("motionHeartbeat", self.heartbeat))
+
+    def score(self, frame: np.ndarray) -> float:
+        """Fraction of thumbnail pixels that differ from the background; updates it."""
+        h, w = frame.shape[:2]
+        thumb = cv2.resize(frame, (THUMB_WIDTH, max(1, h * THUMB_WIDTH // w)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY) if thumb.ndim == 3 else thumb
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        if self._bg is None or self._bg.shape != gray.shape:
+            self._bg = gray.astype(np.float32)
+            return 1.0
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._bg))
+        cv2.accumulateWeighted(gray, self._bg, BG_ALPHA)
+        return float(np.count_nonzero(diff > self.sensitivity)) / diff.size
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        self.counters["checked"] += 1
+        self.last_score = self.score(frame)
+        now = self.clock()
+        if self.last_score >= self.threshold:
+            self.counters["motion"] += 1
+        elif self._last_infer is None or now - self._last_infer >= self.heartbeat:
+            self.counters["heartbeat"] += 1
+        else:
+            self.counters["skipped"] += 1
+            return False
+        self._last_infer = now
+        return True
+
+    def snapshot(self) -> dict:
+        return {**self.counters, "last_score": round(self.last_score, 4)}
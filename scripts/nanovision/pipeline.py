@@ -0,0 +1,91 @@
+"""
+pipeline.py — Building blocks for threaded capture → infer → post-process stages.
+
+Stages hand work to each other through DropOldestQueue, so a slow consumer
+never blocks its producer: the newest item always wins and the number of
+discarded items is counted. StageStats keeps per-stage latency figures that
+the monitor logs alongside queue depths, optionally feeding a
+nanovision.metrics histogram with the same measurements.
+"""
+
+import collections
+import contextlib
+import queue
+import threading
+import time
+
+class DropOldestQueue:
+    """Bounded FIFO whose put() never blocks; when full the oldest item is dropped."""
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._items: collections.deque = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None):
+        """Pop the oldest item, raising queue.Empty if none arrives within timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._items.popleft()
+
+    def clear(self) -> None:
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class StageStats:
+    """Thread-safe latency counters for one pipeline stage.
+
+    `hist`, if given, is anything with observe(seconds) (a metrics series)
+    and receives every recorded latency too.
+    """
+
+    def __init__(self, name: str, hist=None):
+        self.name   = name
+        self.hist   = hist
+        self._lock  = threading.Lock()
+        self.count  = 0
+        self.total  = 0.0
+        self.last   = 0.0
+        self.max    = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last   = seconds
+            self.max    = max(self.max, seconds)
+        if self.hist is not None:
+            self.hist.observe(seconds)
+
+    @contextlib.contextmanager
+    def timed(self):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(time.monotonic() - t0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            mean = self.total / self.count if self.count else 0.0
+            return {
+                "count":   self.count,
+                "last_ms": round(self.last * 1000, 1),
+                "mean_ms": round(mean * 1000, 1),
+                "max_ms":  round(self.max * 1000, 1),
+            }
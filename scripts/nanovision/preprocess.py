@@ -0,0 +1,72 @@
+"""
+preprocess.py — Letterbox preprocessing into reusable NHWC input buffers.
+
+Frames are resized with their aspect ratio preserved straight into the
+centre of a preallocated, contiguous (1, 640, 640, 3) uint8 buffer via
+`dst=`, then swapped BGR→RGB in place on the small image, so no full-size
+RGB copy or fresh 640×640 array is allocated per frame. The returned
+Letterbox records the scale and padding decode_outputs needs to map boxes
+back to frame coordinates.
+"""
+
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from .decoder import MODEL_INPUT
+
+PAD_VALUE = 114         # YOLOv5's letterbox grey
+
+class Letterbox(NamedTuple):
+    scale: float        # model pixels per frame pixel
+    pad_x: int          # left padding in model pixels
+    pad_y: int          # top padding in model pixels
+    width: int          # source frame size, for clipping
+    height: int
+
+def letterbox_geometry(width: int, height: int, size: int = MODEL_INPUT) -> tuple[Letterbox, int, int]:
+    """Return (meta, resized_w, resized_h) for fitting a frame into size×size."""
+    scale = min(size / width, size / height)
+    new_w = min(size, int(round(width * scale)))
+    new_h = min(size, int(round(height * scale)))
+    pad_x = (size - new_w) // 2
+    pad_y = (size - new_h) // 2
+    return Letterbox(scale, pad_x, pad_y, width, height), new_w, new_h
+
+class Preprocessor:
+    """Letterboxes frames into a ring of `buffers` reusable input tensors.
+
+    Each call returns the next buffer in the ring, so up to `buffers`
+    inferences may be in flight before one is overwritten. Not thread-safe;
+    give each thread its own Preprocessor.
+    """
+
+    def __init__(self, size: int = MODEL_INPUT, buffers: int = 1):
+        self.size = size
+        self._ring = [np.full((1, size, size, 3), PAD_VALUE, dtype=np.uint8) for _ in range(buffers)]
+        self._geometry: list[tuple | None] = [None] * buffers
+        self._next = 0
+
+    def __call__(self, frame: np.ndarray) -> tuple[np.ndarray, Letterbox]:
+        """Letterbox a BGR frame; returns the (1, size, size, 3) RGB input and its Letterbox."""
+        h, w = frame.shape[:2]
+        meta, new_w, new_h = letterbox_geometry(w, h, self.size)
+        i = self._next
+        self._next = (i + 1) % len(self._ring)
+        buf = self._ring[i]
+
+        # Re-grey the border only when the frame geometry changes.
+        geometry = (meta.pad_x, meta.pad_y, new_w, new_h)
+        if self._geometry[i] != geometry:
+            buf.fill(PAD_VALUE)
+            self._geometry[i] = geometry
+
+        roi = buf[0, meta.pad_y:meta.pad_y + new_h, meta.pad_x:meta.pad_x + new_w]
+        if (new_w, new_h) == (w, h):
+            np.copyto(roi, frame)
+        else:
+            interp = cv2.INTER_AREA if meta.scale < 1 else cv2.INTER_LINEAR
+            cv2.resize(frame, (new_w, new_h), dst=roi, interpolation=interp)
+        cv2.cvtColor(roi, cv2.COLOR_BGR2RGB, dst=roi)
+        return buf, meta
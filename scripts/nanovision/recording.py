@@ -0,0 +1,33 @@
+"""
+recording.py — Save and load captured frames with their raw RKNN outputs.
+
+A recording is one compressed .npz holding `frames` (N, H, W, 3) uint8 and,
+per output head, `head<i>` (N, 1, 255, H, W) float32. Record once on the
+board (vision-bench.py record), then replay the outputs anywhere with
+FakeRKNN(load_recording(path).outputs) and feed the frames to the same
+preprocess/decode/annotate code.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+class Recording(NamedTuple):
+    frames:  list[np.ndarray]           # BGR frames as captured
+    outputs: list[list[np.ndarray]]     # per frame, the runtime's output list
+
+def save_recording(path: str, frames: list[np.ndarray], outputs: list[list[np.ndarray]]) -> None:
+    if not frames or len(frames) != len(outputs):
+        raise ValueError("need one output set per frame and at least one frame")
+    arrays = {"frames": np.stack(frames)}
+    for i in range(len(outputs[0])):
+        arrays[f"head{i}"] = np.stack([out[i] for out in outputs])
+    np.savez_compressed(path, **arrays)
+
+def load_recording(path: str) -> Recording:
+    with np.load(path) as data:
+        frames = list(data["frames"])
+        heads  = sorted((k for k in data.files if k.startswith("head")), key=lambda k: int(k[4:]))
+        stacks = [data[k] for k in heads]
+    outputs = [[stack[n] for stack in stacks] for n in range(len(frames))]
+    return Recording(frames, outputs)
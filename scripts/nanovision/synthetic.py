@@ -0,0 +1,156 @@
+"""
+synthetic.py — Synthetic YOLOv5 RKNN outputs and camera for tests and benchmarks.
+
+Produces the same list-of-(1, 255, H, W) float32 tensors the runtime returns,
+either with a controllable fraction of "hot" cells (make_outputs) or with
+YOLO-like responses around given object boxes (make_scene), so decode/NMS
+cost can be measured without a board. SyntheticCamera stands in for
+cv2.VideoCapture with moving objects on a noisy background.
+"""
+
+import time
+
+import numpy as np
+
+from .decoder import ANCHORS, MODEL_INPUT, NUM_CLASSES, STRIDES
+
+PERSON = 0              # COCO class id
+
+def make_outputs(density: float, seed: int = 0, input_size: int = MODEL_INPUT) -> list[np.ndarray]:
+    """Return RKNN-shaped head outputs where ~`density` of all cells fire.
+
+    Background cells have low objectness/class scores; hot cells get
+    objectness and one class score in [0.6, 1.0) so they survive the usual
+    0.25–0.5 confidence thresholds.
+    """
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for stride in STRIDES:
+        g = input_size // stride
+        feat = rng.random((3, NUM_CLASSES + 5, g, g), dtype=np.float32)
+        feat[:, 4] *= 0.05                                  # background objectness
+        feat[:, 5:] *= 0.3                                  # background class scores
+        hot = rng.random((3, g, g)) < density
+        a, y, x = np.nonzero(hot)
+        feat[a, 4, y, x] = rng.uniform(0.6, 1.0, a.size).astype(np.float32)
+        cls = rng.integers(0, NUM_CLASSES, a.size)
+        feat[a, 5 + cls, y, x] = rng.uniform(0.6, 1.0, a.size).astype(np.float32)
+        outputs.append(feat.reshape(1, 3 * (NUM_CLASSES + 5), g, g))
+    return outputs
+
+def make_scene(
+    boxes: list[tuple[float, float, float, float]],
+    cls_id: int = PERSON,
+    seed: int = 0,
+    input_size: int = MODEL_INPUT,
+) -> list[np.ndarray]:
+    """Return head outputs with one object per model-space (x1, y1, x2, y2) box.
+
+    Like a trained YOLOv5, each object fires on every anchor whose shape is
+    within 4× of the box and on the neighbouring cells YOLOv5 assigns too,
+    so one object yields several overlapping candidates for NMS to merge.
+    The background is the same low-score noise as make_outputs(0).
+    """
+    rng = np.random.default_rng(seed)
+    outputs = make_outputs(0.0, seed=seed, input_size=input_size)
+    for head_idx, stride in enumerate(STRIDES):
+        g = input_size // stride
+        feat = outputs[head_idx].reshape(3, NUM_CLASSES + 5, g, g)
+        for x1, y1, x2, y2 in boxes:
+            cx, cy, w, h = (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1
+            gx, gy = cx / stride, cy / stride
+            col, row = int(gx), int(gy)
+            # The centre cell plus the nearer horizontal/vertical neighbour.
+            cells = [(row, col),
+                     (row, col - 1 if gx - col < 0.5 else col + 1),
+                     (row - 1 if gy - row < 0.5 else row + 1, col)]
+            for a, (aw, ah) in enumerate(ANCHORS[head_idx]):
+                rw, rh = w / aw, h / ah
+                if not (0.25 <= rw <= 4 and 0.25 <= rh <= 4):
+                    continue
+                for r, c in cells:
+                    if not (0 <= r < g and 0 <= c < g):
+                        continue
+                    jitter = rng.normal(0, 0.01, 4)
+                    feat[a, 0, r, c] = ((gx - c) + 0.5) / 2 + jitter[0]
+                    feat[a, 1, r, c] = ((gy - r) + 0.5) / 2 + jitter[1]
+                    feat[a, 2, r, c] = np.sqrt(rw) / 2 + jitter[2]
+                    feat[a, 3, r, c] = np.sqrt(rh) / 2 + jitter[3]
+                    feat[a, 4, r, c] = rng.uniform(0.7, 0.95)
+                    feat[a, 5 + cls_id, r, c] = rng.uniform(0.8, 0.99)
+    return outputs
+
+def crowd_boxes(count: int, seed: int = 0, input_size: int = MODEL_INPUT) -> list[tuple[float, float, float, float]]:
+    """`count` person-shaped (≈1:2.5) boxes of mixed size scattered over the input."""
+    rng = np.random.default_rng(seed)
+    boxes = []
+    for _ in range(count):
+        h = rng.uniform(60, 300)
+        w = h / rng.uniform(2.0, 3.0)
+        x1 = rng.uniform(0, input_size - w)
+        y1 = rng.uniform(0, input_size - h)
+        boxes.append((x1, y1, x1 + w, y1 + h))
+    return boxes
+
+# ─── Synthetic camera ─────────────────────────────────────────────────────────
+class SyntheticCamera:
+    """Minimal cv2.VideoCapture stand-in yielding BGR frames with moving blocks.
+
+    Supports isOpened / set / get / grab / retrieve / read / release. Each
+    grab advances the scene one step; `objects` grey blocks bounce around a
+    fixed noisy background, so motion detection and the capture path see
+    realistic, changing frames. With `fps`, grab() blocks until the next
+    frame is due, like a real camera.
+    """
+
+    def __init__(self, width: int = 1280, height: int = 720, objects: int = 1, seed: int = 0,
+                 fps: float | None = None):
+        rng = np.random.default_rng(seed)
+        self.fps = fps
+        self._next = 0.0
+        self.width, self.height = width, height
+        self._background = rng.integers(40, 80, (height, width, 3), dtype=np.uint8)
+        self._size = rng.uniform(0.1, 0.3, (objects, 2)) * (width, height)
+        self._pos  = rng.uniform(0, 1, (objects, 2)) * ((width, height) - self._size)
+        self._vel  = rng.uniform(-0.02, 0.02, (objects, 2)) * (width, height)
+        self._open = True
+        self.frames = 0
+
+    def isOpened(self) -> bool:
+        return self._open
+
+    def set(self, prop: int, value: float) -> bool:
+        return False                        # fixed geometry, like a camera that ignores it
+
+    def get(self, prop: int) -> float:
+        return 0.0
+
+    def grab(self) -> bool:
+        if not self._open:
+            return False
+        if self.fps:
+            now = time.monotonic()
+            if now < self._next:
+                time.sleep(self._next - now)
+            self._next = max(self._next, now) + 1.0 / self.fps
+        self._pos += self._vel
+        limit = np.array((self.width, self.height)) - self._size
+        bounce = (self._pos < 0) | (self._pos > limit)
+        self._vel[bounce] *= -1
+        np.clip(self._pos, 0, limit, out=self._pos)
+        self.frames += 1
+        return True
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        if not self._open:
+            return False, None
+        frame = self._background.copy()
+        for (x, y), (w, h) in zip(self._pos.astype(int), self._size.astype(int)):
+            frame[y:y + h, x:x + w] = 200
+        return True, frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self) -> None:
+        self._open = False
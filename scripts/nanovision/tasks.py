@@ -0,0 +1,219 @@
+"""
+tasks.py — Atomic, coalescing writer for NanoClaw IPC task files.
+
+The monitor falls back to task files (<ipc>/<group>/tasks/*.json, polled by
+src/ipc.ts) when the image socket is down, and always uses them for clips.
+TaskWriter keeps that path safe and bounded under bursts of detections:
+
+  atomic     each task is written to a dot-file and renamed into place, so
+             the watcher, which only picks up *.json, never reads half a file.
+  unique     names are <source>_<ms>_<pid>_<seq>.json: unique within one
+             millisecond and across processes, and still time-ordered.
+  coalesced  the first alert for a (group, chat, source) goes out at once;
+             alerts within `window` seconds of it are merged into a single
+             summary task (the latest image and caption plus a count), sent
+             when the window closes. Replaced images are deleted.
+  bounded    with `max_pending` task files already waiting in a group's
+             tasks directory, alerts stay merged in memory (one per key)
+             until the watcher catches up, so a stalled upload costs one
+             image per key instead of one per alert.
+  pruned     images matching `orphan_glob`, older than `orphan_age` and not
+             referenced by a pending task or a merged alert, are deleted,
+             e.g. after the watcher moved a failed task to errors/.
+
+Usage:
+  writer = TaskWriter(IPC_BASE)
+  writer.submit("main", chat_jid, "/tmp/nanoclaw-monitor-door-1.jpg", caption, source="monitor_door")
+  ...
+  writer.close()                      # sends whatever is still merged
+"""
+
+import contextlib
+import glob
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable
+
+COALESCE_WINDOW = 5.0       # seconds after a task during which alerts are merged
+MAX_PENDING     = 8         # task files waiting in a group's directory before we hold back
+RETRY           = 1.0       # seconds between checks while held back
+ORPHAN_GLOB     = "/tmp/nanoclaw-monitor-*-*"  # <camera>-<stamp>.jpg/.mp4/.gif, not the stats file
+ORPHAN_AGE      = 600.0     # seconds before an unreferenced image counts as orphaned
+PRUNE_PERIOD    = 60.0      # seconds between orphan scans
+
+class _Merged:
+    """Alerts for one key waiting to go out as one task."""
+    __slots__ = ("image", "caption", "count", "first", "last", "due")
+
+    def __init__(self, image: str, caption: str, now: float, due: float):
+        self.image, self.caption = image, caption
+        self.count = 1
+        self.first = self.last = now
+        self.due   = due
+
+class TaskWriter:
+    """Writes send_image tasks for the NanoClaw IPC watcher; see the module docstring."""
+
+    def __init__(
+        self,
+        ipc_base: str,
+        window: float = COALESCE_WINDOW,
+        max_pending: int = MAX_PENDING,
+        orphan_glob: str | None = ORPHAN_GLOB,
+        orphan_age: float = ORPHAN_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ipc_base    = ipc_base
+        self.window      = window
+        self.max_pending = max(max_pending, 1)
+        self.orphan_glob = orphan_glob
+        self.orphan_age  = orphan_age
+        self.clock       = clock
+        self.counters    = {"written": 0, "merged": 0, "held": 0, "pruned": 0, "errors": 0}
+        self._merged: dict[tuple, _Merged] = {}     # (group, chat, source) → pending merge
+        self._last: dict[tuple, float] = {}         # key → when it last wrote a task
+        self._seq    = itertools.count()
+        self._cond   = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._pruned_at = -float("inf")
+
+    def submit(self, group: str, chat_jid: str, image_path: str, caption: str, source: str = "monitor") -> None:
+        """Queue one image for `chat_jid`: written now, or merged into the next task."""
+        key = (group, chat_jid, source)
+        with self._cond:
+            now = self.clock()
+            merged = self._merged.get(key)
+            if (merged is None and now - self._last.get(key, -float("inf")) >= self.window
+                    and self.pending(group) < self.max_pending):
+                self._write(key, image_path, caption, now)
+                return
+            self.counters["merged"] += 1
+            if merged is None:
+                due = max(self._last.get(key, -float("inf")) + self.window, now)
+                self._merged[key] = _Merged(image_path, caption, now, due)
+            else:
+                _unlink(merged.image)           # superseded by the newer frame
+                merged.image, merged.caption = image_path, caption
+                merged.count += 1
+                merged.last = now
+            self._start()
+            self._cond.notify()
+
+    def pending(self, group: str) -> int:
+        """Task files waiting in `group`'s tasks directory."""
+        try:
+            return sum(name.endswith(".json") for name in os.listdir(self._tasks_dir(group)))
+        except OSError:
+            return 0
+
+    def _tasks_dir(self, group: str) -> str:
+        return os.path.join(self.ipc_base, group, "tasks")
+
+    def _write(self, key: tuple, image_path: str, caption: str, now: float) -> None:
+        """Atomically write one task file (call with the lock held)."""
+        group, chat_jid, source = key
+        tasks_dir = self._tasks_dir(group)
+        task = {"type": "send_image", "chatJid": chat_jid, "imagePath": image_path, "caption": caption}
+        name = f"{source}_{int(time.time() * 1000)}_{os.getpid()}_{next(self._seq)}.json"
+        tmp = None
+        try:
+            os.makedirs(tasks_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".task", dir=tasks_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(task, f)
+            os.replace(tmp, os.path.join(tasks_dir, name))
+        except OSError as e:
+            if tmp is not None:
+                _unlink(tmp)
+            self.counters["errors"] += 1
+            print(f"[tasks] Cannot write IPC task for {image_path}: {e}")
+            return
+        self._last[key] = now
+        self.counters["written"] += 1
+
+    # ─── Flushing ─────────────────────────────────────────────────────────────
+    def _start(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="ipc-tasks", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                wake = self.flush()
+                self._cond.wait(timeout=max(wake - self.clock(), 0.01))
+
+    def flush(self, force: bool = False) -> float:
+        """Write merged alerts whose window has closed (all of them with
+        `force`) and prune orphans when due; returns when to check again."""
+        with self._cond:
+            now  = self.clock()
+            wake = now + PRUNE_PERIOD
+            for key, merged in list(self._merged.items()):
+                if not force and merged.due > now:
+                    wake = min(wake, merged.due)
+                    continue
+                if not force and self.pending(key[0]) >= self.max_pending:
+                    self.counters["held"] += 1
+                    merged.due = now + RETRY
+                    wake = min(wake, merged.due)
+                    continue
+                del self._merged[key]
+                self._write(key, merged.image, summary_caption(merged), now)
+            if now - self._pruned_at >= PRUNE_PERIOD:
+                self._pruned_at = now
+                self.prune()
+            return wake
+
+    def prune(self) -> int:
+        """Delete orphaned images and stale temp files; returns how many."""
+        if not self.orphan_glob:
+            return 0
+        with self._cond:
+            keep = {m.image for m in self._merged.values()}
+        stale, removed = time.time() - self.orphan_age, 0
+        # Any group's pending task may refer to an image, not only ours.
+        for path in glob.glob(os.path.join(glob.escape(self.ipc_base), "*", "tasks", "*.json")):
+            with contextlib.suppress(OSError, ValueError, AttributeError), open(path) as f:
+                keep.add(json.load(f).get("imagePath"))
+        temps = glob.glob(os.path.join(glob.escape(self.ipc_base), "*", "tasks", ".tmp-*"))
+        for path in glob.glob(self.orphan_glob) + temps:
+            try:
+                if path in keep or os.stat(path).st_mtime > stale:
+                    continue
+                os.unlink(path)
+            except OSError:
+                continue
+            removed += 1
+        with self._cond:
+            self.counters["pruned"] += removed
+        return removed
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {**self.counters, "merging": len(self._merged)}
+
+    def close(self) -> None:
+        """Send everything still merged and stop the flusher."""
+        self.flush(force=True)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+def summary_caption(merged: _Merged) -> str:
+    if merged.count == 1:
+        return merged.caption
+    return (f"{merged.caption}\n(latest of {merged.count} alerts in "
+            f"{max(merged.last - merged.first, 1):.0f}s)")
+
+def _unlink(path: str) -> None:
+    with contextlib.suppress(OSError):
+        os.unlink(path)
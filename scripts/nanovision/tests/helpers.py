@@ -0,0 +1,16 @@
+"""Helpers shared by the nanovision tests."""
+
+
+class FakeClock:
+    """A monotonic clock the test advances by hand; sleep() advances it too."""
+
+    def __init__(self, start: float = 0.0):
+        self.now   = start
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
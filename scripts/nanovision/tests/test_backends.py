@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from nanovision import backends
+from nanovision.backends import CpuPool, CpuRuntime, load_backend, model_for
+from nanovision.decoder import decode_candidates
+from nanovision.engine import EngineError, FairScheduler
+from nanovision.fake import FakeRKNN
+from nanovision.synthetic import make_outputs
+
+OUTPUTS = make_outputs(0.01, seed=3)
+
+
+class ReplayRuntime(CpuRuntime):
+    """Returns OUTPUTS in graph order (smallest head first), recording its inputs."""
+
+    made = []
+
+    def __init__(self, model_path, threads, size):
+        super().__init__(size)
+        self.threads = threads
+        self.blobs   = []
+        ReplayRuntime.made.append(self)
+
+    def _run(self, blob):
+        self.blobs.append(blob.copy())
+        return OUTPUTS[::-1]
+
+
+class SharedThreadsRuntime(ReplayRuntime):
+    shares_threads = True
+
+
+class FlatRuntime(ReplayRuntime):
+    def _run(self, blob):
+        return [np.zeros((1, 25200, 85), np.float32)]   # Detect layer left in
+
+
+@pytest.fixture
+def onnx_model(tmp_path):
+    ReplayRuntime.made = []
+    path = tmp_path / "yolov5s.onnx"
+    path.write_bytes(b"onnx")
+    return str(path)
+
+
+def test_model_for_swaps_suffix():
+    assert model_for("/m/yolov5s.rknn", "onnxruntime") == "/m/yolov5s.onnx"
+    assert model_for("/m/yolov5s.onnx", "rknn") == "/m/yolov5s.rknn"
+    assert model_for("/m/yolov5s.onnx", "opencv") == "/m/yolov5s.onnx"
+    assert model_for("/m/model", "rknn") == "/m/model"
+
+
+def test_cpu_pool_normalizes_input_and_orders_heads(onnx_model):
+    pool = CpuPool(onnx_model, "replay", runtime=ReplayRuntime)
+    inp = np.random.default_rng(0).integers(0, 256, (1, 640, 640, 3), dtype=np.uint8)
+    try:
+        outputs = pool.infer([inp])
+    finally:
+        pool.release()
+    blob = ReplayRuntime.made[0].blobs[-1]
+    assert blob.shape == (1, 3, 640, 640) and blob.dtype == np.float32
+    np.testing.assert_allclose(blob, inp.transpose(0, 3, 1, 2) / 255, rtol=1e-6)
+    assert [o.shape[-1] for o in outputs] == [80, 40, 20]
+    np.testing.assert_array_equal(decode_candidates(outputs, 720, 1280, 0.25),
+                                  decode_candidates(OUTPUTS, 720, 1280, 0.25))
+
+
+def test_threads_are_split_between_workers(onnx_model):
+    pool = CpuPool(onnx_model, "replay", workers=2, threads=8, runtime=ReplayRuntime)
+    assert [rt.threads for rt in ReplayRuntime.made] == [4, 4]
+    assert pool.describe() == {"backend": "replay", "workers": 2, "threads": 8, "model": "yolov5s.onnx"}
+    pool.release()
+    ReplayRuntime.made = []
+    CpuPool(onnx_model, "replay", workers=2, threads=8, runtime=SharedThreadsRuntime).release()
+    assert [rt.threads for rt in ReplayRuntime.made] == [8, 8]
+
+
+def test_cpu_pool_behind_fair_scheduler(onnx_model):
+    pool = CpuPool(onnx_model, "replay", workers=2, threads=2, runtime=ReplayRuntime)
+    scheduler = FairScheduler(pool)
+    inp = np.zeros((1, 640, 640, 3), np.uint8)
+    try:
+        futures = [scheduler.submit(key, [inp]) for key in ("door", "yard")]
+        assert all(len(f.result(timeout=5)) == 3 for f in futures)
+    finally:
+        scheduler.close()
+        pool.release()
+
+
+def test_unexpected_output_layout_fails_at_load(onnx_model):
+    with pytest.raises(EngineError, match="three"):
+        CpuPool(onnx_model, "flat", runtime=FlatRuntime)
+
+
+def test_auto_prefers_rknn_and_falls_back_to_cpu(onnx_model, monkeypatch):
+    monkeypatch.setitem(backends.RUNTIMES, "onnxruntime", ReplayRuntime)
+    rknn_model = model_for(onnx_model, "rknn")
+    open(rknn_model, "wb").close()
+
+    pool = load_backend(rknn_model, cores=2, rknn=lambda: FakeRKNN([OUTPUTS]))
+    assert pool.describe()["backend"] == "rknn" and pool.size == 2
+    assert pool.model == rknn_model
+    pool.release()
+
+    pool = load_backend(rknn_model, rknn=lambda: FakeRKNN([OUTPUTS], load_ret=-1))
+    assert pool.describe()["backend"] == "onnxruntime"
+    assert pool.model == onnx_model                     # what a result cache must be keyed on
+    pool.release()
+
+
+def test_named_backend_does_not_fall_back(onnx_model, monkeypatch):
+    monkeypatch.setitem(backends.RUNTIMES, "onnxruntime", ReplayRuntime)
+
+    def missing():
+        raise ImportError("No module named 'rknnlite'")
+
+    with pytest.raises(EngineError) as err:
+        load_backend(onnx_model, "rknn", rknn=missing)
+    assert "rknn: model not found" in str(err.value) and "onnxruntime" not in str(err.value)
+    open(model_for(onnx_model, "rknn"), "wb").close()
+    with pytest.raises(EngineError, match="rknn-toolkit-lite2"):
+        load_backend(onnx_model, "rknn", rknn=missing)
+    with pytest.raises(EngineError, match="Unknown backend"):
+        load_backend(onnx_model, "tpu")
+
+
+def test_every_failure_is_reported(tmp_path):
+    model = tmp_path / "broken.onnx"
+    model.write_bytes(b"not a protobuf")
+    with pytest.raises(EngineError) as err:
+        load_backend(str(model))
+    message = str(err.value)
+    assert "rknn: model not found" in message
+    assert "onnxruntime: " in message and "opencv: " in message
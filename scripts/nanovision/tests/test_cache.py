@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from nanovision.cache import CACHE_FLOOR, ResultCache, cache_key, model_id
+from nanovision.decoder import MODEL_INPUT, decode_candidates, decode_outputs, select_detections
+from nanovision.synthetic import make_outputs
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def cands(n, score=0.9):
+    out = np.zeros((n, 6), np.float32)
+    out[:, 2:4] = 10
+    out[:, 4] = score
+    return out
+
+
+def test_key_depends_on_bytes_model_and_params():
+    key = cache_key(b"jpeg", "m:1:2", input=640)
+    assert key == cache_key(b"jpeg", "m:1:2", input=640)
+    assert len({key, cache_key(b"jpeg!", "m:1:2", input=640), cache_key(b"jpeg", "m:1:3", input=640),
+                cache_key(b"jpeg", "m:1:2", input=320)}) == 4
+
+
+def test_model_id_changes_when_the_model_is_replaced(tmp_path):
+    path = tmp_path / "m.rknn"
+    path.write_bytes(b"a")
+    before = model_id(str(path))
+    path.write_bytes(b"ab")
+    assert model_id(str(path)) != before
+
+
+@pytest.mark.parametrize("density", [0.01, 0.05])
+def test_candidates_at_floor_reproduce_any_higher_conf_and_nms(density):
+    outputs = make_outputs(density, seed=5)
+    cache = ResultCache()
+    cache.put("k", decode_candidates(outputs, 720, 1280, CACHE_FLOOR), CACHE_FLOOR)
+    for conf, nms in ((0.25, 0.45), (0.5, 0.45), (0.5, 0.7), (0.8, 0.3)):
+        stored = cache.get("k", conf)
+        np.testing.assert_array_equal(select_detections(stored[stored[:, 4] > conf], nms),
+                                      decode_outputs(outputs, 720, 1280, conf, nms))
+
+
+def test_entry_below_requested_conf_is_a_miss_and_is_upgraded():
+    cache = ResultCache()
+    cache.put("k", cands(2), 0.5)
+    assert cache.get("k", 0.6) is not None
+    assert cache.get("k", 0.3) is None
+    cache.put("k", cands(5), 0.1)
+    assert len(cache.get("k", 0.3)) == 5
+    cache.put("k", cands(1), 0.5)               # less complete: ignored
+    assert len(cache.get("k", 0.3)) == 5
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    cache = ResultCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, cands(1), 0.1)
+        cache.get("a", 0.5)                     # keep "a" recent
+    assert cache.get("a", 0.5) is not None and cache.get("b", 0.5) is None
+    small = ResultCache(max_bytes=cands(10).nbytes)
+    small.put("a", cands(6), 0.1)
+    small.put("b", cands(6), 0.1)
+    assert small.get("a", 0.5) is None and small.stats()["evictions"] == 1
+
+
+def test_entries_are_read_only():
+    cache = ResultCache()
+    cache.put("k", cands(1), 0.1)
+    with pytest.raises(ValueError):
+        cache.get("k", 0.5)[0, 4] = 0
+
+
+def test_disk_tier_round_trip_and_stats(tmp_path):
+    ResultCache(directory=str(tmp_path)).put("k", cands(3, 0.7), 0.1)
+    ResultCache(directory=str(tmp_path)).put("empty", cands(0), 0.1)
+    cache = ResultCache(directory=str(tmp_path))
+    np.testing.assert_array_equal(cache.get("k", 0.5), cands(3, 0.7))
+    assert cache.get("k", 0.5) is not None      # now from memory
+    assert cache.get("empty", 0.5).shape == (0, 6)
+    assert cache.get("other", 0.5) is None
+    assert cache.get("k", 0.05) is None         # stored floor is 0.1
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 2, 2)
+    assert stats["hit_rate"] == 0.6 and stats["disk_entries"] == 2
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(".tmp-")]
+
+
+def test_disk_tier_prunes_least_recently_used(tmp_path):
+    cache = ResultCache(max_entries=0, directory=str(tmp_path), max_disk_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", cands(1), 0.1)
+        os.utime(tmp_path / f"k{i}.npy", ns=(i * 10**9, i * 10**9))
+    cache.get("k0", 0.5)                        # touched: survives
+    cache.put("k10", cands(1), 0.1)
+    left = sorted(n[:-4] for n in os.listdir(tmp_path))
+    assert len(left) == 9 and "k0" in left and "k1" not in left and "k10" in left
+    assert cache.stats()["disk_entries"] == 9
+
+
+def test_one_shot_cli_answers_from_disk_cache_without_loading_the_model(tmp_path):
+    image, model, labels = tmp_path / "a.jpg", tmp_path / "m.rknn", tmp_path / "labels.txt"
+    image.write_bytes(b"not decoded on a hit")
+    model.write_bytes(b"not an rknn model")
+    labels.write_text("person\ncar\n")
+    boxes = np.array([[10, 20, 110, 220, 0.9, 1], [12, 22, 112, 222, 0.6, 1],
+                      [300, 40, 340, 90, 0.3, 0]], np.float32)
+    key = cache_key(image.read_bytes(), model_id(str(model)), input=MODEL_INPUT)
+    ResultCache(directory=str(tmp_path / "cache")).put(key, boxes, CACHE_FLOOR)
+    proc = subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS, "yolo-detect.py"), "--image", str(image),
+         "--model", str(model), "--labels", str(labels), "--conf", "0.25",
+         "--cache-dir", str(tmp_path / "cache")],
+        capture_output=True, text=True, timeout=60)
+    result = json.loads(proc.stdout)
+    assert result["success"] and result["cached"] and result["count"] == 2
+    assert [d["label"] for d in result["detections"]] == ["car", "person"]
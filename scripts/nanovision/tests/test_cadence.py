@@ -0,0 +1,113 @@
+import pytest
+
+from nanovision.cadence import MIN_INTERVAL, SENSOR_PERIOD, Cadence, CpuLoad, soc_temperature
+from nanovision.tests.helpers import FakeClock
+
+
+class Sensors:
+    def __init__(self):
+        self.temp = 50.0
+        self.load = 0.2
+
+    def temperature(self):
+        return self.temp
+
+    def cpu_load(self):
+        return self.load
+
+
+def make(cfg, clock=None, sensors=None, log=None):
+    sensors = sensors or Sensors()
+    cadence = Cadence(clock=clock or FakeClock(1000.0), temperature=sensors.temperature,
+                      cpu_load=sensors.cpu_load, log=log)
+    cadence.configure(cfg)
+    return cadence
+
+
+ADAPTIVE = {"adaptive": True, "interval": 10, "intervalMin": 1, "intervalMax": 30, "backoff": 2}
+
+
+def test_fixed_interval_ignores_activity_and_has_a_floor():
+    cadence = make({"interval": 10})
+    assert cadence.observe(active=True).interval == 10
+    assert cadence.observe(active=False).interval == 10
+    cadence.configure({"interval": 0.1})
+    assert cadence.interval == MIN_INTERVAL
+
+
+def test_activity_speeds_up_and_empty_cycles_back_off_to_max():
+    cadence = make(ADAPTIVE)
+    assert cadence.interval == 10
+    assert cadence.observe(active=True) == (1, "active")
+    intervals = [cadence.observe(active=False).interval for _ in range(7)]
+    assert intervals == [2, 4, 8, 16, 30, 30, 30]
+    assert cadence.observe(active=True).interval == 1
+
+
+def test_thermal_and_cpu_throttling():
+    clock, sensors = FakeClock(1000.0), Sensors()
+    cadence = make({**ADAPTIVE, "thermalLimit": 75, "loadLimit": 0.9}, clock, sensors)
+    sensors.temp = 82.0
+    assert cadence.observe(active=True).interval == 1      # sensors re-read only every SENSOR_PERIOD
+    clock.now += SENSOR_PERIOD
+    decision = cadence.observe(active=True)
+    assert decision.interval == 2 and "82°C" in decision.reason
+    sensors.temp, sensors.load = 60.0, 0.95
+    clock.now += SENSOR_PERIOD
+    assert "CPU 95%" in cadence.observe(active=True).reason
+    sensors.load = 0.3
+    clock.now += SENSOR_PERIOD
+    assert cadence.observe(active=True) == (1, "active")
+    assert cadence.snapshot()["throttled"] == 2
+
+
+def test_cycles_start_on_schedule_regardless_of_processing_time():
+    clock = FakeClock(1000.0)
+    cadence = make({"interval": 2}, clock)
+    cadence.begin()
+    starts = [clock.now]
+    for work in (0.3, 1.2, 0.1):
+        clock.now += work                       # processing time
+        clock.now = max(clock.now, cadence.due())
+        cadence.begin()
+        starts.append(clock.now)
+    assert [b - a for a, b in zip(starts, starts[1:])] == [2, 2, 2]
+    assert cadence.due() == starts[-1] + 2
+
+
+def test_stall_restarts_schedule_instead_of_bursting():
+    clock = FakeClock(1000.0)
+    cadence = make({"interval": 2}, clock)
+    cadence.begin()
+    clock.now += 7                              # e.g. camera reopen
+    cadence.begin()
+    assert cadence.due() == clock.now + 2
+
+
+def test_decisions_are_logged_on_change_only():
+    lines = []
+    cadence = make(ADAPTIVE, log=lines.append)
+    cadence.observe(active=True)
+    cadence.observe(active=True)
+    for _ in range(6):
+        cadence.observe(active=False)
+    assert lines == ["interval 10.0s → 1.0s (active)", "interval 1.0s → 2.0s (idle)",
+                     "interval 2.0s → 4.0s (idle)", "interval 4.0s → 8.0s (idle)",
+                     "interval 8.0s → 16.0s (idle)", "interval 16.0s → 30.0s (idle)"]
+
+
+def test_soc_temperature_reads_hottest_zone(tmp_path):
+    for i, milli in enumerate((45000, 71500)):
+        (tmp_path / f"thermal_zone{i}").mkdir()
+        (tmp_path / f"thermal_zone{i}" / "temp").write_text(f"{milli}\n")
+    assert soc_temperature(str(tmp_path / "thermal_zone*" / "temp")) == pytest.approx(71.5)
+    assert soc_temperature(str(tmp_path / "none*")) is None
+
+
+def test_cpu_load_from_proc_stat_deltas(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text("cpu  100 0 100 700 100 0 0 0\n")
+    load = CpuLoad(str(stat))
+    assert load() is None                       # needs two readings
+    stat.write_text("cpu  200 0 150 800 150 0 0 0\n")
+    assert load() == pytest.approx(0.5)
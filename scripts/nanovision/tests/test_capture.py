@@ -0,0 +1,186 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from nanovision.capture import (
+    FileSource,
+    ReopeningCamera,
+    V4L2Camera,
+    decode_jpeg,
+    open_source,
+    reduction,
+)
+from nanovision.synthetic import SyntheticCamera
+from nanovision.tests.helpers import FakeClock
+
+
+def jpeg(frame, quality=90):
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]
+
+
+def make_frame(i=0, width=1280, height=720):
+    frame = np.zeros((height, width, 3), np.uint8)
+    frame[:, :, 1] = np.linspace(0, 255, width, dtype=np.uint8)
+    frame[100:300, 200 + 10 * i:400 + 10 * i] = (200, 50, 50)
+    return frame
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in for a V4L2 device: a driver queue of frames."""
+
+    def __init__(self, frames, raw=True, buffersize_ok=True):
+        self.queue, self.raw, self.buffersize_ok = list(frames), raw, buffersize_ok
+        self.props, self.current, self.grabs, self.retrieves = {}, None, 0, 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        self.props[prop] = value
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return self.buffersize_ok
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            return self.raw
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: 1280, cv2.CAP_PROP_FRAME_HEIGHT: 720}.get(prop, 0.0)
+
+    def grab(self):
+        self.grabs += 1
+        if len(self.queue) <= 1:
+            time.sleep(0.02)                    # empty queue: wait for the sensor
+        if not self.queue:
+            return False
+        self.current = self.queue.pop(0)
+        return True
+
+    def retrieve(self):
+        self.retrieves += 1
+        return True, jpeg(self.current).reshape(1, -1) if self.raw else self.current
+
+    def release(self):
+        pass
+
+
+@pytest.mark.parametrize("width,want,factor", [(1280, 0, 1), (1280, 640, 2), (1280, 320, 4),
+                                               (1280, 160, 8), (1280, 100, 8), (1280, 700, 1),
+                                               (1920, 640, 2), (1918, 240, 8)])
+def test_reduction_picks_largest_factor_still_wide_enough(width, want, factor):
+    assert reduction(width, want) == factor
+
+
+def test_reduced_decode_matches_full_decode_and_resize():
+    data = jpeg(make_frame())
+    small = decode_jpeg(data, 2)
+    assert small.shape == (360, 640, 3)
+    ref = cv2.resize(decode_jpeg(data.tobytes()), (640, 360), interpolation=cv2.INTER_AREA)
+    assert np.abs(small.astype(int) - ref).mean() < 4
+
+
+def test_v4l2_camera_requests_mjpeg_single_buffer_and_decodes_raw():
+    fake = FakeCapture([make_frame(i) for i in range(25)])
+    cam = V4L2Camera("/dev/video0", decode_width=640, warmup=20, backend=lambda *a: fake)
+    assert fake.props[cv2.CAP_PROP_FOURCC] == cv2.VideoWriter_fourcc(*"MJPG")
+    assert fake.props[cv2.CAP_PROP_BUFFERSIZE] == 1 and not cam.buffered
+    assert cam.raw and cam.factor == 2
+    assert fake.grabs == 20 and fake.retrieves == 0          # warm-up never decodes
+    ok, frame = cam.read()
+    assert ok and frame.shape == (360, 640, 3)
+
+
+def test_v4l2_camera_falls_back_to_converted_frames():
+    fake = FakeCapture([make_frame()], raw=False)
+    cam = V4L2Camera("/dev/video0", decode_width=320, warmup=0, backend=lambda *a: fake)
+    ok, frame = cam.read()
+    assert not cam.raw and ok and frame.shape == (180, 320, 3)
+
+
+def test_latest_drains_a_queue_the_driver_would_not_shrink():
+    frames = [make_frame(i) for i in range(6)]
+    fake = FakeCapture(frames, buffersize_ok=False)
+    cam = V4L2Camera("/dev/video0", warmup=0, backend=lambda *a: fake)
+    assert cam.buffered
+    ok, frame = cam.latest()
+    assert ok and not fake.queue                             # every queued frame discarded
+    assert np.abs(frame.astype(int) - frames[-1]).mean() < 4
+
+
+@pytest.fixture
+def jpeg_dir(tmp_path):
+    for i in range(5):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.jpg"), make_frame(i))
+    (tmp_path / "notes.txt").write_text("ignored")
+    return tmp_path
+
+
+def test_file_source_plays_in_real_time(jpeg_dir):
+    clock = FakeClock()
+    src = FileSource(str(jpeg_dir), fps=10, decode_width=320, clock=clock, sleep=clock.sleep)
+    assert src.isOpened() and src.factor == 4
+    assert src.grab() and src.index == 0 and clock.slept == []
+    assert src.grab() and src.index == 1 and clock.slept == [0.1]     # waits like a camera
+    clock.now += 0.35                                                # slow consumer
+    assert src.grab() and src.index == 4 and src.skipped == 2
+    ok, frame = src.retrieve()
+    assert ok and frame.shape == (180, 320, 3)
+    clock.now += 0.1
+    assert src.grab() and src.index == 5                             # loops around
+
+
+def test_file_source_without_fps_steps_and_stops_without_loop(jpeg_dir):
+    src = FileSource(str(jpeg_dir), fps=0, loop=False)
+    assert [src.read()[0] for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_file_source_plays_video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (1280, 720))
+    if not writer.isOpened():
+        pytest.skip("OpenCV build cannot write MJPG/AVI")
+    for i in range(3):
+        writer.write(make_frame(i))
+    writer.release()
+    src = FileSource(path, fps=0, decode_width=640)
+    frames = [src.read()[1] for _ in range(4)]
+    assert all(f.shape == (360, 640, 3) for f in frames)               # 4th frame looped
+
+
+def test_open_source_synthetic():
+    cam = open_source("synthetic:2", 640, 480)
+    assert isinstance(cam, SyntheticCamera) and cam.read()[1].shape == (480, 640, 3)
+
+
+def test_open_source_plays_files_only_when_allowed(jpeg_dir):
+    with pytest.raises(ValueError, match="Not a camera device"):
+        open_source(jpeg_dir)
+    src = open_source(jpeg_dir, allow_files=True)
+    assert isinstance(src, FileSource) and src.isOpened()
+    src.release()
+
+
+def test_reopening_camera_opens_in_background_and_after_failure(monkeypatch):
+    monkeypatch.setattr(ReopeningCamera, "RETRY", 0.01)
+    monkeypatch.setattr(ReopeningCamera, "REOPEN_DELAY", 0.01)
+    attempts, lost, opened = [], [], []
+
+    def open_source():
+        attempts.append(1)
+        if len(attempts) == 1:
+            return None                                               # device not there yet
+        cam = SyntheticCamera(64, 48)
+        opened.append(cam)
+        return cam
+
+    cam = ReopeningCamera(open_source, on_lost=lambda: lost.append(1))
+    try:
+        assert cam.wait_ready(2) and cam.read()[0]
+        opened[0].release()                                           # unplugged
+        assert not cam.grab() and lost == [1] and cam.reopens == 1
+        assert cam.wait_ready(2) and cam.grab()
+        assert len(opened) == 2 and len(attempts) == 3
+    finally:
+        cam.release()
+    assert not opened[1].isOpened()
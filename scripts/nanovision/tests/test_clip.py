@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from nanovision.clip import ClipExporter, ClipJob, FrameRing
+
+
+def frame(value):
+    return np.full((360, 640, 3), value, dtype=np.uint8)
+
+
+def test_ring_evicts_by_age():
+    ring = FrameRing(seconds=2.0, max_bytes=10_000_000)
+    for i in range(10):
+        ring.add(frame(i * 20), ts=float(i))
+    assert len(ring) == 3                                   # ts 7, 8, 9
+    assert len(ring.between(8.0, 9.0)) == 2
+
+
+def test_ring_evicts_by_size_and_downscales():
+    rng = np.random.default_rng(0)
+    ring = FrameRing(seconds=100.0, max_bytes=200_000, width=320)
+    for i in range(50):
+        ring.add(rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8), ts=float(i))
+    snap = ring.snapshot()
+    assert snap["bytes"] <= 200_000 and snap["evicted"] > 0
+    img = cv2.imdecode(np.frombuffer(ring.between(0, 100)[-1], np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (180, 320, 3)
+
+
+def test_exporter_waits_for_post_window_and_coalesces(tmp_path):
+    ring = FrameRing(seconds=5.0, max_bytes=10_000_000)
+    exporter = ClipExporter()
+    done = []
+    got = threading.Event()
+
+    def on_done(path):
+        done.append(path)
+        got.set()
+
+    try:
+        t0 = time.monotonic()
+        for i in range(5):
+            ring.add(frame(i * 40), ts=t0 - 0.5 + i * 0.1)     # pre-event frames
+        path = str(tmp_path / "a.mp4")
+        exporter.submit(ClipJob(ring, t0, 1.0, 0.3, 10, "mp4", path, on_done))
+        exporter.submit(ClipJob(ring, t0 + 0.1, 1.0, 0.3, 10, "mp4", str(tmp_path / "b.mp4"), on_done))
+        for i in range(3):                                      # post-event frames
+            ring.add(frame(200), ts=time.monotonic())
+            time.sleep(0.05)
+        assert got.wait(5)
+        time.sleep(0.3)
+    finally:
+        exporter.close()
+    assert done == [path] and os.path.getsize(path) > 0
+    cap = cv2.VideoCapture(path)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 8
+    assert exporter.snapshot()["skipped"] == 1
@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+
+from nanovision.decoder import (
+    MAX_DETS,
+    NativeOutputs,
+    QuantParams,
+    batched_nms,
+    calibrate,
+    decode_candidates,
+    decode_candidates_reference,
+    decode_outputs,
+    dequantize_outputs,
+    nms,
+    quantize_outputs,
+    score_table,
+    select_detections,
+    select_detections_reference,
+)
+from nanovision.preprocess import letterbox_geometry
+from nanovision.synthetic import crowd_boxes, make_outputs, make_scene
+
+
+@pytest.mark.parametrize("density", [0.0, 0.001, 0.01, 0.05, 0.2])
+@pytest.mark.parametrize("conf", [0.25, 0.5])
+def test_vectorized_matches_reference(density, conf):
+    outputs = make_outputs(density, seed=int(density * 1000) + 7)
+    expected = decode_candidates_reference(outputs, 720, 1280, conf)
+    actual = decode_candidates(outputs, 720, 1280, conf)
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual, expected)
+    np.testing.assert_array_equal(decode_outputs(outputs, 720, 1280, conf, 0.45),
+                                  select_detections(expected, 0.45))
+
+
+def test_anchor_gate_matches_reference():
+    # Class scores above 1 let obj * cls exceed the threshold even when the
+    # anchor's best objectness is below it; both decoders must skip it.
+    outputs = make_outputs(0.0, seed=3)
+    outputs[0][0, 5:85, 10, 10] = 50.0
+    outputs[0][0, 4, 10, 10] = 0.04
+    expected = decode_candidates_reference(outputs, 480, 640, 0.5)
+    actual = decode_candidates(outputs, 480, 640, 0.5)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_negative_objectness_matches_reference():
+    # Raw (non-sigmoid) heads can carry negative scores; the obj * max(cls)
+    # shortcut must fall back to min(cls) there.
+    outputs = make_outputs(0.01, seed=11)
+    outputs[1][0, 4, :5, :5] = -2.0
+    outputs[1][0, 5:85, :5, :5] = -0.9
+    expected = decode_candidates_reference(outputs, 720, 1280, 0.25)
+    actual = decode_candidates(outputs, 720, 1280, 0.25)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_empty_outputs():
+    dets = decode_outputs(make_outputs(0.0), 720, 1280, 0.5, 0.45)
+    assert dets.shape == (0, 6)
+
+
+def random_candidates(n, classes, seed):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 600, (n, 2))
+    wh = rng.uniform(10, 120, (n, 2))
+    out = np.empty((n, 6), dtype=np.float32)
+    out[:, :2] = xy
+    out[:, 2:4] = xy + wh
+    out[:, 4] = rng.permutation(n) / n + 0.01               # distinct scores
+    out[:, 5] = rng.integers(0, classes, n)
+    return out
+
+
+@pytest.mark.parametrize("n", [1, 10, 300, 1500])
+def test_batched_nms_class_agnostic_matches_nms(n):
+    c = random_candidates(n, 1, seed=n)
+    expected = nms(c[:, :4], c[:, 4], 0.45)
+    actual = batched_nms(c, c[:, 4], 0.45, top_k=None, block=128)
+    assert actual.tolist() == expected
+
+
+@pytest.mark.parametrize("n", [50, 800])
+def test_batched_nms_class_aware_matches_per_class_nms(n):
+    c = random_candidates(n, 5, seed=n)
+    expected = []
+    for cls in range(5):
+        idx = np.flatnonzero(c[:, 5] == cls)
+        expected += idx[nms(c[idx, :4], c[idx, 4], 0.45)].tolist()
+    expected.sort(key=lambda i: -c[i, 4])
+    actual = batched_nms(c, c[:, 4], 0.45, class_ids=c[:, 5], top_k=None, block=64)
+    assert actual.tolist() == expected
+    capped = batched_nms(c, c[:, 4], 0.45, class_ids=c[:, 5], top_k=None, max_dets=7)
+    assert capped.tolist() == expected[:7]
+
+
+def test_overlapping_boxes_of_different_classes_both_survive():
+    c = np.array([[0, 0, 100, 200, 0.9, 0],                 # person
+                  [5, 50, 105, 210, 0.8, 1],                # bicycle, IoU ≈ 0.65
+                  [2, 2, 100, 200, 0.7, 0]], np.float32)    # duplicate person
+    assert select_detections(c, 0.45)[:, 5].tolist() == [0, 1]
+    assert nms(c[:, :4], c[:, 4], 0.45) == [0]              # the old behaviour
+
+
+def test_class_offset_separates_negative_coordinates():
+    # A plain-stretch decode isn't clipped, so boxes can start left of / above the frame.
+    boxes = np.array([[-100, -100, 10, 10]] * 2, np.float64)
+    kept = batched_nms(boxes, np.array([0.9, 0.8]), 0.45, class_ids=np.array([0, 1]))
+    assert kept.tolist() == [0, 1]
+    assert batched_nms(boxes, np.array([0.9, 0.8]), 0.45, class_ids=np.array([1, 1])).tolist() == [0]
+
+
+def test_equal_scores_break_ties_like_reference():
+    shifted = np.array([[0, 0, 100, 100, 0.5, 0],
+                        [5, 0, 105, 100, 0.5, 0],
+                        [10, 0, 110, 100, 0.5, 0]], np.float32)
+    np.testing.assert_array_equal(select_detections(shifted, 0.45),
+                                  select_detections_reference(shifted, 0.45))
+    c = random_candidates(400, 1, seed=7)
+    c[:, 4] = np.round(c[:, 4], 1)                          # a handful of distinct scores
+    np.testing.assert_array_equal(select_detections(c, 0.45), select_detections_reference(c, 0.45))
+
+
+def test_top_k_and_class_filter():
+    c = random_candidates(2000, 3, seed=1)
+    kept = batched_nms(c, c[:, 4], 0.45, class_ids=c[:, 5], top_k=100)
+    assert np.all(c[kept, 4] >= np.sort(c[:, 4])[-100])
+    only = select_detections(c, 0.45, classes=[2])
+    assert len(only) and set(only[:, 5].tolist()) == {2.0}
+    assert len(only) <= MAX_DETS
+
+
+def test_crowd_scene_keeps_one_box_per_person():
+    boxes = crowd_boxes(8, seed=5)
+    dets = decode_outputs(make_scene(boxes), 640, 640, 0.5, 0.45, classes=[0])
+    assert 4 <= len(dets) <= 8 and set(dets[:, 5].tolist()) == {0.0}
+
+
+@pytest.mark.parametrize("density", [0.0, 0.001, 0.01, 0.2])
+@pytest.mark.parametrize("conf", [0.01, 0.25, 0.5])
+def test_int8_path_matches_float_path_on_dequantized_outputs(density, conf):
+    outputs = make_outputs(density, seed=int(density * 1000) + 3)
+    native = quantize_outputs(outputs, calibrate(outputs))
+    assert isinstance(native, NativeOutputs) and native[0].dtype == np.int8
+    assert native[0].shape == (1, 80, 80, 255)                  # NHWC
+    meta = letterbox_geometry(1280, 720)[0]
+    expected = decode_candidates(dequantize_outputs(native), 720, 1280, conf, letterbox=meta)
+    actual = decode_candidates(native, 720, 1280, conf, letterbox=meta)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_int8_path_with_negative_values_matches_float_path():
+    outputs = make_outputs(0.01, seed=11)
+    outputs[1][0, 4, :5, :5] = -2.0
+    outputs[1][0, 5:85, :5, :5] = -0.9
+    native = quantize_outputs(outputs, calibrate(outputs))
+    assert native.quant[1].zero_point > -128
+    np.testing.assert_array_equal(decode_candidates(native, 720, 1280, 0.25),
+                                  decode_candidates(dequantize_outputs(native), 720, 1280, 0.25))
+
+
+def test_quantization_round_trip_is_within_half_a_step():
+    outputs = make_scene(crowd_boxes(5, seed=2), seed=2)
+    native = quantize_outputs(outputs, calibrate(outputs))
+    for out, back, (_, scale) in zip(outputs, dequantize_outputs(native), native.quant):
+        assert np.abs(out - back).max() <= scale / 2 + 1e-6
+
+
+def test_score_table_never_drops_a_cell_that_could_pass():
+    zp, scale = QuantParams(-20, 1.5 / 255)
+    q = np.arange(-128, 128)
+    obj = (q - zp) * scale
+    table = score_table(zp, scale, 0.3)
+    best = np.where(obj >= 0, obj * (127 - zp) * scale, obj * (-128 - zp) * scale)
+    assert not (best[~table[q.astype(np.int8).view(np.uint8)]] > 0.3 + 1e-6).any()
+    assert table.sum() < 256                                    # but it does screen
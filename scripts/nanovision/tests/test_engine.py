@@ -0,0 +1,129 @@
+import random
+import time
+from concurrent.futures import CancelledError
+
+import numpy as np
+import pytest
+
+from nanovision.engine import EngineError, FairScheduler, NpuPool
+from nanovision.fake import FakeRKNN
+from nanovision.synthetic import make_outputs
+
+
+class EchoRuntime(FakeRKNN):
+    """Returns its input tag after a random delay, to scramble completion order."""
+
+    def __init__(self, **kwargs):
+        super().__init__([[np.zeros(1)]], **kwargs)
+
+    def inference(self, inputs):
+        time.sleep(random.uniform(0, 0.01))
+        self.calls += 1
+        return [inputs[0], self.core_mask]
+
+
+def test_imap_preserves_order_across_cores():
+    pool = NpuPool("model.rknn", cores=3, backend=EchoRuntime)
+    try:
+        results = list(pool.imap([i] for i in range(40)))
+    finally:
+        pool.release()
+    assert [r[0] for r in results] == list(range(40))
+    # Round-robin: consecutive frames land on different cores.
+    assert [r[1] for r in results[:3]] == [1, 2, 4]
+
+
+def test_failed_core_is_skipped():
+    runtimes = []
+
+    def backend():
+        rt = EchoRuntime(fail_cores=(2,))
+        runtimes.append(rt)
+        return rt
+
+    pool = NpuPool("model.rknn", cores=3, backend=backend)
+    assert pool.describe() == {"backend": "rknn", "workers": 2, "core_masks": [1, 4], "failed_cores": [2]}
+    assert runtimes[1].released
+    pool.release()
+    assert all(rt.released for rt in runtimes)
+
+
+def test_degrades_to_single_auto_instance():
+    pool = NpuPool("model.rknn", cores=2, backend=lambda: EchoRuntime(fail_cores=(1, 2)))
+    try:
+        assert pool.describe()["core_masks"] == [0]
+        assert pool.infer(["frame"])[0] == "frame"
+    finally:
+        pool.release()
+
+
+def test_load_failure_raises():
+    with pytest.raises(EngineError):
+        NpuPool("model.rknn", backend=lambda: FakeRKNN([make_outputs(0.0)], load_ret=-1))
+
+
+def test_replays_recorded_outputs():
+    recorded = [make_outputs(0.0, seed=1), make_outputs(0.0, seed=2)]
+    pool = NpuPool("model.rknn", cores=1, backend=lambda: FakeRKNN(recorded))
+    try:
+        outs = [pool.infer([None]) for _ in range(3)]
+    finally:
+        pool.release()
+    assert outs[0] is recorded[0] and outs[1] is recorded[1] and outs[2] is recorded[0]
+
+
+def test_scheduler_rotates_between_keys():
+    pool = NpuPool("model.rknn", cores=1, backend=lambda: FakeRKNN([[np.zeros(1)]], latency=0.01))
+    sched = FairScheduler(pool, depth=100)
+    order = []
+    try:
+        # "busy" floods the queue before "quiet" submits anything.
+        futures = [sched.submit("busy", [i]) for i in range(10)]
+        quiet = sched.submit("quiet", [0])
+        for i, f in enumerate(futures):
+            f.add_done_callback(lambda _f, i=i: order.append(f"busy{i}"))
+        quiet.add_done_callback(lambda _f: order.append("quiet"))
+        quiet.result(timeout=5)
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        sched.close()
+        pool.release()
+    # At most one busy request was already dispatched ahead of it, plus one in rotation.
+    assert order.index("quiet") <= 2
+
+
+def test_scheduler_drops_oldest_per_key_and_counts():
+    pool = NpuPool("model.rknn", cores=1, backend=lambda: FakeRKNN([[np.zeros(1)]], latency=0.05))
+    sched = FairScheduler(pool, depth=1)
+    try:
+        first  = sched.submit("cam", [0])               # dispatched at once
+        time.sleep(0.01)
+        stale  = sched.submit("cam", [1])
+        latest = sched.submit("cam", [2])               # supersedes `stale`
+        assert latest.result(timeout=5) is not None
+        with pytest.raises(CancelledError):
+            stale.result(timeout=5)
+        first.result(timeout=5)
+        snap = sched.snapshot()["cam"]
+        assert (snap["submitted"], snap["dispatched"], snap["dropped"]) == (3, 2, 1)
+    finally:
+        sched.close()
+        pool.release()
+
+
+def test_scheduler_propagates_inference_errors():
+    class Broken(FakeRKNN):
+        def inference(self, inputs):
+            raise RuntimeError("npu fault")
+
+    pool = NpuPool("model.rknn", cores=1, backend=lambda: Broken([[np.zeros(1)]]))
+    sched = FairScheduler(pool)
+    try:
+        with pytest.raises(RuntimeError, match="npu fault"):
+            sched.infer("cam", [0])
+        with pytest.raises(RuntimeError, match="npu fault"):
+            sched.infer("cam", [1])                     # slot was released
+    finally:
+        sched.close()
+        pool.release()
@@ -0,0 +1,155 @@
+import json
+import os
+import socket
+import struct
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from nanovision.handoff import ImageSender, encode_jpeg, pack_frame
+
+
+def read_exact(conn, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = conn.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+class Listener:
+    """Minimal stand-in for src/image-socket.ts: records frames and acks them
+    (or, with silent=True, never replies)."""
+
+    def __init__(self, path, reply=None, silent=False):
+        self.path   = path
+        self.reply  = reply or {"ok": True}
+        self.silent = silent
+        self.frames = []
+        self.conns  = []
+        self.sock   = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        self.sock.listen()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.conns.append(conn)
+            with conn:
+                while True:
+                    head = read_exact(conn, 4)
+                    if head is None:
+                        break
+                    header = json.loads(read_exact(conn, struct.unpack(">I", head)[0]))
+                    payload = read_exact(conn, struct.unpack(">I", read_exact(conn, 4))[0])
+                    self.frames.append((header, payload))
+                    if self.silent:
+                        continue
+                    body = json.dumps(self.reply).encode()
+                    conn.sendall(struct.pack(">I", len(body)) + body)
+
+    def close(self):
+        """Like a restart: the listening socket and live connections go away."""
+        for conn in self.conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass                                # already closed by the client
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+
+
+@pytest.fixture
+def sock_path(tmp_path):
+    return str(tmp_path / "images.sock")
+
+
+def test_encode_jpeg_downscales_long_side():
+    frame = np.full((720, 1280, 3), 128, np.uint8)
+    img = cv2.imdecode(np.frombuffer(encode_jpeg(frame, quality=70, max_side=640), np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (360, 640, 3)
+    img = cv2.imdecode(np.frombuffer(encode_jpeg(frame, max_side=2000), np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (720, 1280, 3)
+
+
+def test_pack_frame_layout():
+    wire = pack_frame({"a": 1}, b"xyz")
+    assert wire == struct.pack(">I", 8) + b'{"a": 1}' + struct.pack(">I", 3) + b"xyz"
+
+
+def test_send_delivers_frames_over_one_connection(sock_path):
+    listener = Listener(sock_path)
+    sender = ImageSender(sock_path)
+    try:
+        assert sender.send({"type": "send_image", "chatJid": "a"}, b"jpeg1")
+        assert sender.send({"type": "send_image", "chatJid": "b"}, b"jpeg2")
+        assert [(h["chatJid"], p) for h, p in listener.frames] == [("a", b"jpeg1"), ("b", b"jpeg2")]
+        assert sender.snapshot() == {"sent": 2, "rejected": 0, "failed": 0, "unconfirmed": 0,
+                                     "connected": True}
+    finally:
+        sender.close()
+        listener.close()
+
+
+def test_rejected_image_counts_as_handled(sock_path):
+    listener = Listener(sock_path, reply={"ok": False, "error": "Unauthorized"})
+    sender = ImageSender(sock_path)
+    try:
+        assert sender.send({"type": "send_image"}, b"x")
+        assert sender.rejected == 1
+    finally:
+        sender.close()
+        listener.close()
+
+
+def test_no_listener_returns_false_and_backs_off(sock_path, monkeypatch):
+    sender = ImageSender(sock_path)
+    assert not sender.send({}, b"x")
+    listener = Listener(sock_path)
+    try:
+        assert not sender.send({}, b"x")              # still inside RETRY
+        monkeypatch.setattr(ImageSender, "RETRY", 0.0)
+        sender._retry_at = 0.0
+        assert sender.send({}, b"x")
+        assert sender.failed == 2
+    finally:
+        sender.close()
+        listener.close()
+
+
+def test_reconnects_after_listener_restart(sock_path):
+    listener = Listener(sock_path)
+    sender = ImageSender(sock_path)
+    try:
+        assert sender.send({}, b"one")
+        listener.close()
+        listener.thread.join(timeout=2)
+        os.unlink(sock_path)
+        listener = Listener(sock_path)
+        assert sender.send({}, b"two")
+        assert [p for _, p in listener.frames] == [b"two"]
+    finally:
+        sender.close()
+        listener.close()
+
+
+def test_reply_timeout_after_send_is_not_resent(sock_path):
+    listener = Listener(sock_path, silent=True)
+    sender = ImageSender(sock_path, timeout=0.2)
+    try:
+        assert sender.send({"type": "send_image"}, b"once")
+        assert [p for _, p in listener.frames] == [b"once"]
+        assert sender.snapshot() == {"sent": 0, "rejected": 0, "failed": 0, "unconfirmed": 1,
+                                     "connected": False}
+    finally:
+        sender.close()
+        listener.close()
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from nanovision.annotate import annotate
+from nanovision.labels import class_ids, label_name, load_labels
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_load_labels_skips_blank_lines(tmp_path):
+    path = tmp_path / "labels.txt"
+    path.write_text("person\n\nbicycle \n car\n")
+    assert load_labels(str(path)) == ["person", "bicycle", "car"]
+
+
+def test_label_name_falls_back_to_id():
+    labels = ["person", "bicycle"]
+    assert label_name(labels, np.float32(1.0)) == "bicycle"
+    assert label_name(labels, 7) == "7"
+
+
+def test_class_ids_match_names_and_fallback_ids():
+    assert class_ids(["person", "bicycle", "car"], ["car", "person"], 80) == [0, 2]
+    assert class_ids(["person"], ["5"], 80) == [5]
+    assert class_ids(["person"], ["unicorn"], 80) == []
+
+
+def test_annotate_draws_on_a_copy():
+    frame = np.zeros((120, 160, 3), np.uint8)
+    dets  = np.array([[20, 40, 100, 110, 0.9, 0, 3]], np.float32)    # with a track id
+    out = annotate(frame, dets, ["person"])
+    assert not frame.any()
+    assert (out[40:110, 20] == (0, 255, 0)).all()
+
+
+def test_failure_paths_skip_heavy_imports():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(SCRIPTS, "yolo-detect.py"),
+         "--image", "x.jpg", "--labels", "/nonexistent/labels.txt"],
+        capture_output=True, text=True, timeout=60)
+    assert json.loads(proc.stdout) == {"success": False,
+                                       "error": "Labels file not found: /nonexistent/labels.txt"}
+    imported = {line.split("|")[-1].strip() for line in proc.stderr.splitlines()}
+    assert not imported & {"cv2", "numpy"}
@@ -0,0 +1,126 @@
+import http.client
+import json
+import socket
+
+import pytest
+
+from nanovision.metrics import MetricsServer, Registry, rss_bytes, write_json
+from nanovision.pipeline import StageStats
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost", timeout=5)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(5)
+        self.sock.connect(self.path)
+
+
+def get(conn, path):
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    return resp.status, resp.getheader("Content-Type"), resp.read().decode()
+
+
+def test_histogram_buckets_are_cumulative_in_text_format():
+    reg = Registry()
+    stage = reg.histogram("stage_seconds", "Stage time", ("camera", "stage"), buckets=(0.01, 0.1))
+    for v in (0.005, 0.05, 0.05, 3.0):
+        stage.labels("door", "nms").observe(v)
+    text = reg.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{camera="door",stage="nms",le="0.01"} 1' in text
+    assert 'stage_seconds_bucket{camera="door",stage="nms",le="0.1"} 3' in text
+    assert 'stage_seconds_bucket{camera="door",stage="nms",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{camera="door",stage="nms"} 4' in text
+    assert 'stage_seconds_sum{camera="door",stage="nms"} 3.105' in text
+
+
+def test_counters_gauges_and_snapshot():
+    reg = Registry()
+    frames = reg.counter("frames_total", "Frames", ("camera",))
+    frames.labels("door").inc()
+    frames.labels("door").inc(2)
+    reg.counter("failures_total", "Failures").inc()
+    reg.gauge("rss_bytes", "Memory").set_function(lambda: 1234)
+    text = reg.render()
+    assert 'frames_total{camera="door"} 3' in text
+    assert "failures_total 1" in text and "rss_bytes 1234" in text
+    assert reg.snapshot() == {"frames_total": {"door": 3.0}, "failures_total": 1.0, "rss_bytes": 1234}
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    hist = Registry().histogram("h", "h", buckets=(0.01, 0.02, 0.04)).labels()
+    for _ in range(50):
+        hist.observe(0.005)
+    for _ in range(50):
+        hist.observe(0.03)
+    assert hist.quantile(0.5) == pytest.approx(0.01)
+    assert hist.quantile(0.75) == pytest.approx(0.03)
+    assert hist.snapshot()["count"] == 100
+
+
+def test_label_count_is_checked():
+    with pytest.raises(ValueError):
+        Registry().counter("c", "c", ("camera",)).labels("a", "b")
+
+
+def test_disabled_registry_is_a_no_op():
+    reg = Registry(enabled=False)
+    stage = reg.histogram("stage_seconds", "Stage time", ("camera", "stage"))
+    with stage.labels("door", "nms").time():
+        pass
+    reg.counter("frames_total", "Frames").inc()
+    assert reg.render() == "" and reg.snapshot() == {}
+
+
+def test_stage_stats_feed_a_histogram():
+    reg = Registry()
+    stats = StageStats("capture", reg.histogram("s", "s", ("stage",)).labels("capture"))
+    stats.record(0.02)
+    assert stats.snapshot()["count"] == 1
+    assert reg.snapshot()["s"]["capture"]["count"] == 1
+
+
+def test_rss_is_positive():
+    assert rss_bytes() > 1024 * 1024
+
+
+def test_write_json_replaces_file(tmp_path):
+    path = tmp_path / "stats.json"
+    write_json(str(path), {"a": 1})
+    write_json(str(path), {"a": 2})
+    assert json.loads(path.read_text()) == {"a": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["stats.json"]
+
+
+def test_server_over_tcp():
+    reg = Registry()
+    reg.counter("frames_total", "Frames").inc()
+    server = MetricsServer(reg, "127.0.0.1:0", extra=lambda: {"cameras": {}})
+    try:
+        conn = http.client.HTTPConnection(*server.address, timeout=5)
+        status, ctype, body = get(conn, "/metrics")
+        assert status == 200 and ctype.startswith("text/plain") and "frames_total 1" in body
+        status, _, body = get(conn, "/stats")
+        assert json.loads(body) == {"cameras": {}, "metrics": {"frames_total": 1.0}}
+        assert get(conn, "/nope")[0] == 404
+        conn.close()
+    finally:
+        server.close()
+
+
+def test_server_over_unix_socket(tmp_path):
+    path = str(tmp_path / "metrics.sock")
+    reg = Registry()
+    reg.gauge("up", "Up").set(1)
+    server = MetricsServer(reg, path)
+    try:
+        status, _, body = get(UnixHTTPConnection(path), "/metrics")
+        assert status == 200 and "up 1" in body
+    finally:
+        server.close()
+    assert not (tmp_path / "metrics.sock").exists()
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from nanovision.motion import MotionGate
+from nanovision.tests.helpers import FakeClock
+
+
+def scene(box_x: int | None = None) -> np.ndarray:
+    frame = np.full((720, 1280, 3), 90, dtype=np.uint8)
+    if box_x is not None:
+        frame[200:500, box_x:box_x + 200] = 230
+    return frame
+
+
+def test_static_scene_is_skipped_until_heartbeat():
+    clock = FakeClock()
+    gate = MotionGate(heartbeat=30, clock=clock)
+    assert gate.should_infer(scene())          # first frame primes the background
+    for _ in range(5):
+        clock.now += 5
+        assert not gate.should_infer(scene())
+    clock.now += 5                              # 30 s since last inference
+    assert gate.should_infer(scene())
+    assert gate.counters == {"checked": 7, "skipped": 5, "motion": 1, "heartbeat": 1}
+
+
+def test_moving_object_triggers_inference():
+    clock = FakeClock()
+    gate = MotionGate(heartbeat=3600, clock=clock)
+    gate.should_infer(scene())
+    clock.now += 1
+    assert gate.should_infer(scene(box_x=400))
+    assert gate.last_score > gate.threshold
+
+
+def test_configure():
+    gate = MotionGate()
+    gate.configure({"motionSensitivity": 10, "motionThreshold": 0.02, "motionHeartbeat": 15})
+    assert (gate.sensitivity, gate.threshold, gate.heartbeat) == (10, 0.02, 15.0)
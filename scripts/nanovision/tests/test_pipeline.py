@@ -0,0 +1,40 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from nanovision.pipeline import DropOldestQueue, StageStats
+
+
+def test_drop_oldest_keeps_newest_items():
+    q = DropOldestQueue(2)
+    for i in range(5):
+        q.put(i)
+    assert len(q) == 2
+    assert q.dropped == 3
+    assert [q.get(0), q.get(0)] == [3, 4]
+
+
+def test_get_times_out_when_empty():
+    q = DropOldestQueue(1)
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.01)
+
+
+def test_get_wakes_on_put_from_other_thread():
+    q = DropOldestQueue(1)
+    threading.Timer(0.02, q.put, args=("frame",)).start()
+    assert q.get(timeout=1.0) == "frame"
+
+
+def test_stage_stats_snapshot():
+    stats = StageStats("infer")
+    stats.record(0.010)
+    stats.record(0.030)
+    with stats.timed():
+        time.sleep(0.001)
+    snap = stats.snapshot()
+    assert snap["count"] == 3
+    assert snap["max_ms"] == 30.0
+    assert snap["last_ms"] >= 1.0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from nanovision.decoder import NUM_CLASSES, decode_outputs
+from nanovision.preprocess import PAD_VALUE, Preprocessor, letterbox_geometry
+from nanovision.synthetic import make_outputs
+
+
+def test_letterbox_geometry_720p():
+    meta, new_w, new_h = letterbox_geometry(1280, 720)
+    assert (new_w, new_h) == (640, 360)
+    assert meta.scale == 0.5
+    assert (meta.pad_x, meta.pad_y) == (0, 140)
+
+
+def test_output_is_rgb_letterboxed_and_reused():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[..., 0] = 255                                     # pure blue in BGR
+    pre = Preprocessor()
+    inp, meta = pre(frame)
+    assert inp.shape == (1, 640, 640, 3) and inp.flags.c_contiguous
+    assert (inp[0, :140] == PAD_VALUE).all() and (inp[0, 500:] == PAD_VALUE).all()
+    assert (inp[0, 140:500] == [0, 0, 255]).all()           # RGB order
+    inp2, _ = pre(frame)
+    assert inp2 is inp                                      # no per-frame allocation
+
+
+def test_matches_unfused_reference():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    inp, meta = Preprocessor()(frame)
+    ref = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), (640, 480), interpolation=cv2.INTER_LINEAR)
+    np.testing.assert_array_equal(inp[0, meta.pad_y:meta.pad_y + 480], ref)
+
+
+def test_ring_buffers_alternate_and_regrey_on_size_change():
+    pre = Preprocessor(buffers=2)
+    a, _ = pre(np.zeros((720, 1280, 3), np.uint8))
+    b, _ = pre(np.zeros((720, 1280, 3), np.uint8))
+    assert a is not b
+    c, meta = pre(np.zeros((1280, 720, 3), np.uint8))       # portrait: pads left/right
+    assert c is a and meta.pad_x == 140 and meta.pad_y == 0
+    assert (c[0, :, :140] == PAD_VALUE).all() and (c[0, :, 140:500] == 0).all()
+
+
+def test_decode_maps_boxes_back_through_letterbox():
+    # One confident cell on the stride-32 head centred at model pixel
+    # (320, 320) with a 156×198 anchor-sized box.
+    outputs = make_outputs(0.0)
+    feat = outputs[2][0].reshape(3, NUM_CLASSES + 5, 20, 20)
+    feat[1, :4, 9, 9] = [0.75, 0.75, 0.5, 0.5]             # centre (10*32, 10*32), wh = anchor
+    feat[1, 4, 9, 9] = 0.9
+    feat[1, 5, 9, 9] = 0.9
+    meta, _, _ = letterbox_geometry(1280, 720)
+    dets = decode_outputs(outputs, 720, 1280, 0.5, 0.45, letterbox=meta)
+    assert len(dets) == 1
+    np.testing.assert_allclose(dets[0, :4], [(320 - 78) * 2, (180 - 99) * 2, (320 + 78) * 2, (180 + 99) * 2])
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from nanovision.fake import FakeRKNN
+from nanovision.recording import load_recording, save_recording
+from nanovision.synthetic import make_outputs
+
+
+def test_round_trip_replays_through_fake(tmp_path):
+    frames  = [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(3)]
+    outputs = [make_outputs(0.01, seed=i) for i in range(3)]
+    path = str(tmp_path / "rec.npz")
+    save_recording(path, frames, outputs)
+
+    rec = load_recording(path)
+    assert len(rec.frames) == 3
+    np.testing.assert_array_equal(rec.frames[2], frames[2])
+    rknn = FakeRKNN(rec.outputs)
+    for expected in outputs:
+        got = rknn.inference([None])
+        assert [o.shape for o in got] == [o.shape for o in expected]
+        for g, e in zip(got, expected):
+            np.testing.assert_array_equal(g, e)
+
+
+def test_rejects_mismatched_lengths(tmp_path):
+    with pytest.raises(ValueError):
+        save_recording(str(tmp_path / "x.npz"), [np.zeros((2, 2, 3), np.uint8)], [])
@@ -0,0 +1,28 @@
+import numpy as np
+
+from nanovision.decoder import decode_outputs
+from nanovision.synthetic import PERSON, SyntheticCamera, crowd_boxes, make_scene
+
+
+def test_scene_object_decodes_to_its_box():
+    box = (100.0, 120.0, 180.0, 320.0)
+    dets = decode_outputs(make_scene([box]), 640, 640, 0.5, 0.45)
+    assert len(dets) == 1
+    assert dets[0, 5] == PERSON
+    np.testing.assert_allclose(dets[0, :4], box, atol=3)
+
+
+def test_crowd_gives_overlapping_candidates_per_object():
+    boxes = crowd_boxes(10, seed=3)
+    dets = decode_outputs(make_scene(boxes), 640, 640, 0.5, 0.45)
+    assert 5 <= len(dets) <= 10                             # overlapping people may merge
+
+
+def test_camera_moves_and_releases():
+    cam = SyntheticCamera(320, 240, objects=2)
+    ok, a = cam.read()
+    ok2, b = cam.read()
+    assert ok and ok2 and a.shape == (240, 320, 3) and a.dtype == np.uint8
+    assert not np.array_equal(a, b)
+    cam.release()
+    assert not cam.isOpened() and cam.read() == (False, None)
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+
+import pytest
+
+from nanovision.tasks import TaskWriter
+from nanovision.tests.helpers import FakeClock
+
+
+@pytest.fixture
+def make(tmp_path, monkeypatch):
+    """A TaskWriter on a fake clock whose flushes the test drives itself."""
+    monkeypatch.setattr(TaskWriter, "_start", lambda self: None)
+    clock = FakeClock(100.0)
+
+    def make(**kwargs):
+        writer = TaskWriter(str(tmp_path / "ipc"), clock=clock,
+                            orphan_glob=str(tmp_path / "nanoclaw-monitor-*"), **kwargs)
+        return writer, clock
+    return make
+
+
+def image(tmp_path, name):
+    path = tmp_path / f"nanoclaw-monitor-{name}.jpg"
+    path.write_bytes(b"jpeg")
+    return str(path)
+
+
+def tasks(tmp_path, group="main"):
+    tasks_dir = tmp_path / "ipc" / group / "tasks"
+    names = sorted(os.listdir(tasks_dir)) if tasks_dir.exists() else []
+    return [(name, json.loads((tasks_dir / name).read_text())) for name in names]
+
+
+def test_tasks_are_renamed_into_place_with_unique_names(tmp_path, make):
+    writer, _ = make(window=0, max_pending=100)
+    for i in range(20):                                 # all within a millisecond or two
+        writer.submit("main", "chat@g.us", image(tmp_path, i), f"alert {i}", source="monitor_door")
+    written = tasks(tmp_path)
+    assert len(written) == 20 and len({name for name, _ in written}) == 20
+    assert all(name.startswith("monitor_door_") and name.endswith(".json") for name, _ in written)
+    assert written[0][1] == {"type": "send_image", "chatJid": "chat@g.us",
+                             "imagePath": image(tmp_path, 0), "caption": "alert 0"}
+    assert not [n for n in os.listdir(tmp_path / "ipc" / "main" / "tasks") if n.startswith(".")]
+
+
+def test_burst_is_merged_into_one_summary_task(tmp_path, make):
+    writer, clock = make(window=5)
+    paths = [image(tmp_path, i) for i in range(4)]
+    writer.submit("main", "chat", paths[0], "first", source="monitor_door")
+    for i in range(1, 4):
+        clock.now += 1
+        writer.submit("main", "chat", paths[i], f"alert {i}", source="monitor_door")
+    writer.submit("main", "chat", image(tmp_path, "yard"), "yard", source="monitor_yard")
+    assert [t["caption"] for _, t in tasks(tmp_path)] == ["first", "yard"]    # leading edges
+    writer.flush()
+    assert len(tasks(tmp_path)) == 2                                          # window still open
+    clock.now += 2
+    writer.flush()
+    summary = [t for name, t in tasks(tmp_path) if name.startswith("monitor_door_")][-1]
+    assert summary["imagePath"] == paths[3]
+    assert summary["caption"] == "alert 3\n(latest of 3 alerts in 2s)"
+    assert writer.snapshot()["merged"] == 3 and writer.snapshot()["written"] == 3
+
+
+def test_superseded_images_are_deleted(tmp_path, make):
+    writer, _ = make(window=5)
+    paths = [image(tmp_path, i) for i in range(4)]
+    for path in paths:
+        writer.submit("main", "chat", path, "alert")
+    assert [os.path.exists(p) for p in paths] == [True, False, False, True]
+
+
+def test_backpressure_holds_alerts_until_the_watcher_catches_up(tmp_path, make):
+    writer, clock = make(window=0, max_pending=2)
+    paths = [image(tmp_path, i) for i in range(6)]
+    for i, path in enumerate(paths):
+        writer.submit("main", "chat", path, f"alert {i}")
+    assert len(tasks(tmp_path)) == 2
+    clock.now += 10
+    writer.flush()
+    assert len(tasks(tmp_path)) == 2 and writer.snapshot()["held"] == 1
+    os.unlink(tmp_path / "ipc" / "main" / "tasks" / tasks(tmp_path)[0][0])   # watcher sent one
+    clock.now += 1
+    writer.flush()
+    written = tasks(tmp_path)
+    assert len(written) == 2 and written[-1][1]["caption"].startswith("alert 5\n(latest of 4 alerts")
+    assert [os.path.exists(p) for p in paths] == [True, True, False, False, False, True]
+
+
+def test_prune_removes_only_old_unreferenced_files(tmp_path, make):
+    writer, _ = make(window=0, orphan_age=60)
+    referenced = image(tmp_path, "pending")
+    writer.submit("main", "chat", referenced, "alert")
+    other_group = image(tmp_path, "other")
+    os.makedirs(tmp_path / "ipc" / "agent" / "tasks")
+    (tmp_path / "ipc" / "agent" / "tasks" / "x.json").write_text(json.dumps({"imagePath": other_group}))
+    orphan, recent = image(tmp_path, "orphan"), image(tmp_path, "recent")
+    stale_tmp = tmp_path / "ipc" / "main" / "tasks" / ".tmp-dead.task"
+    stale_tmp.write_text("{")
+    old = time.time() - 120
+    for path in (referenced, other_group, orphan, str(stale_tmp)):
+        os.utime(path, (old, old))
+    assert writer.prune() == 2
+    assert not os.path.exists(orphan) and not stale_tmp.exists()
+    assert all(os.path.exists(p) for p in (referenced, other_group, recent))
+
+
+def test_close_sends_what_is_still_merged(tmp_path, make):
+    writer, _ = make(window=60)
+    paths = [image(tmp_path, i) for i in range(2)]
+    writer.submit("main", "chat", paths[0], "a")
+    writer.submit("main", "chat", paths[1], "b")
+    writer.close()
+    assert [t["imagePath"] for _, t in tasks(tmp_path)] == paths
+
+
+def test_background_flush_writes_summary_when_window_closes(tmp_path):
+    writer = TaskWriter(str(tmp_path / "ipc"), window=0.05, orphan_glob=None)
+    paths = [image(tmp_path, i) for i in range(3)]
+    try:
+        for i, path in enumerate(paths):
+            writer.submit("main", "chat", path, f"alert {i}")
+        deadline = time.monotonic() + 2
+        while len(tasks(tmp_path)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [t["caption"].split("\n")[0] for _, t in tasks(tmp_path)] == ["alert 0", "alert 2"]
+    finally:
+        writer.close()
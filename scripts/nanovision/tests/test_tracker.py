@@ -0,0 +1,63 @@
+import numpy as np
+
+from nanovision.tracker import AlertPolicy, Tracker
+
+
+def det(x, y, cls=0, size=100, conf=0.9):
+    return [x, y, x + size, y + size, conf, cls]
+
+
+def test_ids_are_stable_across_small_moves():
+    tracker = Tracker()
+    t1, g1 = tracker.update(np.array([det(0, 0), det(500, 500)], np.float32), now=0)
+    t2, g2 = tracker.update(np.array([det(510, 505), det(10, 5)], np.float32), now=10)
+    assert list(t1[:, 6]) == [1, 2]
+    assert list(t2[:, 6]) == [2, 1]
+    assert np.isinf(g1).all()
+    assert list(g2) == [10, 10]
+
+
+def test_centroid_fallback_handles_large_jumps():
+    tracker = Tracker()
+    tracker.update(np.array([det(0, 0)], np.float32), now=0)
+    tracked, _ = tracker.update(np.array([det(90, 60)], np.float32), now=10)   # IoU ~0.03
+    assert tracked[0, 6] == 1
+
+
+def test_classes_never_share_a_track():
+    tracker = Tracker()
+    tracker.update(np.array([det(0, 0, cls=0)], np.float32), now=0)
+    tracked, gaps = tracker.update(np.array([det(0, 0, cls=1)], np.float32), now=1)
+    assert tracked[0, 6] == 2 and np.isinf(gaps[0])
+
+
+def test_tracks_expire_after_max_age():
+    tracker = Tracker(max_age=30)
+    tracker.update(np.array([det(0, 0)], np.float32), now=0)
+    tracked, _ = tracker.update(np.array([det(0, 0)], np.float32), now=31)
+    assert tracked[0, 6] == 2
+    assert len(tracker) == 1
+
+
+def test_alert_policy_dedups_a_stationary_target():
+    tracker, policy = Tracker(), AlertPolicy(cooldown=60)
+    reasons = []
+    for t in range(0, 100, 10):
+        _, gaps = tracker.update(np.array([det(0, 0)], np.float32), now=t)
+        reasons.append(policy.check(gaps, now=t))
+    assert reasons == ["new"] + [None] * 9
+    assert policy.suppressed == 9
+
+
+def test_alert_policy_reentry_and_count_change():
+    tracker, policy = Tracker(), AlertPolicy(cooldown=60)
+    _, gaps = tracker.update(np.array([det(0, 0)], np.float32), now=0)
+    assert policy.check(gaps, now=0) == "new"
+    _, gaps = tracker.update(np.array([det(0, 0)], np.float32), now=70)     # gone 70 s
+    assert policy.check(gaps, now=70) == "reentry"
+    _, gaps = tracker.update(np.array([det(0, 0), det(400, 400)], np.float32), now=80)
+    assert policy.check(gaps, now=80) == "new"
+    _, gaps = tracker.update(np.array([det(0, 0)], np.float32), now=100)
+    assert policy.check(gaps, now=100) is None                              # within cooldown
+    _, gaps = tracker.update(np.array([det(0, 0)], np.float32), now=145)
+    assert policy.check(gaps, now=145) == "count"
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from nanovision.watch import ConfigWatcher
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "poll"])
+def watcher(request, tmp_path):
+    w = ConfigWatcher(str(tmp_path / "cfg.json"), use_inotify=request.param)
+    yield w
+    w.close()
+
+
+def write(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def test_read_caches_until_file_changes(watcher):
+    assert watcher.read() is None
+    write(watcher.path, {"interval": 5})
+    assert watcher.read() == {"interval": 5}
+    assert watcher.read() is watcher.read()
+    assert watcher.parses == 1
+    write(watcher.path, {"interval": 1})
+    assert watcher.read() == {"interval": 1}
+    os.unlink(watcher.path)
+    assert watcher.read() is None
+
+
+def test_invalid_json_keeps_last_good_value(watcher):
+    write(watcher.path, {"interval": 5})
+    watcher.read()
+    with open(watcher.path, "w") as f:
+        f.write('{"interv')
+    assert watcher.read() == {"interval": 5}
+
+
+def test_wait_wakes_on_change_not_on_timeout(watcher):
+    assert watcher.wait(0.05) is False
+    threading.Timer(0.1, write, (watcher.path, {"a": 1})).start()
+    t0 = time.monotonic()
+    assert watcher.wait(5) is True
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_wait_ignores_other_files_and_wake_interrupts(watcher, tmp_path):
+    threading.Timer(0.05, write, (str(tmp_path / "other.json"), {})).start()
+    assert watcher.wait(0.4) is False
+    threading.Timer(0.05, watcher.wake).start()
+    t0 = time.monotonic()
+    assert watcher.wait(5) is True
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_uses_inotify_on_linux(tmp_path):
+    w = ConfigWatcher(str(tmp_path / "cfg.json"))
+    try:
+        assert w.mode == ("inotify" if os.uname().sysname == "Linux" else "poll")
+    finally:
+        w.close()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from nanovision.preprocess import Preprocessor
+from nanovision.synthetic import make_scene
+from nanovision.zones import (
+    Crop,
+    detect_in_crops,
+    parse_zones,
+    plan_crops,
+    points_in_polygon,
+    zone_index,
+)
+
+
+def test_parse_zones_rect_polygon_and_units():
+    zones = parse_zones([{"name": "door", "rect": [0.5, 0.25, 0.75, 1.0]},
+                         {"polygon": [[0, 400], [300, 400], [300, 720]]}])
+    assert [z.name for z in zones] == ["door", "zone2"]
+    assert zones[0].relative and not zones[1].relative
+    assert zones[0].polygon(1280, 720).tolist() == [[640, 180], [960, 180], [960, 720], [640, 720]]
+    assert zones[1].polygon(1280, 720)[2].tolist() == [300, 720]
+
+
+@pytest.mark.parametrize("spec", [{}, [{"rect": [0.5, 0.5, 0.2, 0.9]}], [{"polygon": [[0, 0], [1, 1]]}],
+                                  [{"name": "x"}], ["door"]])
+def test_parse_zones_rejects_malformed(spec):
+    with pytest.raises(ValueError):
+        parse_zones(spec)
+
+
+def test_small_zone_is_one_crop_and_no_zones_is_full_frame():
+    assert plan_crops([], 1280, 720) == [Crop(0, 0, 1280, 720)]
+    zones = parse_zones([{"rect": [100, 200, 300, 500]}])
+    assert plan_crops(zones, 1280, 720) == [Crop(100, 200, 200, 300)]
+
+
+def test_large_zone_is_tiled_with_overlap_and_clipped():
+    zones = parse_zones([{"rect": [0, 0, 1400, 720]}])           # extends past the frame
+    crops = plan_crops(zones, 1280, 720, size=640, overlap=0.2)
+    assert {(c.w, c.h) for c in crops} == {(640, 640)}
+    xs, ys = sorted({c.x for c in crops}), sorted({c.y for c in crops})
+    assert xs[0] == 0 and xs[-1] + 640 == 1280 and ys == [0, 80]
+    assert all(b - a <= 640 * 0.8 for a, b in zip(xs, xs[1:]))  # neighbours overlap ≥ 20%
+
+
+def test_overlapping_zones_share_identical_crops():
+    zones = parse_zones([{"rect": [0.1, 0.1, 0.3, 0.3]}, {"rect": [0.1, 0.1, 0.3, 0.3]}])
+    assert len(plan_crops(zones, 1280, 720)) == 1
+
+
+def test_detect_in_crops_maps_boxes_to_frame_coordinates():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    crop  = Crop(600, 300, 320, 320)                # letterboxed 2× into 640×640
+    # An object at model-space (200, 200)–(300, 400) is (100, 100)–(150, 200) in the crop.
+    outputs = make_scene([(200, 200, 300, 400)], seed=1)
+    seen = []
+
+    def infer(inp):
+        seen.append(inp.shape)
+        return outputs
+
+    dets = detect_in_crops(frame, [crop], infer, Preprocessor(), 0.5, 0.45)
+    assert seen == [(1, 640, 640, 3)]
+    assert len(dets) == 1
+    np.testing.assert_allclose(dets[0, :4], [700, 400, 750, 500], atol=3)
+
+
+def test_detect_in_crops_merges_duplicates_from_overlapping_tiles():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    # Two 640 px tiles overlapping by 128 px; the object sits in the overlap.
+    crops = [Crop(0, 0, 640, 640), Crop(512, 0, 640, 640)]
+    scenes = iter([make_scene([(540, 100, 620, 300)], seed=1),      # tile 0: frame x 540–620
+                   make_scene([(28, 100, 108, 300)], seed=2)])      # tile 1: frame x 540–620
+    dets = detect_in_crops(frame, crops, lambda inp: next(scenes), Preprocessor(), 0.5, 0.45)
+    assert len(dets) == 1
+    np.testing.assert_allclose(dets[0, :4], [540, 100, 620, 300], atol=6)   # synthetic jitter
+
+
+def test_points_in_polygon_concave():
+    poly = np.array([[0, 0], [10, 0], [10, 10], [5, 5], [0, 10]], dtype=float)   # notch in the y=10 side
+    pts  = np.array([[2, 2], [5, 8], [8, 6], [11, 5], [5, 4]], dtype=float)
+    assert points_in_polygon(pts, poly).tolist() == [True, False, True, False, True]
+
+
+def test_zone_index_uses_bottom_centre_and_first_zone_wins():
+    zones = parse_zones([{"name": "door", "rect": [0.5, 0.5, 1, 1]}, {"name": "all", "rect": [0, 0, 1, 1]}])
+    dets = np.array([[700, 100, 800, 400, 0.9, 0],     # feet at (750, 400): door
+                     [100, 100, 200, 300, 0.9, 0],     # feet at (150, 300): only "all"
+                     [700, 100, 800, 720, 0.9, 0]],    # feet on the bottom edge: door
+                    dtype=np.float32)
+    assert zone_index(dets, zones, 1280, 720).tolist() == [0, 1, 0]
+    assert zone_index(dets, zones[:1], 1280, 720).tolist() == [0, -1, 0]
@@ -0,0 +1,141 @@
+"""
+tracker.py — Lightweight SORT-style tracker and alert de-duplication.
+
+Tracker gives detections stable ids across frames. Matching is greedy on
+IoU within a class, with a centroid-distance fallback for the large jumps
+that long monitor intervals produce; there is no motion model. update()
+appends the id as a 7th column to the decoder's (N, 6) output.
+
+AlertPolicy turns track updates into alert decisions: fire on new tracks, on
+a track that reappears after `cooldown` seconds unseen, or when the number
+of visible targets changed and the last alert is at least `cooldown` old.
+"""
+
+import math
+
+import numpy as np
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (M, 4) and (N, 4) xyxy boxes -> (M, N)."""
+    xx1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    yy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    xx2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    yy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter  = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-6)
+
+def _greedy_pairs(score: np.ndarray, valid: np.ndarray, descending: bool) -> list[tuple[int, int]]:
+    """Pick (row, col) pairs best-first, each row and column used once."""
+    rows, cols = np.nonzero(valid)
+    if rows.size == 0:
+        return []
+    order = np.argsort(score[rows, cols], kind="stable")
+    if descending:
+        order = order[::-1]
+    used_r: set[int] = set()
+    used_c: set[int] = set()
+    pairs = []
+    for k in order:
+        r, c = int(rows[k]), int(cols[k])
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        pairs.append((r, c))
+    return pairs
+
+class Tracker:
+    def __init__(self, iou_thresh: float = 0.3, centroid_thresh: float = 1.0, max_age: float = 300.0):
+        self.iou_thresh      = iou_thresh       # min IoU for a direct match
+        self.centroid_thresh = centroid_thresh  # max centre shift, in track box diagonals
+        self.max_age         = max_age          # forget tracks unseen this long (seconds)
+        self._next_id   = 1
+        self._boxes     = np.empty((0, 4), dtype=np.float32)
+        self._cls       = np.empty(0, dtype=np.int64)
+        self._ids       = np.empty(0, dtype=np.int64)
+        self._last_seen = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def update(self, dets: np.ndarray, now: float) -> tuple[np.ndarray, np.ndarray]:
+        """Match detections to tracks.
+
+        Returns (tracked, gaps): tracked is (N, 7) [x1, y1, x2, y2, conf,
+        class_id, track_id]; gaps[i] is how long detection i's track had been
+        unseen (inf for a new track).
+        """
+        alive = now - self._last_seen <= self.max_age
+        self._boxes, self._cls = self._boxes[alive], self._cls[alive]
+        self._ids, self._last_seen = self._ids[alive], self._last_seen[alive]
+
+        n = len(dets)
+        track_idx = np.full(n, -1, dtype=np.int64)
+        if n and len(self._ids):
+            boxes = dets[:, :4]
+            same_cls = self._cls[:, None] == dets[None, :, 5].astype(np.int64)
+            iou = iou_matrix(self._boxes, boxes)
+            for r, c in _greedy_pairs(iou, same_cls & (iou >= self.iou_thresh), descending=True):
+                track_idx[c] = r
+
+            # Centroid fallback for whatever IoU left unmatched.
+            free_r = np.ones(len(self._ids), dtype=bool)
+            free_r[track_idx[track_idx >= 0]] = False
+            free_c = track_idx < 0
+            if free_r.any() and free_c.any():
+                tc = (self._boxes[:, :2] + self._boxes[:, 2:4]) / 2
+                dc = (boxes[:, :2] + boxes[:, 2:4]) / 2
+                diag = np.hypot(self._boxes[:, 2] - self._boxes[:, 0], self._boxes[:, 3] - self._boxes[:, 1])
+                dist = np.hypot(*(tc[:, None, :] - dc[None, :, :]).transpose(2, 0, 1)) / (diag[:, None] + 1e-6)
+                valid = same_cls & free_r[:, None] & free_c[None, :] & (dist <= self.centroid_thresh)
+                for r, c in _greedy_pairs(dist, valid, descending=False):
+                    track_idx[c] = r
+
+        gaps = np.full(n, math.inf)
+        matched = track_idx >= 0
+        gaps[matched] = now - self._last_seen[track_idx[matched]]
+        ids = np.empty(n, dtype=np.int64)
+        ids[matched] = self._ids[track_idx[matched]]
+
+        # Refresh matched tracks, then append new ones.
+        self._boxes[track_idx[matched]] = dets[matched, :4]
+        self._last_seen[track_idx[matched]] = now
+        new = ~matched
+        n_new = int(new.sum())
+        ids[new] = np.arange(self._next_id, self._next_id + n_new)
+        self._next_id += n_new
+        self._boxes     = np.concatenate([self._boxes, dets[new, :4].astype(np.float32)])
+        self._cls       = np.concatenate([self._cls, dets[new, 5].astype(np.int64)])
+        self._ids       = np.concatenate([self._ids, ids[new]])
+        self._last_seen = np.concatenate([self._last_seen, np.full(n_new, now)])
+
+        tracked = np.empty((n, 7), dtype=np.float32)
+        tracked[:, :6] = dets[:, :6]
+        tracked[:, 6] = ids
+        return tracked, gaps
+
+class AlertPolicy:
+    def __init__(self, cooldown: float = 60.0):
+        self.cooldown   = cooldown
+        self.last_alert = -math.inf
+        self.last_count = 0
+        self.suppressed = 0
+
+    def check(self, gaps: np.ndarray, now: float) -> str | None:
+        """Return why this frame should alert ("new", "reentry", "count") or None."""
+        if len(gaps) == 0:
+            return None
+        if np.isinf(gaps).any():
+            reason = "new"
+        elif (gaps >= self.cooldown).any():
+            reason = "reentry"
+        elif len(gaps) != self.last_count and now - self.last_alert >= self.cooldown:
+            reason = "count"
+        else:
+            self.suppressed += 1
+            return None
+        self.last_alert = now
+        self.last_count = len(gaps)
+        return reason
@@ -0,0 +1,175 @@
+"""
+watch.py — Change notification and mtime-cached parsing for a JSON file.
+
+ConfigWatcher.wait() returns as soon as the file is written, replaced or
+deleted. On Linux it uses inotify (through libc, no extra packages) on the
+parent directory, so the file may come and go. Elsewhere, or if inotify
+can't be set up, it falls back to stat polling. read() only re-parses when
+the file's (mtime, size, inode) changes, so calling it every loop costs one
+stat. wake() cuts a wait() short from another thread or a signal handler.
+
+Usage:
+  watcher = ConfigWatcher("/tmp/nanoclaw-monitor.json")
+  while running:
+      cfg = watcher.read()
+      ...
+      watcher.wait(timeout=60)
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+
+# ─── inotify (linux/inotify.h) ────────────────────────────────────────────────
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_DELETE      = 0x00000200
+IN_NONBLOCK    = 0o4000
+IN_CLOEXEC     = 0o2000000
+# Complete writes and renames only: IN_CREATE/IN_MODIFY would wake us while a
+# writer is still half-way through the file.
+WATCH_MASK     = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+_EVENT         = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+POLL_INTERVAL  = 0.25   # seconds between stats when inotify is unavailable
+
+def _inotify_watch(directory: str) -> int | None:
+    """Return a non-blocking inotify fd watching `directory`, or None."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+class ConfigWatcher:
+    """Watches one JSON file; see module docstring."""
+
+    def __init__(self, path: str, use_inotify: bool = True):
+        self.path = os.path.abspath(path)
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._fd = _inotify_watch(os.path.dirname(self.path)) if use_inotify else None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._key: tuple | None = None
+        self._value: dict | None = None
+        self.parses = 0
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "poll"
+
+    def _stat_key(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def read(self) -> dict | None:
+        """Parsed file contents, or None if the file is missing.
+
+        Re-parses only when the file changed since the last call. If the new
+        contents aren't valid JSON (e.g. a non-atomic writer is mid-write),
+        the last good value is kept and the next read() tries again.
+        """
+        key = self._stat_key()
+        if key is None:
+            self._key, self._value = None, None
+            return None
+        if key == self._key:
+            return self._value
+        try:
+            with open(self.path) as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            self._key, self._value = None, None
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[watch] Ignoring unreadable {self.path}: {e}")
+            return self._value
+        self.parses += 1
+        self._key, self._value = key, value if isinstance(value, dict) else None
+        return self._value
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the file changes, wake() is called or `timeout` passes.
+
+        Returns True if woken by a change or wake(), False on timeout.
+        """
+        if self._fd is None:
+            return self._poll(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            if not ready:
+                return False
+            woke = False
+            if self._wake_r in ready:
+                self._drain(self._wake_r)
+                woke = True
+            if self._fd in ready:
+                woke = self._read_events() or woke
+            if woke:
+                return True                     # else: another file in the directory
+
+    def _poll(self, timeout: float | None) -> bool:
+        start = self._stat_key()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if step <= 0:
+                return False
+            ready, _, _ = select.select([self._wake_r], [], [], step)
+            if ready:
+                self._drain(self._wake_r)
+                return True
+            if self._stat_key() != start:
+                return True
+
+    def _read_events(self) -> bool:
+        """Consume queued inotify events; True if any concern our file."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset, hit = 0, False
+        while offset + _EVENT.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            hit = hit or name == self._name
+            offset += _EVENT.size + length
+        return hit
+
+    @staticmethod
+    def _drain(fd: int) -> None:
+        try:
+            while os.read(fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wake(self) -> None:
+        """Make the current or next wait() return immediately (signal-safe)."""
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass                                # already pending
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._fd = None
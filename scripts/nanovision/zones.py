@@ -0,0 +1,168 @@
+"""
+zones.py — Region-of-interest zones: cropped / tiled inference and filtering.
+
+A wide camera squashed into 640×640 leaves a doorway a few dozen pixels
+across. With zones configured, the detector runs on each zone's bounding
+crop instead of the full frame — at native or higher resolution — and
+crops larger than the model input are split into overlapping size×size
+tiles. Boxes are mapped back to frame coordinates and merged across crops
+with the usual class-aware NMS, then anything whose anchor point (bottom
+centre, i.e. where a person stands) lies outside every zone is dropped.
+
+Zone config, a list of:
+  {"name": "door",  "rect": [x1, y1, x2, y2]}
+  {"name": "drive", "polygon": [[x, y], [x, y], [x, y], ...]}
+Coordinates are fractions of the frame (0–1), or pixels if any value is
+above 1.
+
+Usage:
+  zones = parse_zones(cfg["zones"])
+  crops = plan_crops(zones, width, height)
+  dets  = detect_in_crops(frame, crops, infer, pre, conf, nms)
+  dets  = dets[zone_index(dets, zones, width, height) >= 0]
+"""
+
+import contextlib
+import math
+from typing import Callable, ContextManager, NamedTuple
+
+import numpy as np
+
+from .decoder import MODEL_INPUT, decode_candidates, select_detections
+
+TILE_OVERLAP = 0.2      # fraction of a tile shared with its neighbour
+
+class Zone(NamedTuple):
+    name: str
+    points: np.ndarray  # (N, 2) float vertices, fractions or pixels
+    relative: bool      # points are fractions of the frame size
+
+    def polygon(self, width: int, height: int) -> np.ndarray:
+        """Vertices in pixels for a width×height frame."""
+        if self.relative:
+            return self.points * (width, height)
+        return self.points
+
+class Crop(NamedTuple):
+    x: int
+    y: int
+    w: int
+    h: int
+
+def parse_zones(spec) -> list[Zone]:
+    """Zones from config (see module docstring). Raises ValueError if malformed."""
+    if not isinstance(spec, list):
+        raise ValueError("zones must be a list")
+    zones = []
+    for i, entry in enumerate(spec):
+        if not isinstance(entry, dict):
+            raise ValueError(f"zone {i} is not an object")
+        name = str(entry.get("name") or f"zone{i + 1}")
+        if "rect" in entry:
+            x1, y1, x2, y2 = (float(v) for v in entry["rect"])
+            if x2 <= x1 or y2 <= y1:
+                raise ValueError(f"zone {name}: rect must be [x1, y1, x2, y2] with x2 > x1, y2 > y1")
+            points = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+        elif "polygon" in entry:
+            points = np.asarray(entry["polygon"], dtype=np.float64)
+            if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+                raise ValueError(f"zone {name}: polygon needs at least 3 [x, y] points")
+        else:
+            raise ValueError(f"zone {name}: needs 'rect' or 'polygon'")
+        zones.append(Zone(name, points, relative=bool(points.max() <= 1.0)))
+    return zones
+
+def _tile_starts(start: int, length: int, size: int, overlap: float) -> list[int]:
+    """Offsets of size-long tiles covering [start, start + length), evenly spaced."""
+    if length <= size:
+        return [start]
+    step  = size * (1.0 - overlap)
+    count = math.ceil((length - size) / step) + 1
+    return [start + round(i * (length - size) / (count - 1)) for i in range(count)]
+
+def plan_crops(zones: list[Zone], width: int, height: int, size: int = MODEL_INPUT,
+               overlap: float = TILE_OVERLAP) -> list[Crop]:
+    """The crops to run inference on for a width×height frame.
+
+    One crop per zone bounding box, clipped to the frame; a box wider or
+    taller than `size` becomes a grid of size×size tiles sharing `overlap`
+    of their width/height with their neighbours. No zones: the full frame.
+    """
+    if not zones:
+        return [Crop(0, 0, width, height)]
+    crops: list[Crop] = []
+    for zone in zones:
+        poly = zone.polygon(width, height)
+        x1, y1 = (int(v) for v in np.floor(poly.min(axis=0)))
+        x2, y2 = (int(v) for v in np.ceil(poly.max(axis=0)))
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(width, x2), min(height, y2)
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            continue                            # off-frame or degenerate
+        for ty in _tile_starts(y1, y2 - y1, size, overlap):
+            for tx in _tile_starts(x1, x2 - x1, size, overlap):
+                crop = Crop(tx, ty, min(size, x2 - tx), min(size, y2 - ty))
+                if crop not in crops:
+                    crops.append(crop)
+    return crops
+
+def detect_in_crops(
+    frame: np.ndarray,
+    crops: list[Crop],
+    infer: Callable[[np.ndarray], list],
+    pre: Callable,
+    conf_thresh: float,
+    nms_thresh: float,
+    classes=None,
+    timer: Callable[[str], ContextManager] | None = None,
+) -> np.ndarray:
+    """Run `infer` on each crop in turn and merge the boxes in frame coordinates.
+
+    `pre` is a Preprocessor (crop → (input, Letterbox)), `infer` maps an
+    input tensor to the model outputs. Each input is inferred before the
+    next crop is preprocessed, so a single-buffer Preprocessor is enough.
+    `timer(stage)`, if given, wraps the preprocess / inference / decode /
+    nms steps. Returns (N, 6) rows like decode_outputs().
+    """
+    stage = timer or (lambda name: contextlib.nullcontext())
+    parts = []
+    for crop in crops:
+        view = frame[crop.y:crop.y + crop.h, crop.x:crop.x + crop.w]
+        with stage("preprocess"):
+            inp, meta = pre(view)
+        with stage("inference"):
+            outputs = infer(inp)
+        with stage("decode"):
+            cands = decode_candidates(outputs, crop.h, crop.w, conf_thresh, letterbox=meta)
+        if len(cands):
+            cands[:, 0:4:2] += crop.x
+            cands[:, 1:4:2] += crop.y
+            parts.append(cands)
+    if not parts:
+        return np.empty((0, 6), dtype=np.float32)
+    with stage("nms"):
+        return select_detections(np.concatenate(parts), nms_thresh, classes)
+
+def points_in_polygon(points: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Even-odd rule test of (N, 2) points against one polygon; (N,) bool."""
+    x, y = points[:, 0:1], points[:, 1:2]
+    xa, ya = poly[:, 0], poly[:, 1]
+    xb, yb = np.roll(xa, -1), np.roll(ya, -1)
+    crosses = (ya > y) != (yb > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = xa + (y - ya) * (xb - xa) / (yb - ya)
+    return (crosses & (x < x_at)).sum(axis=1) % 2 == 1
+
+def zone_index(dets: np.ndarray, zones: list[Zone], width: int, height: int) -> np.ndarray:
+    """Index of the first zone holding each detection's bottom-centre point, or -1."""
+    result = np.full(len(dets), -1, dtype=np.intp)
+    if not len(dets):
+        return result
+    # Boxes are clipped to the frame; keep a box on the bottom edge inside a
+    # zone that extends to it.
+    anchors = np.stack([(dets[:, 0] + dets[:, 2]) / 2, np.minimum(dets[:, 3], height - 0.5)],
+                       axis=1).astype(np.float64)
+    for i in reversed(range(len(zones))):       # first matching zone wins
+        inside = points_in_polygon(anchors, zones[i].polygon(width, height))
+        result[inside] = i
+    return result
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+vision-bench.py — Offline microbenchmarks for the nanovision helpers.
+
+Runs on any machine with NumPy (and OpenCV for `scenarios`); no board,
+camera or rknnlite required except for `record`. `backends` needs a real
+model: the .rknn for the NPU, the .onnx beside it for the CPU backends.
+
+Usage:
+  python3 scripts/vision-bench.py decode [--density 0 0.001 0.01 0.05] [--conf 0.25] [--repeat 50]
+  python3 scripts/vision-bench.py nms [--conf 0.5 0.014 0.012 0.01] [--repeat 20]
+  python3 scripts/vision-bench.py quant [--density 0 0.001 0.01 0.05] [--conf 0.25] [--recording rec.npz]
+  python3 scripts/vision-bench.py scenarios [--frames 100] [--latency 0] [--recording rec.npz] [--native]
+                                            [--json out.json] [--budget scripts/vision-bench-budget.json]
+  python3 scripts/vision-bench.py backends [--model yolov5s.rknn] [--backend rknn onnxruntime opencv]
+                                           [--workers 1 2] [--threads N] [--frames 30]
+  python3 scripts/vision-bench.py startup [--repeat 5] [--budget scripts/vision-bench-budget.json]
+  python3 scripts/vision-bench.py record --out rec.npz [--camera /dev/video0] [--frames 30]   # on the board
+
+decode: one row per density with the candidate count and mean milliseconds
+per frame for the reference loop vs the vectorized decoder (candidate stage,
+then including NMS: the original class-agnostic loop vs batched_nms), plus
+the decode speedup. Exits 1 if the candidates ever differ.
+
+nms: per candidate count (crowd scene at decreasing thresholds), mean ms for
+the original class-agnostic loop + MAX_DETS cap vs class-aware batched_nms,
+and whether the class-agnostic batched_nms keeps exactly the same boxes.
+
+quant: int8 vs float post-processing. Outputs (synthetic per density, or a
+recording's frames) are quantized with per-tensor parameters fitted to
+their range and handed back in the NPU's native NHWC layout; each row shows
+the float path — dequantizing every element, as the runtime does by
+default, then decode_candidates — against decode_candidates_int8, plus the
+bytes each path reads. Exits 1 if the two ever disagree.
+
+scenarios: replays empty / single person / crowd / low-threshold scenes (or
+a recording) through FakeRKNN and a SyntheticCamera and prints p50/p90/p99
+milliseconds and frames/sec for each stage of the monitor loop. With
+--native the outputs are quantized up front and replayed as int8 NHWC
+tensors, so decode takes the quantized path (no runtime produces these; it
+shows what the int8 decoder would save). With --budget, exits 1 if any stage's p50 exceeds its
+budget, for CI.
+
+backends: loads the model on each backend (through load_backend, so
+what runs is what the monitor and yolo-detect would run) with each worker
+count (NPU cores for rknn) and prints the load time, single-inference
+p50/p90 milliseconds, and frames/sec with preprocess → infer → decode
+pipelined over synthetic frames. Backends that can't load on this host are
+listed with the reason.
+
+startup: runs yolo-detect.py's --help and early-failure paths in a fresh
+interpreter under `-X importtime` and prints median wall-clock and import
+milliseconds, plus the slowest top-level imports, next to a bare
+`import cv2, numpy` for reference. With --budget, exits 1 if a case's
+import time exceeds the budget file's "startup" entry.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from nanovision.decoder import (
+    MAX_DETS,
+    NativeOutputs,
+    batched_nms,
+    calibrate,
+    decode_candidates,
+    decode_candidates_int8,
+    decode_candidates_reference,
+    decode_outputs,
+    decode_outputs_reference,
+    dequantize_outputs,
+    nms,
+    quantize_outputs,
+    select_detections,
+    select_detections_reference,
+)
+from nanovision.synthetic import crowd_boxes, make_outputs, make_scene
+
+# ─── Timing helper ────────────────────────────────────────────────────────────
+def time_call(fn, repeat: int) -> float:
+    """Return mean wall time of fn() in milliseconds over `repeat` runs."""
+    fn()                                                    # warm caches
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000.0
+
+# ─── Benchmarks ───────────────────────────────────────────────────────────────
+def bench_decode(args: argparse.Namespace) -> None:
+    print(f"{'density':>8} {'cands':>7} {'dets':>5} "
+          f"{'loop ms':>9} {'vec ms':>8} {'speedup':>8} {'+nms loop':>10} {'+nms vec':>9}")
+    for density in args.density:
+        outputs = make_outputs(density, seed=1)
+        ref = decode_candidates_reference(outputs, 720, 1280, args.conf)
+        if not np.array_equal(ref, decode_candidates(outputs, 720, 1280, args.conf)):
+            sys.exit(f"decoder mismatch at density {density}")
+        cands = len(ref)
+        vec   = decode_outputs(outputs, 720, 1280, args.conf, args.nms)
+        t_ref = time_call(lambda: decode_candidates_reference(outputs, 720, 1280, args.conf), args.repeat)
+        t_vec = time_call(lambda: decode_candidates(outputs, 720, 1280, args.conf), args.repeat)
+        t_ref_all = time_call(lambda: decode_outputs_reference(outputs, 720, 1280, args.conf, args.nms), args.repeat)
+        t_vec_all = time_call(lambda: decode_outputs(outputs, 720, 1280, args.conf, args.nms), args.repeat)
+        print(f"{density:>8g} {cands:>7d} {len(vec):>5d} "
+              f"{t_ref:>9.2f} {t_vec:>8.2f} {t_ref / t_vec:>7.1f}x {t_ref_all:>10.2f} {t_vec_all:>9.2f}")
+
+def bench_nms(args: argparse.Namespace) -> None:
+    outputs = make_scene(crowd_boxes(30, seed=1), seed=1)
+    print(f"{'conf':>7} {'cands':>6} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'kept old/new':>13} {'agnostic ==':>12}")
+    for conf in args.conf:
+        cands = decode_candidates(outputs, 720, 1280, conf)
+        old = select_detections_reference(cands, args.nms)
+        new = select_detections(cands, args.nms)
+        # Same boxes as nms() when classes are ignored and nothing is cut by top-k.
+        same = (batched_nms(cands, cands[:, 4], args.nms, top_k=None, max_dets=MAX_DETS).tolist()
+                == nms(cands[:, :4], cands[:, 4], args.nms)[:MAX_DETS])
+        t_old = time_call(lambda: select_detections_reference(cands, args.nms), args.repeat)
+        t_new = time_call(lambda: select_detections(cands, args.nms), args.repeat)
+        print(f"{conf:>7g} {len(cands):>6d} {t_old:>8.2f} {t_new:>8.2f} {t_old / t_new:>7.1f}x "
+              f"{len(old):>6d}/{len(new):<6d} {str(same):>12}")
+
+def bench_quant(args: argparse.Namespace) -> None:
+    if args.recording:
+        from nanovision.recording import load_recording
+        rec = load_recording(args.recording)
+        cases = [(f"frame {i}", outputs) for i, outputs in enumerate(rec.outputs)]
+    else:
+        cases = [(f"{density:g}", make_outputs(density, seed=1)) for density in args.density]
+    print(f"{'input':>10} {'cands':>7} {'float MB':>9} {'int8 MB':>8} "
+          f"{'deq+dec ms':>11} {'dec ms':>7} {'int8 ms':>8} {'speedup':>8}")
+    for name, outputs in cases:
+        native = quantize_outputs(outputs, calibrate(outputs))
+        ref    = dequantize_outputs(native)
+        cands  = decode_candidates(ref, 720, 1280, args.conf)
+        if not np.array_equal(cands, decode_candidates_int8(native, native.quant, 720, 1280, args.conf)):
+            sys.exit(f"int8 decoder mismatch on {name}")
+        t_float = time_call(lambda: decode_candidates(dequantize_outputs(native), 720, 1280, args.conf), args.repeat)
+        t_dec   = time_call(lambda: decode_candidates(ref, 720, 1280, args.conf), args.repeat)
+        t_int8  = time_call(lambda: decode_candidates_int8(native, native.quant, 720, 1280, args.conf), args.repeat)
+        mb_float = sum(o.nbytes for o in ref) / 1e6
+        mb_int8  = sum(q.nbytes for q in native) / 1e6
+        print(f"{name:>10} {len(cands):>7d} {mb_float:>9.2f} {mb_int8:>8.2f} "
+              f"{t_float:>11.2f} {t_dec:>7.2f} {t_int8:>8.2f} {t_float / t_int8:>7.1f}x")
+
+# ─── Scenarios ────────────────────────────────────────────────────────────────
+STAGES = ("capture", "preprocess", "infer", "decode", "nms", "annotate", "encode")
+
+SCENARIOS = {                   # name: (objects in the scene, confidence threshold)
+    "empty":         (0,  0.5),
+    "single":        (1,  0.5),
+    "crowd":         (30, 0.5),
+    "low-threshold": (30, 0.014),      # ~1.7k candidates from background noise: NMS-heavy
+}
+
+def percentiles(samples_ms: list[float]) -> dict:
+    p50, p90, p99 = np.percentile(samples_ms, [50, 90, 99])
+    mean = float(np.mean(samples_ms))
+    return {"p50": round(float(p50), 3), "p90": round(float(p90), 3), "p99": round(float(p99), 3),
+            "fps": round(1000.0 / mean, 1) if mean > 0 else None}
+
+def run_scenario(frames: int, camera, runtime, conf: float, labels: list[str], quant=None) -> dict:
+    """Time each monitor-loop stage over `frames` frames; returns {stage: percentiles}.
+
+    With `quant` the runtime replays int8 NHWC tensors quantized with it.
+    """
+    import cv2
+    from nanovision.annotate import annotate
+    from nanovision.preprocess import Preprocessor
+
+    pre = Preprocessor()
+    samples: dict[str, list[float]] = {stage: [] for stage in (*STAGES, "total")}
+    for i in range(frames + 1):                             # frame 0 warms caches
+        t = [time.perf_counter()]
+        ok, frame = camera.read()
+        t.append(time.perf_counter())
+        inp, meta = pre(frame)
+        t.append(time.perf_counter())
+        outputs = runtime.inference([inp])
+        if quant is not None:
+            outputs = NativeOutputs(outputs, quant)
+        t.append(time.perf_counter())
+        img_h, img_w = frame.shape[:2]
+        cands = decode_candidates(outputs, img_h, img_w, conf, letterbox=meta)
+        t.append(time.perf_counter())
+        dets = select_detections(cands, 0.45)
+        t.append(time.perf_counter())
+        annotated = annotate(frame, dets, labels)
+        t.append(time.perf_counter())
+        cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        t.append(time.perf_counter())
+        if i == 0:
+            continue
+        for stage, start, end in zip(STAGES, t, t[1:]):
+            samples[stage].append((end - start) * 1000.0)
+        samples["total"].append((t[-1] - t[0]) * 1000.0)
+    return {stage: percentiles(ms) for stage, ms in samples.items()}
+
+def bench_scenarios(args: argparse.Namespace) -> None:
+    from nanovision.fake import FakeRKNN
+    from nanovision.synthetic import SyntheticCamera
+
+    labels = [f"class{i}" for i in range(80)]
+    labels[0] = "person"
+    if args.recording:
+        from nanovision.recording import load_recording
+        rec = load_recording(args.recording)
+
+        class ReplayCamera:
+            def __init__(self):
+                self.n = 0
+            def read(self):
+                frame = rec.frames[self.n % len(rec.frames)]
+                self.n += 1
+                return True, frame.copy()
+
+        plan = {os.path.basename(args.recording): (ReplayCamera(), rec.outputs, args.conf or 0.5)}
+    else:
+        plan = {}
+        for name, (objects, conf) in SCENARIOS.items():
+            outputs = make_scene(crowd_boxes(objects, seed=1), seed=1) if objects else make_outputs(0.0, seed=1)
+            plan[name] = (SyntheticCamera(objects=max(objects, 1), seed=1), [outputs], args.conf or conf)
+
+    results = {}
+    print(f"{'scenario':<14} {'stage':<11} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'fps':>8}")
+    for name, (camera, outputs, conf) in plan.items():
+        quant = calibrate(outputs[0]) if args.native else None
+        if quant is not None:
+            outputs = [list(quantize_outputs(outs, quant)) for outs in outputs]
+        runtime = FakeRKNN(outputs, latency=args.latency)
+        results[name] = run_scenario(args.frames, camera, runtime, conf, labels, quant)
+        for stage, r in results[name].items():
+            print(f"{name:<14} {stage:<11} {r['p50']:>8.3f} {r['p90']:>8.3f} {r['p99']:>8.3f} {r['fps'] or 0:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget:
+        with open(args.budget) as f:
+            budget = json.load(f)
+        over = [f"{name}/{stage}: p50 {results[name][stage]['p50']:.3f} ms > {limit} ms"
+                for name, stages in budget.items() if name in results
+                for stage, limit in stages.items() if results[name][stage]["p50"] > limit]
+        if over:
+            sys.exit("Performance budget exceeded:\n  " + "\n  ".join(over))
+        print("All stages within budget")
+
+# ─── Backends ─────────────────────────────────────────────────────────────────
+def bench_backends(args: argparse.Namespace) -> None:
+    from nanovision.backends import load_backend
+    from nanovision.engine import EngineError
+    from nanovision.preprocess import Preprocessor
+    from nanovision.synthetic import SyntheticCamera
+
+    camera = SyntheticCamera(objects=3, seed=1)
+    frames = [camera.read()[1] for _ in range(8)]
+    print(f"{'backend':<12} {'workers':>7} {'load ms':>8} {'p50 ms':>8} {'p90 ms':>8} {'infer fps':>9} "
+          f"{'e2e fps':>8}  pool")
+    for name in args.backend:
+        for workers in args.workers:
+            t0 = time.perf_counter()
+            try:
+                pool = load_backend(args.model, name, cores=workers, workers=workers, threads=args.threads)
+            except EngineError as e:
+                print(f"{name:<12} skipped: {e}")
+                break
+            load_ms = (time.perf_counter() - t0) * 1000.0
+            try:
+                inp, _ = Preprocessor()(frames[0])
+                pool.infer([inp])                           # warm up
+                latency = []
+                for _ in range(args.frames):
+                    t0 = time.perf_counter()
+                    pool.infer([inp])
+                    latency.append((time.perf_counter() - t0) * 1000.0)
+                lat = percentiles(latency)
+
+                # Throughput: keep every worker busy while frames are
+                # letterboxed ahead and decoded behind, as the monitor does.
+                pre = Preprocessor(buffers=2 * pool.size + 1)
+                metas = []
+
+                def inputs():
+                    for i in range(args.frames):
+                        inp, meta = pre(frames[i % len(frames)])
+                        metas.append(meta)
+                        yield [inp]
+
+                t0 = time.perf_counter()
+                for i, outputs in enumerate(pool.imap(inputs())):
+                    decode_candidates(outputs, *frames[0].shape[:2], 0.25, letterbox=metas[i])
+                e2e = args.frames / (time.perf_counter() - t0)
+                describe = pool.describe()
+            finally:
+                pool.release()
+            print(f"{name:<12} {workers:>7} {load_ms:>8.0f} {lat['p50']:>8.2f} {lat['p90']:>8.2f} "
+                  f"{lat['fps'] or 0:>9.1f} {e2e:>8.1f}  {describe}")
+
+# ─── Startup ──────────────────────────────────────────────────────────────────
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def startup_cases(labels_path: str) -> dict[str, list[str]]:
+    detect = os.path.join(SCRIPT_DIR, "yolo-detect.py")
+    return {
+        "help":           [detect, "--help"],
+        "missing-labels": [detect, "--image", "x.jpg", "--labels", "/nonexistent/labels.txt"],
+        "missing-model":  [detect, "--image", "x.jpg", "--labels", labels_path, "--model", "/nonexistent.rknn"],
+        "missing-image":  [detect, "--image", "/nonexistent.jpg", "--labels", labels_path,
+                           "--model", labels_path],
+        "cv2+numpy":      ["-c", "import cv2, numpy"],
+    }
+
+def parse_importtime(stderr: str) -> list[tuple[str, float]]:
+    """Top-level (name, cumulative ms) pairs from `-X importtime` output."""
+    top = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_us, cumulative, name = line.split("|")
+        # Nested imports are indented two spaces per level after "| ".
+        if cumulative.strip().isdigit() and not name.startswith("   "):
+            top.append((name.strip(), int(cumulative) / 1000.0))
+    return top
+
+def run_startup(argv: list[str], repeat: int) -> dict:
+    walls, imports, top = [], [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", *argv],
+                              capture_output=True, text=True, timeout=60)
+        walls.append((time.perf_counter() - t0) * 1000.0)
+        top = parse_importtime(proc.stderr)
+        imports.append(sum(ms for _, ms in top))
+    slowest = sorted(top, key=lambda item: -item[1])[:3]
+    return {"wall_ms": round(statistics.median(walls), 1), "import_ms": round(statistics.median(imports), 1),
+            "slowest": [f"{name} {ms:.0f}" for name, ms in slowest]}
+
+def bench_startup(args: argparse.Namespace) -> None:
+    with tempfile.NamedTemporaryFile("w", suffix=".txt") as labels:
+        labels.write("person\n")
+        labels.flush()
+        results = {name: run_startup(argv, args.repeat) for name, argv in startup_cases(labels.name).items()}
+
+    print(f"{'case':<15} {'wall ms':>8} {'import ms':>10}  slowest top-level imports (ms)")
+    for name, r in results.items():
+        print(f"{name:<15} {r['wall_ms']:>8.1f} {r['import_ms']:>10.1f}  {', '.join(r['slowest'])}")
+
+    if args.budget:
+        with open(args.budget) as f:
+            budget = json.load(f).get("startup", {})
+        over = [f"startup/{name}: imports {results[name]['import_ms']:.1f} ms > {limit} ms"
+                for name, limit in budget.items() if name in results and results[name]["import_ms"] > limit]
+        if over:
+            sys.exit("Startup budget exceeded:\n  " + "\n  ".join(over))
+        print("All startup cases within budget")
+
+# ─── Recorder ─────────────────────────────────────────────────────────────────
+def record(args: argparse.Namespace) -> None:
+    """Capture frames on the board and save them with their real RKNN outputs."""
+    from nanovision.capture import V4L2Camera
+    from nanovision.backends import load_backend
+    from nanovision.preprocess import Preprocessor
+    from nanovision.recording import save_recording
+
+    cap = V4L2Camera(args.camera, args.width, args.height, warmup=10)   # let auto-exposure settle
+    if not cap.isOpened():
+        sys.exit(f"Cannot open camera: {args.camera}")
+    pool = load_backend(args.model, "rknn", cores=1)
+    pre  = Preprocessor()
+    frames, outputs = [], []
+    try:
+        while len(frames) < args.frames:
+            ok, frame = cap.latest()
+            if not ok or frame is None:
+                sys.exit(f"Failed to capture frame from {args.camera}")
+            inp, _ = pre(frame)
+            outputs.append([np.array(o, copy=True) for o in pool.infer([inp])])
+            frames.append(frame)
+            print(f"\rrecorded {len(frames)}/{args.frames}", end="", file=sys.stderr)
+            time.sleep(args.interval)
+    finally:
+        cap.release()
+        pool.release()
+    print(file=sys.stderr)
+    save_recording(args.out, frames, outputs)
+    print(f"Saved {len(frames)} frames to {args.out}")
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NanoClaw vision microbenchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("decode", help="Reference loop vs vectorized decode_outputs")
+    p.add_argument("--density", type=float, nargs="+", default=[0.0, 0.001, 0.01, 0.05],
+                   help="Fraction of grid cells that fire")
+    p.add_argument("--conf",    type=float, default=0.25, help="Confidence threshold")
+    p.add_argument("--nms",     type=float, default=0.45, help="NMS IoU threshold")
+    p.add_argument("--repeat",  type=int,   default=50,   help="Timed iterations per scenario")
+    p.set_defaults(func=bench_decode)
+
+    p = sub.add_parser("nms", help="Original NMS loop vs class-aware batched_nms")
+    p.add_argument("--conf",   type=float, nargs="+", default=[0.5, 0.014, 0.012, 0.01],
+                   help="Thresholds on the crowd scene (lower → more candidates)")
+    p.add_argument("--nms",    type=float, default=0.45, help="NMS IoU threshold")
+    p.add_argument("--repeat", type=int,   default=20,   help="Timed iterations per threshold")
+    p.set_defaults(func=bench_nms)
+
+    p = sub.add_parser("quant", help="Float vs native int8 output decoding")
+    p.add_argument("--density",   type=float, nargs="+", default=[0.0, 0.001, 0.01, 0.05],
+                   help="Fraction of grid cells that fire")
+    p.add_argument("--conf",      type=float, default=0.25, help="Confidence threshold")
+    p.add_argument("--repeat",    type=int,   default=50,   help="Timed iterations per input")
+    p.add_argument("--recording", help="Use this .npz's real outputs instead of synthetic ones")
+    p.set_defaults(func=bench_quant)
+
+    p = sub.add_parser("scenarios", help="Per-stage latency of the monitor loop on replayed scenes")
+    p.add_argument("--frames",    type=int,   default=100, help="Timed frames per scenario")
+    p.add_argument("--latency",   type=float, default=0.0, help="Simulated NPU latency per inference (s)")
+    p.add_argument("--conf",      type=float, help="Override every scenario's confidence threshold")
+    p.add_argument("--recording", help="Replay this .npz (from `record`) instead of the synthetic scenes")
+    p.add_argument("--native",    action="store_true", help="Decode native int8 NHWC outputs")
+    p.add_argument("--json",      help="Also write the results to this file")
+    p.add_argument("--budget",    help="JSON {scenario: {stage: max p50 ms}}; exit 1 if exceeded")
+    p.set_defaults(func=bench_scenarios)
+
+    p = sub.add_parser("backends", help="Load time, latency and throughput of each inference backend")
+    p.add_argument("--model",   default="/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/yolov5s.rknn",
+                   help="Model path; CPU backends load the .onnx beside it")
+    p.add_argument("--backend", nargs="+", default=["rknn", "onnxruntime", "opencv"],
+                   help="Backends to compare")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2],
+                   help="Concurrent inferences (NPU cores for rknn)")
+    p.add_argument("--threads", type=int, help="CPU backend threads (default: every CPU)")
+    p.add_argument("--frames",  type=int, default=30, help="Timed frames per row")
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("startup", help="Import and wall time of yolo-detect.py's fast paths")
+    p.add_argument("--repeat", type=int, default=5, help="Runs per case (median reported)")
+    p.add_argument("--budget", help="JSON with {\"startup\": {case: max import ms}}; exit 1 if exceeded")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("record", help="Record camera frames + real RKNN outputs (board only)")
+    p.add_argument("--out",      required=True, help="Output .npz path")
+    p.add_argument("--camera",   default="/dev/video0", help="Camera device or video file")
+    p.add_argument("--model",    default="/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/yolov5s.rknn")
+    p.add_argument("--frames",   type=int,   default=30,   help="Frames to record")
+    p.add_argument("--interval", type=float, default=0.5,  help="Seconds between frames")
+    p.add_argument("--width",    type=int,   default=1280, help="Capture width")
+    p.add_argument("--height",   type=int,   default=720,  help="Capture height")
+    p.set_defaults(func=record)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
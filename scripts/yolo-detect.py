@@ -5,9 +5,32 @@ yolo-detect.py — Single-frame YOLO object detection for NanoClaw IPC.
 Uses the YOLOv5s RKNN model on the Radxa NPU. Accepts either a camera device
 or a pre-captured image, runs inference, and outputs structured JSON.
 
+--backend picks where inference runs (nanovision.backends): "auto" (the
+default) uses the NPU when rknnlite and the .rknn model load, and otherwise
+runs the ONNX export next to it (yolov5s.onnx) on the CPU with ONNX Runtime
+or OpenCV DNN, on --threads threads; "rknn", "onnxruntime" and "opencv"
+force one. Results are the same JSON either way.
+
 Usage:
-  python3 yolo-detect.py --image /tmp/photo.jpg [--conf 0.5] [--annotate /tmp/annotated.jpg]
+  python3 yolo-detect.py --image /tmp/photo.jpg [--conf 0.5] [--annotate /tmp/annotated.jpg] [--cache-dir DIR]
   python3 yolo-detect.py --camera /dev/video0  [--conf 0.5] [--annotate /tmp/annotated.jpg]
+  python3 yolo-detect.py --serve /tmp/nanoclaw-yolo.sock
+  python3 yolo-detect.py --images '/data/snapshots/*.jpg' [--annotate-dir /tmp/out]
+
+Server mode loads the model once and answers one JSON request per line on a
+Unix socket (see serve()); each response line uses the output schema below.
+
+Results for image inputs are cached by content (nanovision.cache): the
+server keeps an in-memory LRU (--cache-size entries, 0 to disable), and
+with --cache-dir both the server and one-shot runs also persist entries
+there, so asking about the same snapshot again — even with another --conf
+or --nms — skips inference, and a one-shot hit skips loading the model.
+Results answered from the cache carry "cached": true.
+
+Batch mode (--images takes a glob, a directory or a file listing one path
+per line) loads the model once and prints one JSON line per image, in input
+order, with an extra "image" key, followed by a final
+{"success": true, "summary": {...}} line with throughput (see run_batch()).
 
 Output (stdout, JSON):
   {
@@ -17,7 +40,8 @@ Output (stdout, JSON):
       ...
     ],
     "count": 2,
-    "annotated_image": "/tmp/annotated.jpg"   // null if --annotate not given
+    "annotated_image": "/tmp/annotated.jpg",  // null if --annotate not given
+    "cached": false                           // image inputs only
   }
 
 On failure:
@@ -25,137 +49,493 @@ On failure:
 
 Dependencies (must be installed on host, NOT inside container):
   pip3 install rknn-toolkit-lite2 opencv-python-headless numpy
+  pip3 install onnxruntime        # optional, faster CPU fallback than OpenCV DNN
 """
 
+from __future__ import annotations
+
 import argparse
+import collections
+import contextlib
+import glob
 import json
 import os
+import queue
 import sys
-
-import cv2
-import numpy as np
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator
+
+# Only standard-library modules load up front: cv2 and NumPy (and the
+# nanovision modules built on them) cost far more than the rest of a failed
+# or --help run, so each function imports them when it first needs them.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nanovision.backends import BACKENDS, find_model
+from nanovision.engine import DEFAULT_CORES, EngineError, InferencePool
+from nanovision.labels import label_name, load_labels
+
+if TYPE_CHECKING:
+    import numpy as np
+    from nanovision.cache import ResultCache
+    from nanovision.preprocess import Letterbox, Preprocessor
 
 # ─── Model paths ──────────────────────────────────────────────────────────────
 SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
 # Default model location (the one already present on the board)
 DEFAULT_MODEL  = "/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/yolov5s.rknn"
 DEFAULT_LABELS = "/home/radxa/YOLO-Test/rk3576_rknn_yolov5_demo/coco_labels.txt"
+CACHE_SIZE     = 256    # server's in-memory result cache, entries
 
-# ─── YOLOv5 constants ─────────────────────────────────────────────────────────
-MODEL_INPUT  = 640
-NUM_CLASSES  = 80
-MAX_DETS     = 50
-
-ANCHORS = [
-    [(10, 13), (16, 30),  (33, 23)],       # P3 / stride 8
-    [(30, 61), (62, 45),  (59, 119)],      # P4 / stride 16
-    [(116, 90),(156, 198),(373, 326)],     # P5 / stride 32
-]
-STRIDES = [8, 16, 32]
-
-# ─── Helper: load labels ──────────────────────────────────────────────────────
-def load_labels(path: str) -> list[str]:
-    with open(path) as f:
-        return [ln.strip() for ln in f if ln.strip()]
-
-# ─── Helper: NMS ──────────────────────────────────────────────────────────────
-def nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float) -> list[int]:
-    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
-    areas  = (x2 - x1) * (y2 - y1)
-    order  = scores.argsort()[::-1]
-    keep: list[int] = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(int(i))
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
-        iou   = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
-        order = order[np.where(iou <= iou_thresh)[0] + 1]
-    return keep
-
-# ─── Helper: decode RKNN outputs ──────────────────────────────────────────────
-def decode_outputs(
-    outputs: list,
-    img_h: int,
-    img_w: int,
-    conf_thresh: float,
-    nms_thresh: float,
-) -> np.ndarray:
-    """Return (N, 6) array: [x1, y1, x2, y2, confidence, class_id]"""
-    all_boxes: list = []
-
-    for head_idx, feat in enumerate(outputs):
-        feat = feat[0]                                      # (255, H, W)
-        gh, gw = feat.shape[1], feat.shape[2]
-        feat = feat.reshape(3, NUM_CLASSES + 5, gh, gw).transpose(0, 2, 3, 1)  # (3,H,W,85)
-
-        stride  = STRIDES[head_idx]
-        anchors = ANCHORS[head_idx]
-
-        for a_idx in range(3):
-            data    = feat[a_idx]                           # (H, W, 85)
-            box_xy  = data[..., :2]                         # already sigmoid
-            box_wh  = data[..., 2:4]
-            obj_conf= data[..., 4]                          # (H, W)
-            cls_conf= data[..., 5:]                         # (H, W, 80)
-
-            if obj_conf.max() < conf_thresh:
-                continue
+# ─── Helper: RKNN runtime ─────────────────────────────────────────────────────
+class DetectError(Exception):
+    """Failure reported to the caller as {"success": false, "error": ...}."""
 
-            scores       = obj_conf[..., None] * cls_conf  # (H, W, 80)
-            max_scores   = scores.max(axis=-1)              # (H, W)
-            mask         = max_scores > conf_thresh
-            if not mask.any():
-                continue
-
-            ys, xs = np.where(mask)
-            for y, x in zip(ys, xs):
-                bx = (box_xy[y, x, 0] * 2.0 - 0.5 + x) * stride
-                by = (box_xy[y, x, 1] * 2.0 - 0.5 + y) * stride
-                bw = (box_wh[y, x, 0] * 2.0) ** 2 * anchors[a_idx][0]
-                bh = (box_wh[y, x, 1] * 2.0) ** 2 * anchors[a_idx][1]
+@contextlib.contextmanager
+def quiet_stdout():
+    """Send RKNN C-library log lines that pollute stdout to /dev/null."""
+    devnull_fd = os.open(os.devnull, os.O_WRONLY)
+    old_stdout_fd = os.dup(1)
+    sys.stdout.flush()
+    os.dup2(devnull_fd, 1)
+    try:
+        yield
+    finally:
+        os.dup2(old_stdout_fd, 1)
+        os.close(devnull_fd)
+        os.close(old_stdout_fd)
 
-                x1 = (bx - bw / 2) / MODEL_INPUT * img_w
-                y1 = (by - bh / 2) / MODEL_INPUT * img_h
-                x2 = (bx + bw / 2) / MODEL_INPUT * img_w
-                y2 = (by + bh / 2) / MODEL_INPUT * img_h
+def load_pool(model_path: str, cores: int, backend: str = "auto", threads: int | None = None) -> InferencePool:
+    """Load the model on `backend`: `cores` NPU cores, or `threads` CPU threads
+    (see nanovision.backends)."""
+    from nanovision.backends import load_backend
+    try:
+        return load_backend(model_path, backend, cores=cores, threads=threads)
+    except EngineError as e:
+        raise DetectError(str(e))
 
-                conf   = float(max_scores[y, x])
-                cls_id = int(scores[y, x].argmax())
-                all_boxes.append([x1, y1, x2, y2, conf, cls_id])
+def run_inference(pool: InferencePool, pre: Preprocessor, frame: np.ndarray) -> tuple[list, Letterbox]:
+    inp, meta = pre(frame)                  # (1, 640, 640, 3) letterboxed RGB
+    try:
+        return pool.infer([inp]), meta
+    except RuntimeError as e:
+        raise DetectError(str(e))
 
-    if not all_boxes:
-        return np.empty((0, 6), dtype=np.float32)
+def decode_frame(frame: np.ndarray, outputs: list, letterbox: Letterbox | None, conf: float) -> np.ndarray:
+    """Pre-NMS candidates above `conf`, in frame coordinates."""
+    from nanovision.decoder import decode_candidates
+    img_h, img_w = frame.shape[:2]
+    return decode_candidates(outputs, img_h, img_w, conf, letterbox=letterbox)
+
+def build_result(
+    frame: np.ndarray | None,
+    candidates: np.ndarray,
+    labels: list[str],
+    conf: float,
+    nms: float,
+    annotate_path: str | None,
+    jpeg: dict | None = None,
+) -> dict:
+    """Threshold + NMS the candidates and return the JSON result object
+    (see module docstring). `candidates` may come from a lower threshold
+    than `conf`, e.g. from the result cache; `frame` is only needed to
+    annotate.
+
+    With `jpeg` ({"quality": ..., "max_side": ...}, either optional) the
+    annotated image is also returned inline as base64 "image_b64".
+    """
+    import cv2
+    from nanovision.annotate import annotate
+    from nanovision.decoder import select_detections
+
+    dets = select_detections(candidates[candidates[:, 4] > conf], nms)
 
-    boxes = np.array(all_boxes, dtype=np.float32)
-    keep  = nms(boxes[:, :4], boxes[:, 4], nms_thresh)
-    result = boxes[keep]
+    detection_list = []
+    for det in dets:
+        x1, y1, x2, y2, conf_, cls_id = det
+        detection_list.append({
+            "label":      label_name(labels, cls_id),
+            "confidence": round(float(conf_), 4),
+            "bbox":       [round(float(x1), 1), round(float(y1), 1),
+                           round(float(x2), 1), round(float(y2), 1)],
+        })
 
-    if len(result) > MAX_DETS:
-        result = result[:MAX_DETS]
+    annotated = annotate(frame, dets, labels) if annotate_path or jpeg is not None else None
+    if annotate_path:
+        cv2.imwrite(annotate_path, annotated, [cv2.IMWRITE_JPEG_QUALITY, 92])
 
+    result = {
+        "success":          True,
+        "count":            len(detection_list),
+        "detections":       detection_list,
+        "annotated_image":  annotate_path or None,
+    }
+    if jpeg is not None:
+        import base64
+        from nanovision.handoff import encode_jpeg
+        result["image_b64"] = base64.b64encode(encode_jpeg(annotated, **jpeg)).decode()
     return result
 
-# ─── Helper: annotate image ───────────────────────────────────────────────────
-def annotate(frame: np.ndarray, detections: np.ndarray, labels: list[str]) -> np.ndarray:
-    out = frame.copy()
-    for det in detections:
-        x1, y1, x2, y2, conf, cls_id = det
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-        cls_id = int(cls_id)
-        label  = labels[cls_id] if cls_id < len(labels) else str(cls_id)
-        text   = f"{label} {conf:.2f}"
-
-        cv2.rectangle(out, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-        ty = max(y1 - 4, th + 4)
-        cv2.rectangle(out, (x1, ty - th - 4), (x1 + tw, ty), (0, 255, 0), -1)
-        cv2.putText(out, text, (x1, ty - 2),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-    return out
+def read_image(path: str) -> np.ndarray:
+    return decode_image_bytes(read_image_bytes(path), path)
+
+def read_image_bytes(path: str) -> bytes:
+    if not os.path.exists(path):
+        raise DetectError(f"Image file not found: {path}")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        raise DetectError(f"Could not read image: {path}: {e.strerror}")
+
+def capture_frame(device: str, width: int, height: int, warmup: int = 3) -> np.ndarray:
+    """Grab one frame, discarding `warmup` frames first to let auto-exposure settle.
+
+    Warm-up frames are grabbed without decoding, and the returned one is the
+    newest the driver holds (see nanovision.capture).
+    """
+    from nanovision.capture import V4L2Camera
+    cap = V4L2Camera(device, width, height, warmup=warmup)
+    try:
+        if not cap.isOpened():
+            raise DetectError(f"Cannot open camera: {device}")
+        ret, frame = cap.latest()
+    finally:
+        cap.release()
+    if not ret or frame is None:
+        raise DetectError(f"Failed to capture frame from {device}")
+    return frame
+
+def decode_image_bytes(data: bytes, source: str | None = None) -> np.ndarray:
+    import cv2
+    import numpy as np
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise DetectError(f"Could not read image: {source}" if source else "Could not decode image bytes")
+    return frame
+
+def open_cache(size: int, directory: str | None) -> ResultCache | None:
+    if size <= 0 and not directory:
+        return None
+    from nanovision.cache import ResultCache
+    return ResultCache(max_entries=max(size, 0), directory=directory)
+
+def detect_image(
+    data: bytes,
+    cache: ResultCache | None,
+    model: str,
+    conf: float,
+    infer,
+    need_frame: bool,
+) -> tuple[np.ndarray, np.ndarray | None, bool]:
+    """Candidates for the encoded image `data`, from `cache` when possible.
+
+    `model` is nanovision.cache.model_id() of the model expected to run;
+    `infer(frame)` returns (outputs, letterbox, model_id of the model that
+    did run) and is only called on a miss. Results are stored under the
+    model that ran, so a backend fallback never answers for the preferred
+    one. The image is decoded on a miss or if `need_frame`. Returns
+    (candidates at some threshold <= conf, frame or None, whether it was a
+    hit).
+    """
+    from nanovision.cache import CACHE_FLOOR, cache_key
+    from nanovision.decoder import MODEL_INPUT
+
+    key = cache_key(data, model, input=MODEL_INPUT) if cache is not None else None
+    candidates = cache.get(key, conf) if cache is not None else None
+    frame = decode_image_bytes(data) if candidates is None or need_frame else None
+    if candidates is not None:
+        return candidates, frame, True
+    # Decode down to the cache floor so a later, lower --conf still hits.
+    floor = min(conf, CACHE_FLOOR) if cache is not None else conf
+    outputs, meta, ran = infer(frame)
+    candidates = decode_frame(frame, outputs, meta, floor)
+    if cache is not None:
+        cache.put(cache_key(data, ran, input=MODEL_INPUT), candidates, floor)
+    return candidates, frame, False
+
+# ─── Batch mode ───────────────────────────────────────────────────────────────
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+def iter_image_paths(spec: str) -> Iterator[str]:
+    """Expand --images: a directory, a list file (one path per line) or a glob."""
+    if os.path.isdir(spec):
+        for name in sorted(os.listdir(spec)):
+            if name.lower().endswith(IMAGE_EXTS):
+                yield os.path.join(spec, name)
+    elif os.path.isfile(spec) and not spec.lower().endswith(IMAGE_EXTS):
+        with open(spec) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+    else:
+        paths = sorted(glob.glob(spec, recursive=True))
+        if not paths:
+            raise DetectError(f"No images match: {spec}")
+        yield from paths
+
+def _done(result: dict) -> Future:
+    """A completed Future holding `result`, so inline and threaded results share a queue."""
+    fut: Future = Future()
+    fut.set_result(result)
+    return fut
+
+def run_batch(
+    spec: str,
+    model_path: str,
+    labels: list[str],
+    cores: int,
+    conf: float,
+    nms: float,
+    annotate_dir: str | None,
+    workers: int,
+    backend: str = "auto",
+    threads: int | None = None,
+) -> None:
+    """Detect on every image in `spec`, streaming one JSON line per image.
+
+    Three stages overlap: `workers` threads read and letterbox images ahead
+    of the NPU or CPU backend, the pool keeps every core busy, and (with
+    `annotate_dir`) decode + annotate + JPEG write run back on the worker
+    threads. Each stage has a bounded window, so memory stays flat however
+    many images are given. A file that fails yields a {"success": false}
+    line and the batch carries on.
+    """
+    if annotate_dir:
+        os.makedirs(annotate_dir, exist_ok=True)
+
+    # JSON lines go to the real stdout; runtime log noise goes to stderr.
+    sys.stdout.flush()
+    stdout_fd = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with os.fdopen(os.dup(stdout_fd), "w", buffering=1) as out:
+            _run_batch(out, spec, model_path, labels, cores, conf, nms, annotate_dir, workers,
+                       backend, threads)
+    finally:
+        sys.stdout.flush()
+        os.dup2(stdout_fd, 1)
+        os.close(stdout_fd)
+
+def _run_batch(out, spec, model_path, labels, cores, conf, nms, annotate_dir, workers,
+               backend, threads) -> None:
+    from nanovision.preprocess import Preprocessor
+
+    paths = iter_image_paths(spec)
+    pool  = load_pool(model_path, cores, backend, threads)
+
+    infer_window = 2 * pool.size
+    read_window  = 2 * workers
+    # One input buffer per image that can be between read and inference result.
+    free: queue.Queue = queue.Queue()
+    for _ in range(read_window + infer_window + 1):
+        free.put(Preprocessor())
+
+    def load(path: str):
+        frame = read_image(path)
+        pre   = free.get()
+        try:
+            inp, meta = pre(frame)
+        except Exception:
+            free.put(pre)
+            raise
+        return frame, inp, meta, pre
+
+    def finish(path: str, frame: np.ndarray, outputs: list, meta: Letterbox) -> dict:
+        annotate_path = os.path.join(annotate_dir, os.path.basename(path)) if annotate_dir else None
+        return build_result(frame, decode_frame(frame, outputs, meta, conf), labels, conf, nms, annotate_path)
+
+    counts = collections.Counter()
+
+    def emit(path: str, result: dict) -> None:
+        counts["ok" if result.get("success") else "failed"] += 1
+        out.write(json.dumps({"image": path, **result}) + "\n")
+
+    def error(e: Exception) -> dict:
+        if isinstance(e, DetectError):
+            return {"success": False, "error": str(e)}
+        return {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+    reading:   collections.deque = collections.deque()   # (path, Future[load])
+    inferring: collections.deque = collections.deque()   # (path, frame, meta, pre, Future[outputs])
+    writing:   collections.deque = collections.deque()   # (path, Future[result])
+
+    def drain_writes(limit: int) -> None:
+        while len(writing) > limit:
+            path, fut = writing.popleft()
+            try:
+                emit(path, fut.result())
+            except Exception as e:
+                emit(path, error(e))
+
+    def drain_inference(limit: int) -> None:
+        while len(inferring) > limit:
+            path, frame, meta, pre, fut = inferring.popleft()
+            try:
+                outputs = fut.result()
+            except Exception as e:
+                writing.append((path, _done(error(e))))
+                continue
+            finally:
+                free.put(pre)
+            if annotate_dir:
+                writing.append((path, executor.submit(finish, path, frame, outputs, meta)))
+            else:
+                try:
+                    writing.append((path, _done(finish(path, frame, outputs, meta))))
+                except Exception as e:
+                    writing.append((path, _done(error(e))))
+            drain_writes(read_window)
+
+    def drain_reads(limit: int) -> None:
+        while len(reading) > limit:
+            path, fut = reading.popleft()
+            try:
+                frame, inp, meta, pre = fut.result()
+            except Exception as e:
+                drain_inference(0)              # keep output in input order
+                writing.append((path, _done(error(e))))
+                drain_writes(read_window)
+                continue
+            inferring.append((path, frame, meta, pre, pool.submit([inp])))
+            drain_inference(infer_window)
+
+    npu   = pool.describe()
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-io") as executor:
+            for path in paths:
+                reading.append((path, executor.submit(load, path)))
+                drain_reads(read_window)
+            drain_reads(0)
+            drain_inference(0)
+            drain_writes(0)
+    finally:
+        pool.release()
+
+    elapsed = time.monotonic() - start
+    total   = counts["ok"] + counts["failed"]
+    summary = {
+        "images":         total,
+        "succeeded":      counts["ok"],
+        "failed":         counts["failed"],
+        "seconds":        round(elapsed, 3),
+        "images_per_sec": round(total / elapsed, 2) if elapsed > 0 else None,
+        "npu":            npu,
+    }
+    out.write(json.dumps({"success": True, "summary": summary}) + "\n")
+
+# ─── Server mode ──────────────────────────────────────────────────────────────
+def serve(socket_path: str, model_path: str, labels: list[str], cores: int,
+          cache: ResultCache | None = None, backend: str = "auto", threads: int | None = None) -> None:
+    """Keep the model loaded and answer JSON-lines requests on a Unix socket.
+
+    Request (one line):  {"image": "/tmp/a.jpg" | "image_b64": "<base64>" | "camera": "/dev/video0",
+                          "conf": 0.5, "nms": 0.45, "annotate": "/tmp/out.jpg",
+                          "return_image": false, "quality": 80, "max_side": 1280}
+                         {"op": "ping"} | {"op": "stats"}
+    Response (one line): the same JSON object the one-shot CLI prints, plus
+                         "image_b64" (the annotated JPEG, encoded once at
+                         quality / max_side) if return_image is set.
+                         "stats" answers {"success": true, "cache": {...}}.
+
+    "image" and "image_b64" results go through `cache` (if any), keyed by
+    the encoded bytes, so repeated questions about one snapshot skip inference.
+
+    "camera" captures straight into memory (optional "width", "height" and
+    "warmup" frames), so a capture-and-detect request writes no files.
+
+    Connections are handled on separate threads and share one inference
+    pool from load_pool: `cores` NPU cores, or CPU workers when the backend
+    falls back (see nanovision.backends).
+    """
+    import base64
+    import signal
+    import socketserver
+    import threading
+
+    from nanovision.cache import model_id
+    from nanovision.preprocess import Preprocessor
+
+    # The socket carries the protocol, so runtime log noise can go to the log.
+    os.dup2(2, 1)
+    pool  = load_pool(model_path, cores, backend, threads)
+    model = model_id(pool.model)            # what actually loaded, not just the first file found
+    # Preprocessor input buffers are reused, so each handler thread owns one.
+    local = threading.local()
+
+    def infer(frame: np.ndarray) -> tuple[list, Letterbox, str]:
+        if not hasattr(local, "pre"):
+            local.pre = Preprocessor()
+        return (*run_inference(pool, local.pre, frame), model)
+
+    def handle(req: dict) -> dict:
+        if req.get("op") == "ping":
+            return {"success": True, "op": "ping"}
+        if req.get("op") == "stats":
+            return {"success": True, "op": "stats", "cache": cache.stats() if cache is not None else None}
+        conf = float(req.get("conf", 0.5))
+        jpeg = ({key: int(req[key]) for key in ("quality", "max_side") if key in req}
+                if req.get("return_image") else None)
+        if "image_b64" in req or "image" in req:
+            data = (base64.b64decode(req["image_b64"]) if "image_b64" in req
+                    else read_image_bytes(req["image"]))
+            need_frame = bool(req.get("annotate")) or jpeg is not None
+            candidates, frame, cached = detect_image(data, cache, model, conf, infer, need_frame)
+        elif "camera" in req:
+            frame = capture_frame(str(req["camera"]), int(req.get("width", 1280)),
+                                  int(req.get("height", 720)), int(req.get("warmup", 3)))
+            candidates, cached = decode_frame(frame, *infer(frame)[:2], conf), None
+        else:
+            raise DetectError("Request needs 'image', 'image_b64' or 'camera'")
+        result = build_result(frame, candidates, labels, conf, float(req.get("nms", 0.45)),
+                              req.get("annotate"), jpeg)
+        if cached is not None:
+            result["cached"] = cached
+        return result
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    result = handle(json.loads(line))
+                except DetectError as e:
+                    result = {"success": False, "error": str(e)}
+                except (ValueError, TypeError) as e:
+                    result = {"success": False, "error": f"Bad request: {e}"}
+                except Exception as e:  # keep serving after unexpected cv2/runtime errors
+                    result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write((json.dumps(result) + "\n").encode())
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = Server(socket_path, Handler)
+    os.chmod(socket_path, 0o600)
+
+    def handle_signal(sig, _frame):
+        print(f"[yolo-server] Signal {sig} received, shutting down", file=sys.stderr)
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    print(f"[yolo-server] Model loaded {pool.describe()}, listening on {socket_path}"
+          + (f", result cache {cache.max_entries} entries" if cache is not None else ""), file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        pool.release()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        print("[yolo-server] Stopped", file=sys.stderr)
 
 # ─── Main ─────────────────────────────────────────────────────────────────────
 def main() -> None:
@@ -163,13 +543,28 @@ def main() -> None:
     src = parser.add_mutually_exclusive_group(required=True)
     src.add_argument("--image",  help="Path to input JPEG/PNG")
     src.add_argument("--camera", help="Camera device (e.g. /dev/video0)")
-    parser.add_argument("--model",    default=DEFAULT_MODEL,  help="Path to .rknn model")
+    src.add_argument("--serve",  metavar="SOCKET", help="Keep the model loaded and serve requests on this Unix socket")
+    src.add_argument("--images", metavar="SPEC", help="Batch mode: glob, directory or list file of images")
+    parser.add_argument("--model",    default=DEFAULT_MODEL,
+                        help="Path to the .rknn model; CPU backends load the .onnx beside it")
     parser.add_argument("--labels",   default=DEFAULT_LABELS, help="Path to labels file")
     parser.add_argument("--conf",     type=float, default=0.5, help="Confidence threshold")
     parser.add_argument("--nms",      type=float, default=0.45, help="NMS IoU threshold")
     parser.add_argument("--annotate", help="Save annotated image to this path")
     parser.add_argument("--width",    type=int, default=1280, help="Camera capture width")
     parser.add_argument("--height",   type=int, default=720,  help="Camera capture height")
+    parser.add_argument("--warmup",   type=int, default=3, help="Camera frames discarded before capture")
+    parser.add_argument("--annotate-dir", help="In --images mode, save annotated copies here")
+    parser.add_argument("--workers",  type=int, default=min(4, os.cpu_count() or 1),
+                        help="Image read/annotate threads in --images mode")
+    parser.add_argument("--npu-cores", type=int, default=DEFAULT_CORES,
+                        help="NPU cores to load the model on in --serve/--images mode")
+    parser.add_argument("--backend",  choices=("auto", *BACKENDS), default="auto",
+                        help="Inference backend (auto: NPU if available, else CPU)")
+    parser.add_argument("--threads",  type=int, help="CPU backend threads (default: every CPU)")
+    parser.add_argument("--cache-dir", help="Persist image results here (one-shot --image and --serve)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="In-memory result cache entries in --serve mode (0 disables)")
     args = parser.parse_args()
 
     def fail(msg: str) -> None:
@@ -180,102 +575,61 @@ def main() -> None:
     if not os.path.exists(args.labels):
         fail(f"Labels file not found: {args.labels}")
     labels = load_labels(args.labels)
-
-    # ── Capture frame ─────────────────────────────────────────────────
-    if args.image:
-        if not os.path.exists(args.image):
-            fail(f"Image file not found: {args.image}")
-        frame = cv2.imread(args.image)
-        if frame is None:
-            fail(f"Could not read image: {args.image}")
-    else:
-        cap = cv2.VideoCapture(args.camera)
-        if not cap.isOpened():
-            fail(f"Cannot open camera: {args.camera}")
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH,  args.width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
-        # Discard a few frames to let auto-exposure settle
-        for _ in range(3):
-            cap.read()
-        ret, frame = cap.read()
-        cap.release()
-        if not ret or frame is None:
-            fail(f"Failed to capture frame from {args.camera}")
-
-    img_h, img_w = frame.shape[:2]
-
-    # ── Load RKNN model ───────────────────────────────────────────────
-    if not os.path.exists(args.model):
-        fail(f"RKNN model not found: {args.model}")
+    # Checked before anything imports cv2 or opens a camera.
+    model_file = find_model(args.model, args.backend)
+    if model_file is None:
+        fail(f"Model not found: {args.model}")
+
+    if args.serve:
+        try:
+            serve(args.serve, args.model, labels, args.npu_cores,
+                  open_cache(args.cache_size, args.cache_dir), args.backend, args.threads)
+        except DetectError as e:
+            fail(str(e))
+        return
+
+    if args.images:
+        try:
+            run_batch(args.images, args.model, labels, args.npu_cores,
+                      args.conf, args.nms, args.annotate_dir, max(1, args.workers),
+                      args.backend, args.threads)
+        except DetectError as e:
+            fail(str(e))
+        return
+
+    def infer(frame: np.ndarray) -> tuple[list, Letterbox, str]:
+        # Only reached on a cache miss, so a hit never loads the model.
+        from nanovision.cache import model_id
+        from nanovision.preprocess import Preprocessor
+        with quiet_stdout():
+            pool = load_pool(args.model, 1, args.backend, args.threads)
+            try:
+                return (*run_inference(pool, Preprocessor(), frame), model_id(pool.model))
+            finally:
+                pool.release()
 
     try:
-        from rknnlite.api import RKNNLite
-    except ImportError:
-        fail("rknnlite not installed. Run: pip3 install rknn-toolkit-lite2")
+        # ── Capture / cache lookup + inference ────────────────────────
+        cached = None
+        if args.image:
+            data = read_image_bytes(args.image)
+            cache, model = None, ""
+            if args.cache_dir:
+                from nanovision.cache import model_id
+                cache, model = open_cache(0, args.cache_dir), model_id(model_file)
+            candidates, frame, cached = detect_image(data, cache, model, args.conf, infer,
+                                                     need_frame=bool(args.annotate))
+        else:
+            frame = capture_frame(args.camera, args.width, args.height, args.warmup)
+            candidates = decode_frame(frame, *infer(frame)[:2], args.conf)
+
+        # ── Post-process, annotate, build JSON ────────────────────────
+        result = build_result(frame, candidates, labels, args.conf, args.nms, args.annotate)
+        if cached is not None:
+            result["cached"] = cached
+    except DetectError as e:
+        fail(str(e))
 
-    # Suppress RKNN C-library log lines that pollute stdout
-    devnull_fd = os.open(os.devnull, os.O_WRONLY)
-    old_stdout_fd = os.dup(1)
-    os.dup2(devnull_fd, 1)
-
-    rknn = RKNNLite()
-    ret  = rknn.load_rknn(args.model)
-    if ret != 0:
-        os.dup2(old_stdout_fd, 1)
-        os.close(devnull_fd)
-        os.close(old_stdout_fd)
-        fail(f"Failed to load RKNN model (ret={ret})")
-    ret = rknn.init_runtime()
-    if ret != 0:
-        os.dup2(old_stdout_fd, 1)
-        os.close(devnull_fd)
-        os.close(old_stdout_fd)
-        fail(f"Failed to init RKNN runtime (ret={ret})")
-
-    # ── Pre-process ───────────────────────────────────────────────────
-    rgb      = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    resized  = cv2.resize(rgb, (MODEL_INPUT, MODEL_INPUT))
-    inp      = np.expand_dims(resized, 0)   # (1, 640, 640, 3)
-
-    # ── Inference ─────────────────────────────────────────────────────
-    outputs = rknn.inference(inputs=[inp])
-    rknn.release()
-
-    # Restore stdout so our JSON output goes to the real stdout
-    os.dup2(old_stdout_fd, 1)
-    os.close(devnull_fd)
-    os.close(old_stdout_fd)
-
-    if outputs is None:
-        fail("RKNN inference returned None")
-
-    # ── Post-process ──────────────────────────────────────────────────
-    dets = decode_outputs(outputs, img_h, img_w, args.conf, args.nms)
-
-    # ── Build JSON result ─────────────────────────────────────────────
-    detection_list = []
-    for det in dets:
-        x1, y1, x2, y2, conf, cls_id = det
-        detection_list.append({
-            "label":      labels[int(cls_id)] if int(cls_id) < len(labels) else str(int(cls_id)),
-            "confidence": round(float(conf), 4),
-            "bbox":       [round(float(x1), 1), round(float(y1), 1),
-                           round(float(x2), 1), round(float(y2), 1)],
-        })
-
-    # ── Annotate + save ───────────────────────────────────────────────
-    annotated_path = None
-    if args.annotate:
-        annotated = annotate(frame, dets, labels)
-        cv2.imwrite(args.annotate, annotated, [cv2.IMWRITE_JPEG_QUALITY, 92])
-        annotated_path = args.annotate
-
-    result = {
-        "success":          True,
-        "count":            len(detection_list),
-        "detections":       detection_list,
-        "annotated_image":  annotated_path,
-    }
     print(json.dumps(result))
 
 
@@ -375,29 +375,42 @@ export class WhatsAppChannel implements Channel {
     }
   }
 
+  /** Send an image (or .mp4 clip) from a file path or from memory. */
   async sendImage(
     jid: string,
-    imagePath: string,
+    image: string | Buffer,
     caption?: string,
+    mimetype?: string,
   ): Promise<void> {
     if (!this.connected) {
       logger.warn({ jid }, 'WA disconnected, cannot send image');
       return;
     }
+    const source =
+      typeof image === 'string' ? image : `<${image.length} bytes>`;
     try {
-      const imageBuffer = fs.readFileSync(imagePath);
+      const imageBuffer =
+        typeof image === 'string' ? fs.readFileSync(image) : image;
       const captionText = caption
         ? ASSISTANT_HAS_OWN_NUMBER
           ? caption
           : `${ASSISTANT_NAME}: ${caption}`
         : undefined;
+      // Monitor alert clips arrive as .mp4; send them as looping video
+      const isVideo =
+        typeof image === 'string'
+          ? image.endsWith('.mp4')
+          : mimetype === 'video/mp4';
+      const media = isVideo
+        ? { video: imageBuffer, gifPlayback: true }
+        : { image: imageBuffer };
       await this.sock.sendMessage(jid, {
-        image: imageBuffer,
+        ...media,
         ...(captionText ? { caption: captionText } : {}),
       });
-      logger.info({ jid, imagePath }, 'Image sent');
+      logger.info({ jid, image: source }, 'Image sent');
     } catch (err) {
-      logger.error({ jid, imagePath, err }, 'Failed to send image');
+      logger.error({ jid, image: source, err }, 'Failed to send image');
       throw err;
     }
   }
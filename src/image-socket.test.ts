@@ -0,0 +1,133 @@
+import fs from 'fs';
+import net from 'net';
+import os from 'os';
+import path from 'path';
+
+import { afterEach, beforeEach, describe, expect, it, vi } from 'vitest';
+
+import {
+  encodeFrame,
+  FrameDecoder,
+  ImageFrame,
+  MAX_IMAGE_BYTES,
+  startImageSocket,
+} from './image-socket.js';
+
+const HEADER = { type: 'send_image', chatJid: 'a@g.us', groupFolder: 'main' };
+
+describe('FrameDecoder', () => {
+  it('reassembles frames split across arbitrary chunks', () => {
+    const wire = Buffer.concat([
+      encodeFrame(HEADER, Buffer.from('first')),
+      encodeFrame({ ...HEADER, caption: 'two' }, Buffer.alloc(1000, 7)),
+    ]);
+    const decoder = new FrameDecoder();
+    const frames: ImageFrame[] = [];
+    for (let i = 0; i < wire.length; i += 3) {
+      frames.push(...decoder.push(wire.subarray(i, i + 3)));
+    }
+    expect(frames).toHaveLength(2);
+    expect(frames[0].header).toEqual(HEADER);
+    expect(frames[0].data.toString()).toBe('first');
+    expect(frames[1].header.caption).toBe('two');
+    expect(frames[1].data.equals(Buffer.alloc(1000, 7))).toBe(true);
+  });
+
+  it('joins a large payload once rather than on every chunk', () => {
+    const payload = Buffer.alloc(4 * 1024 * 1024, 9);
+    const wire = encodeFrame(HEADER, payload);
+    const decoder = new FrameDecoder();
+    const concat = vi.spyOn(Buffer, 'concat');
+    const frames: ImageFrame[] = [];
+    try {
+      for (let i = 0; i < wire.length; i += 64 * 1024) {
+        frames.push(...decoder.push(wire.subarray(i, i + 64 * 1024)));
+      }
+      expect(concat.mock.calls.length).toBeLessThanOrEqual(2);
+    } finally {
+      concat.mockRestore();
+    }
+    expect(frames).toHaveLength(1);
+    expect(frames[0].data.equals(payload)).toBe(true);
+  });
+
+  it('rejects a payload over the size limit', () => {
+    const wire = encodeFrame(HEADER, Buffer.alloc(0));
+    wire.writeUInt32BE(MAX_IMAGE_BYTES + 1, wire.length - 4);
+    expect(() => new FrameDecoder().push(wire)).toThrow('exceeds');
+  });
+});
+
+describe('startImageSocket', () => {
+  let tmpDir: string;
+  let socketPath: string;
+  let server: net.Server;
+
+  beforeEach(() => {
+    tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), 'image-socket-'));
+    socketPath = path.join(tmpDir, 'images.sock');
+  });
+
+  afterEach(async () => {
+    await new Promise<void>((resolve) => server.close(() => resolve()));
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  function roundTrip(frames: Buffer[], replies: number): Promise<Buffer> {
+    return new Promise((resolve, reject) => {
+      const socket = net.createConnection(socketPath);
+      const chunks: Buffer[] = [];
+      socket.on('connect', () => socket.write(Buffer.concat(frames)));
+      socket.on('data', (chunk: Buffer) => {
+        chunks.push(chunk);
+        const all = Buffer.concat(chunks);
+        let offset = 0;
+        let count = 0;
+        while (offset + 4 <= all.length) {
+          offset += 4 + all.readUInt32BE(offset);
+          if (offset <= all.length) count++;
+        }
+        if (count >= replies) {
+          socket.destroy();
+          resolve(all);
+        }
+      });
+      socket.on('error', reject);
+    });
+  }
+
+  function parseReplies(wire: Buffer): unknown[] {
+    const replies: unknown[] = [];
+    for (let offset = 0; offset < wire.length; ) {
+      const length = wire.readUInt32BE(offset);
+      const body = wire.subarray(offset + 4, offset + 4 + length);
+      replies.push(JSON.parse(body.toString()));
+      offset += 4 + length;
+    }
+    return replies;
+  }
+
+  it('acks accepted frames and reports refused ones', async () => {
+    const received: ImageFrame[] = [];
+    server = startImageSocket((frame) => {
+      if (frame.header.chatJid !== 'a@g.us') throw new Error('Unauthorized');
+      received.push(frame);
+      return Promise.resolve();
+    }, socketPath);
+    await new Promise((resolve) => server.once('listening', resolve));
+    expect(fs.statSync(socketPath).mode & 0o777).toBe(0o600);
+
+    const wire = await roundTrip(
+      [
+        encodeFrame(HEADER, Buffer.from('jpeg')),
+        encodeFrame({ ...HEADER, chatJid: 'b@g.us' }, Buffer.from('x')),
+      ],
+      2,
+    );
+    expect(parseReplies(wire)).toEqual([
+      { ok: true },
+      { ok: false, error: 'Unauthorized' },
+    ]);
+    expect(received.map((f) => f.data.toString())).toEqual(['jpeg']);
+  });
+});
@@ -0,0 +1,168 @@
+import fs from 'fs';
+import net from 'net';
+
+import { logger } from './logger.js';
+
+/**
+ * Unix socket on which host-side scripts (scripts/monitor.py via
+ * nanovision/handoff.py) hand over encoded images in memory, instead of
+ * writing a JPEG to /tmp and a task file for the IPC poller.
+ *
+ * Every length is an unsigned 32-bit big-endian integer:
+ *   request: <header length> <header JSON> <payload length> <payload>
+ *   reply:   <length> <JSON {"ok": true} | {"ok": false, "error": "..."}>
+ *
+ * The reply only says whether the image was accepted; sending to WhatsApp
+ * happens afterwards, so the producer never waits on the network.
+ */
+
+export const IMAGE_SOCKET = '/tmp/nanoclaw-images.sock';
+export const MAX_IMAGE_BYTES = 16 * 1024 * 1024;
+const MAX_HEADER_BYTES = 64 * 1024;
+
+export interface ImageHeader {
+  type: string;
+  chatJid?: string;
+  groupFolder?: string;
+  caption?: string;
+  mime?: string;
+}
+
+export interface ImageFrame {
+  header: ImageHeader;
+  data: Buffer;
+}
+
+export interface ImageReply {
+  ok: boolean;
+  error?: string;
+}
+
+function lengthPrefixed(data: Buffer): Buffer {
+  const len = Buffer.alloc(4);
+  len.writeUInt32BE(data.length);
+  return Buffer.concat([len, data]);
+}
+
+/** Serialize one request frame (the inverse of FrameDecoder). */
+export function encodeFrame(header: ImageHeader, data: Buffer): Buffer {
+  return Buffer.concat([
+    lengthPrefixed(Buffer.from(JSON.stringify(header))),
+    lengthPrefixed(data),
+  ]);
+}
+
+export function encodeReply(reply: ImageReply): Buffer {
+  return lengthPrefixed(Buffer.from(JSON.stringify(reply)));
+}
+
+/**
+ * Incremental parser for request frames. push() takes whatever chunk the
+ * socket delivered and returns every frame completed by it; throws if a
+ * length is over the limit, after which the connection should be dropped.
+ */
+export class FrameDecoder {
+  private chunks: Buffer[] = [];
+  private buffered = 0;
+  private header: ImageHeader | null = null;
+
+  push(chunk: Buffer): ImageFrame[] {
+    this.chunks.push(chunk);
+    this.buffered += chunk.length;
+    const frames: ImageFrame[] = [];
+    for (;;) {
+      if (this.header === null) {
+        const head = this.take(MAX_HEADER_BYTES);
+        if (!head) break;
+        const header = JSON.parse(head.toString('utf-8')) as ImageHeader;
+        if (typeof header !== 'object' || header === null) {
+          throw new Error('Image frame header is not a JSON object');
+        }
+        this.header = header;
+      }
+      const data = this.take(MAX_IMAGE_BYTES);
+      if (!data) break;
+      frames.push({ header: this.header, data });
+      this.header = null;
+    }
+    return frames;
+  }
+
+  /**
+   * Remove one length-prefixed field, or return null if it isn't all here.
+   * Chunks are only joined once the whole field has arrived, so a large
+   * image costs one copy rather than one per socket read.
+   */
+  private take(limit: number): Buffer | null {
+    if (this.buffered < 4) return null;
+    if (this.chunks[0].length < 4) this.chunks = [Buffer.concat(this.chunks)];
+    const length = this.chunks[0].readUInt32BE(0);
+    if (length > limit) {
+      throw new Error(`Image frame field of ${length} bytes exceeds ${limit}`);
+    }
+    if (this.buffered < 4 + length) return null;
+    const buf =
+      this.chunks.length === 1
+        ? this.chunks[0]
+        : Buffer.concat(this.chunks, this.buffered);
+    const field = buf.subarray(4, 4 + length);
+    const rest = buf.subarray(4 + length);
+    this.chunks = rest.length ? [rest] : [];
+    this.buffered = rest.length;
+    return field;
+  }
+}
+
+/**
+ * Listen on `socketPath` (replacing a stale socket file) and pass each
+ * frame to `accept`, which validates it synchronously and returns the
+ * delivery as a promise. The reply goes out as soon as `accept` returns.
+ */
+export function startImageSocket(
+  accept: (frame: ImageFrame) => Promise<void>,
+  socketPath: string = IMAGE_SOCKET,
+): net.Server {
+  const server = net.createServer((conn) => {
+    const decoder = new FrameDecoder();
+    conn.on('data', (chunk: Buffer) => {
+      let frames: ImageFrame[];
+      try {
+        frames = decoder.push(chunk);
+      } catch (err) {
+        logger.warn({ err }, 'Dropping image socket connection');
+        conn.end(encodeReply({ ok: false, error: String(err) }));
+        return;
+      }
+      for (const frame of frames) {
+        let delivery: Promise<void>;
+        try {
+          delivery = accept(frame);
+        } catch (err) {
+          conn.write(
+            encodeReply({ ok: false, error: (err as Error).message }),
+          );
+          continue;
+        }
+        conn.write(encodeReply({ ok: true }));
+        delivery.catch((err) =>
+          logger.error({ err, header: frame.header }, 'Socket image failed'),
+        );
+      }
+    });
+    conn.on('error', (err) =>
+      logger.debug({ err }, 'Image socket connection error'),
+    );
+  });
+
+  try {
+    fs.unlinkSync(socketPath);
+  } catch {
+    /* not there */
+  }
+  server.listen(socketPath, () => {
+    fs.chmodSync(socketPath, 0o600);
+    logger.info({ socketPath }, 'Image socket listening');
+  });
+  server.on('error', (err) => logger.error({ err }, 'Image socket error'));
+  return server;
+}
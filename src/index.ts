@@ -506,9 +506,9 @@ async function main(): Promise<void> {
       if (!channel) throw new Error(`No channel for JID: ${jid}`);
       return channel.sendMessage(jid, text);
     },
-    sendImage: (jid, imagePath, caption) => {
+    sendImage: (jid, image, caption, mimetype) => {
       if (!whatsapp) throw new Error('WhatsApp channel not ready');
-      return whatsapp.sendImage(jid, imagePath, caption);
+      return whatsapp.sendImage(jid, image, caption, mimetype);
     },
     registeredGroups: () => registeredGroups,
     registerGroup,
@@ -8,7 +8,12 @@ import {
   getTaskById,
   setRegisteredGroup,
 } from './db.js';
-import { processTaskIpc, IpcDeps } from './ipc.js';
+import {
+  acceptSocketImage,
+  monitorCameras,
+  processTaskIpc,
+  IpcDeps,
+} from './ipc.js';
 import { RegisteredGroup } from './types.js';
 
 // Set up registered groups used across tests
@@ -672,3 +677,126 @@ describe('register_group success', () => {
     expect(getRegisteredGroup('partial@g.us')).toBeUndefined();
   });
 });
+
+// --- image socket authorization ---
+
+describe('socket image authorization', () => {
+  const frame = (groupFolder: string, chatJid: string) => ({
+    header: { type: 'send_image', chatJid, groupFolder, caption: 'hi' },
+    data: Buffer.from('jpeg'),
+  });
+
+  it('non-main group can send to its own chat', async () => {
+    const sent: string[] = [];
+    deps.sendImage = async (jid) => {
+      sent.push(jid);
+    };
+    await acceptSocketImage(frame('other-group', 'other@g.us'), deps);
+    expect(sent).toEqual(['other@g.us']);
+  });
+
+  it('non-main group cannot send to another chat', () => {
+    expect(() =>
+      acceptSocketImage(frame('other-group', 'main@g.us'), deps),
+    ).toThrow('Unauthorized');
+  });
+
+  it('main group can send to any chat', async () => {
+    const sent: string[] = [];
+    deps.sendImage = async (jid) => {
+      sent.push(jid);
+    };
+    await acceptSocketImage(frame('main', 'third@g.us'), deps);
+    expect(sent).toEqual(['third@g.us']);
+  });
+
+  it('rejects an invalid group folder', () => {
+    expect(() =>
+      acceptSocketImage(frame('../main', 'other@g.us'), deps),
+    ).toThrow('Invalid group folder');
+  });
+});
+
+// --- start_monitor camera entries ---
+
+describe('start_monitor cameras', () => {
+  const cameras = (isMain: boolean, entries: unknown[]) =>
+    monitorCameras(
+      { cameras: entries },
+      isMain ? 'main@g.us' : 'other@g.us',
+      isMain ? 'main' : 'other-group',
+      isMain,
+      groups,
+    ).cameras;
+
+  it('keeps only per-camera keys', () => {
+    expect(
+      cameras(false, [
+        {
+          device: '/dev/video2',
+          name: 'yard',
+          interval: 30,
+          detectLabels: ['dog'],
+          confidenceThreshold: 0.6,
+          metricsListen: '0.0.0.0:9464',
+          clipFormat: '../../etc/x',
+          model: '/tmp/evil.rknn',
+          chatJid: 'main@g.us',
+        },
+      ]),
+    ).toEqual([
+      {
+        device: '/dev/video2',
+        name: 'yard',
+        interval: 30,
+        detectLabels: ['dog'],
+        confidenceThreshold: 0.6,
+        chatJid: 'other@g.us',
+        groupFolder: 'other-group',
+      },
+    ]);
+  });
+
+  it('drops mistyped optional keys', () => {
+    expect(
+      cameras(false, [
+        {
+          device: '1',
+          interval: '5',
+          detectLabels: [1],
+          confidenceThreshold: 7,
+        },
+      ]),
+    ).toEqual([
+      { device: '1', chatJid: 'other@g.us', groupFolder: 'other-group' },
+    ]);
+  });
+
+  it('non-main group may only open video devices', () => {
+    expect(
+      cameras(false, [
+        { device: '/etc/passwd' },
+        { device: '/home/user/photos' },
+        { device: 'synthetic' },
+      ]),
+    ).toBeUndefined();
+  });
+
+  it('rejects unsafe camera names', () => {
+    expect(
+      cameras(true, [{ device: '/dev/video0', name: '../x' }]),
+    ).toBeUndefined();
+  });
+
+  it('main group can route a camera to another chat', () => {
+    expect(
+      cameras(true, [{ device: '/dev/video0', chatJid: 'third@g.us' }]),
+    ).toEqual([
+      {
+        device: '/dev/video0',
+        chatJid: 'third@g.us',
+        groupFolder: 'third-group',
+      },
+    ]);
+  });
+});
@@ -1,4 +1,4 @@
-import { ChildProcess, execSync, spawn, spawnSync } from 'child_process';
+import { ChildProcess, execSync, spawn } from 'child_process';
 import fs from 'fs';
 import os from 'os';
 import path from 'path';
@@ -14,15 +14,18 @@ import {
 import { AvailableGroup } from './container-runner.js';
 import { createTask, deleteTask, getTaskById, updateTask } from './db.js';
 import { isValidGroupFolder } from './group-folder.js';
+import { ImageFrame, startImageSocket } from './image-socket.js';
 import { logger } from './logger.js';
 import { RegisteredGroup } from './types.js';
+import { detectImage } from './yolo-client.js';
 
 export interface IpcDeps {
   sendMessage: (jid: string, text: string) => Promise<void>;
   sendImage: (
     jid: string,
-    imagePath: string,
+    image: string | Buffer,
     caption?: string,
+    mimetype?: string,
   ) => Promise<void>;
   registeredGroups: () => Record<string, RegisteredGroup>;
   registerGroup: (jid: string, group: RegisteredGroup) => void;
@@ -41,6 +44,95 @@ let monitorProcess: ChildProcess | null = null;
 const MONITOR_CONFIG = '/tmp/nanoclaw-monitor.json';
 const MONITOR_SCRIPT = path.join(process.cwd(), 'scripts', 'monitor.py');
 
+// Devices a non-main group may name: local V4L2 nodes or bare indices.
+const CAMERA_DEVICE = /^(\/dev\/video\d+|\d+)$/;
+const CAMERA_NAME = /^[\w-]+$/;
+
+interface MonitorCamera {
+  device: string;
+  name?: string;
+  zones?: unknown[];
+  interval?: number;
+  detectLabels?: string[];
+  confidenceThreshold?: number;
+  chatJid: string;
+  groupFolder: string;
+}
+
+/**
+ * Validate the optional `cameras` list of a start_monitor request. An entry
+ * keeps only the per-camera keys of MonitorCamera, each type-checked: any
+ * other key would be merged over the daemon-wide config (metrics endpoint,
+ * model, clip settings) by monitor.py. Only the main group may open devices
+ * other than /dev/videoN or route a camera's alerts to another chat; every
+ * other camera reports to the requesting chat.
+ */
+export function monitorCameras(
+  data: object,
+  targetJid: string,
+  sourceGroup: string,
+  isMain: boolean,
+  registeredGroups: Record<string, RegisteredGroup>,
+): { cameras?: MonitorCamera[] } {
+  const cameras = (data as { cameras?: unknown }).cameras;
+  if (!Array.isArray(cameras)) return {};
+  const valid: MonitorCamera[] = [];
+  for (const entry of cameras) {
+    const cam = (entry ?? {}) as Record<string, unknown>;
+    if (
+      typeof cam.device !== 'string' ||
+      (!isMain && !CAMERA_DEVICE.test(cam.device)) ||
+      (cam.name !== undefined &&
+        (typeof cam.name !== 'string' || !CAMERA_NAME.test(cam.name)))
+    ) {
+      logger.warn(
+        { sourceGroup, camera: entry },
+        'start_monitor: ignoring invalid camera',
+      );
+      continue;
+    }
+    const chatJid =
+      isMain && typeof cam.chatJid === 'string' && cam.chatJid
+        ? cam.chatJid
+        : targetJid;
+    const groupFolder =
+      chatJid === targetJid
+        ? sourceGroup
+        : (registeredGroups[chatJid]?.folder ?? sourceGroup);
+    const camera: MonitorCamera = { device: cam.device, chatJid, groupFolder };
+    if (typeof cam.name === 'string') camera.name = cam.name;
+    if (Array.isArray(cam.zones)) camera.zones = cam.zones;
+    if (typeof cam.interval === 'number' && cam.interval > 0) {
+      camera.interval = cam.interval;
+    }
+    if (
+      Array.isArray(cam.detectLabels) &&
+      cam.detectLabels.every((label) => typeof label === 'string')
+    ) {
+      camera.detectLabels = cam.detectLabels;
+    }
+    if (
+      typeof cam.confidenceThreshold === 'number' &&
+      cam.confidenceThreshold >= 0 &&
+      cam.confidenceThreshold <= 1
+    ) {
+      camera.confidenceThreshold = cam.confidenceThreshold;
+    }
+    valid.push(camera);
+  }
+  return valid.length ? { cameras: valid } : {};
+}
+
+/**
+ * Replace the monitor config atomically. monitor.py reacts to the rename as
+ * soon as it happens, so it must never see a half-written file.
+ */
+function writeMonitorConfig(config: object): void {
+  const tmpPath = `${MONITOR_CONFIG}.tmp`;
+  fs.writeFileSync(tmpPath, JSON.stringify(config, null, 2));
+  fs.renameSync(tmpPath, MONITOR_CONFIG);
+}
+
 export function startIpcWatcher(deps: IpcDeps): void {
   if (ipcWatcherRunning) {
     logger.debug('IPC watcher already running, skipping duplicate start');
@@ -159,9 +251,48 @@ export function startIpcWatcher(deps: IpcDeps): void {
   };
 
   processIpcFiles();
+  startImageSocket((frame) => acceptSocketImage(frame, deps));
   logger.info('IPC watcher started (per-group namespaces)');
 }
 
+/**
+ * Validate an image handed over on the image socket and start sending it.
+ * Applies the send_image rules, with the group taken from the header: the
+ * socket is only reachable by host processes running as this user.
+ * Throws (synchronously) if the image is refused.
+ */
+export function acceptSocketImage(
+  frame: ImageFrame,
+  deps: IpcDeps,
+): Promise<void> {
+  const { type, chatJid, groupFolder, caption, mime } = frame.header;
+  if (type !== 'send_image' || !chatJid || !groupFolder) {
+    throw new Error(
+      'Expected a send_image header with chatJid and groupFolder',
+    );
+  }
+  if (!isValidGroupFolder(groupFolder)) {
+    throw new Error(`Invalid group folder: ${groupFolder}`);
+  }
+  const isMain = groupFolder === MAIN_GROUP_FOLDER;
+  const targetGroup = deps.registeredGroups()[chatJid];
+  if (!isMain && (!targetGroup || targetGroup.folder !== groupFolder)) {
+    logger.warn(
+      { sourceGroup: groupFolder, targetJid: chatJid },
+      'Unauthorized socket image blocked',
+    );
+    throw new Error('Unauthorized');
+  }
+  return deps
+    .sendImage(chatJid, frame.data, caption ?? '', mime)
+    .then(() =>
+      logger.info(
+        { targetJid: chatJid, bytes: frame.data.length },
+        'Monitor image sent',
+      ),
+    );
+}
+
 export async function processTaskIpc(
   data: {
     type: string;
@@ -454,89 +585,61 @@ export async function processTaskIpc(
       }
 
       const device = '/dev/video0';
-      const ts = Date.now();
-      const tmpPhoto = path.join(os.tmpdir(), `nanoclaw-photo-${ts}.jpg`);
-      const tmpAnnotated = path.join(
+      const tmpPhoto = path.join(
         os.tmpdir(),
-        `nanoclaw-annotated-${ts}.jpg`,
+        `nanoclaw-photo-${Date.now()}.jpg`,
       );
       const userCaption = (data as { caption?: string }).caption;
+      const prefix = userCaption ? userCaption + '\n' : '';
 
       try {
-        // Step 1: capture frame
-        logger.info({ device, tmpPhoto }, 'Capturing photo for YOLO detection');
-        execSync(
-          `fswebcam -d ${device} -r 1280x720 -S 20 --jpeg 95 --no-banner "${tmpPhoto}"`,
-          { timeout: 30000 },
-        );
-
-        // Step 2: run YOLO detection script (blocking, up to 30 s for NPU load + inference)
-        logger.info({ tmpPhoto }, 'Running YOLO detection');
-        const yoloResult = spawnSync(
-          'python3',
-          [
-            'scripts/yolo-detect.py',
-            '--image',
-            tmpPhoto,
-            '--annotate',
-            tmpAnnotated,
-            '--conf',
-            '0.5',
-          ],
-          { cwd: process.cwd(), timeout: 30000, encoding: 'utf-8' },
-        );
-
-        let caption = userCaption ?? '🔍 YOLO detection';
-        let imageToSend = tmpPhoto; // fall back to raw photo if YOLO fails
+        // Capture, detect and encode in one step: the detector grabs the
+        // frame itself and returns the annotated JPEG in memory.
+        logger.info({ device }, 'Capturing photo for YOLO detection');
+        const parsed = await detectImage({
+          camera: device,
+          warmup: 20,
+          conf: 0.5,
+          return_image: true,
+        });
 
-        if (yoloResult.status === 0 && yoloResult.stdout) {
-          try {
-            // RKNN runtime may print log lines to stdout; extract the JSON line only
-            const jsonLine = yoloResult.stdout
-              .split('\n')
-              .find((l: string) => l.trimStart().startsWith('{'));
-            const parsed = JSON.parse(jsonLine || '{}') as {
-              success: boolean;
-              count: number;
-              detections: Array<{ label: string; confidence: number }>;
-              annotated_image: string | null;
-            };
-
-            if (parsed.success) {
-              imageToSend = parsed.annotated_image ?? tmpPhoto;
-
-              // Build a compact label summary (cap at 10 entries)
-              const summary = parsed.detections
-                .slice(0, 10)
-                .map(
-                  (d) => `• ${d.label} (${(d.confidence * 100).toFixed(0)}%)`,
-                )
-                .join('\n');
-
-              caption =
-                parsed.count === 0
-                  ? `${userCaption ? userCaption + '\n' : ''}🔍 No objects detected.`
-                  : `${userCaption ? userCaption + '\n' : ''}🔍 Detected ${parsed.count} object(s):\n${summary}`;
-            }
-          } catch {
-            logger.warn(
-              { stdout: yoloResult.stdout },
-              'YOLO script output is not valid JSON',
-            );
-          }
+        if (parsed.success && parsed.image_b64) {
+          const detections = parsed.detections ?? [];
+
+          // Build a compact label summary (cap at 10 entries)
+          const summary = detections
+            .slice(0, 10)
+            .map(
+              (d) => `• ${d.label} (${(d.confidence * 100).toFixed(0)}%)`,
+            )
+            .join('\n');
+
+          const caption =
+            parsed.count === 0
+              ? `${prefix}🔍 No objects detected.`
+              : `${prefix}🔍 Detected ${parsed.count} object(s):\n${summary}`;
+          await deps.sendImage(
+            targetJid,
+            Buffer.from(parsed.image_b64, 'base64'),
+            caption,
+          );
+          logger.info(
+            { targetJid, count: parsed.count },
+            'YOLO result sent via WhatsApp',
+          );
         } else {
-          logger.error(
-            { stderr: yoloResult.stderr, status: yoloResult.status },
-            'YOLO script failed',
+          // Fall back to a plain photo so the user still sees the scene
+          logger.error({ error: parsed.error }, 'YOLO detection failed');
+          execSync(
+            `fswebcam -d ${device} -r 1280x720 -S 20 --jpeg 95 --no-banner "${tmpPhoto}"`,
+            { timeout: 30000 },
+          );
+          await deps.sendImage(
+            targetJid,
+            tmpPhoto,
+            `${prefix}⚠️ Detection failed — sending raw photo.`,
           );
-          caption = `${userCaption ? userCaption + '\n' : ''}⚠️ Detection failed — sending raw photo.`;
         }
-
-        await deps.sendImage(targetJid, imageToSend, caption);
-        logger.info(
-          { targetJid, count: caption },
-          'YOLO result sent via WhatsApp',
-        );
       } catch (err) {
         logger.error({ err }, 'capture_and_detect: fatal error');
         await deps
@@ -551,11 +654,6 @@ export async function processTaskIpc(
         } catch {
           /* ignore */
         }
-        try {
-          fs.unlinkSync(tmpAnnotated);
-        } catch {
-          /* ignore */
-        }
       }
       break;
     }
@@ -579,6 +677,10 @@ export async function processTaskIpc(
       const monitorConfig = {
         chatJid: targetJid,
         interval: (data as { interval?: number }).interval ?? 10,
+        // Speed up while targets are seen, back off while the scene is empty
+        adaptive: (data as { adaptive?: boolean }).adaptive ?? false,
+        intervalMin: (data as { intervalMin?: number }).intervalMin,
+        intervalMax: (data as { intervalMax?: number }).intervalMax,
         detectLabels: (data as { detectLabels?: string[] }).detectLabels ?? [
           'person',
         ],
@@ -586,9 +688,32 @@ export async function processTaskIpc(
           (data as { confidenceThreshold?: number }).confidenceThreshold ?? 0.5,
         sendAnnotated: true,
         groupFolder: sourceGroup,
+        // Skip inference on static scenes; re-check at least every heartbeat
+        motionGate: (data as { motionGate?: boolean }).motionGate ?? false,
+        motionHeartbeat:
+          (data as { motionHeartbeat?: number }).motionHeartbeat ?? 60,
+        // Re-alert on a returning track or changed count after this long
+        alertCooldown: (data as { alertCooldown?: number }).alertCooldown ?? 60,
+        // Follow each alert with a short clip from the pre-event frame ring
+        clip: (data as { clip?: boolean }).clip ?? false,
+        clipPre: (data as { clipPre?: number }).clipPre ?? 5,
+        clipPost: (data as { clipPost?: number }).clipPost ?? 3,
+        // Optional detection zones: crop inference to these regions
+        zones: (data as { zones?: unknown }).zones,
+        // Alert JPEGs are encoded once at this quality / long side
+        jpegQuality: (data as { jpegQuality?: number }).jpegQuality ?? 80,
+        jpegMaxSide: (data as { jpegMaxSide?: number }).jpegMaxSide ?? 1280,
+        // Optional per-camera overrides; one shared model serves them all
+        ...monitorCameras(
+          data,
+          targetJid,
+          sourceGroup,
+          isMain,
+          registeredGroups,
+        ),
       };
 
-      fs.writeFileSync(MONITOR_CONFIG, JSON.stringify(monitorConfig, null, 2));
+      writeMonitorConfig(monitorConfig);
 
       // Start monitor process if not already running
       if (!monitorProcess || monitorProcess.exitCode !== null) {
@@ -625,7 +750,7 @@ export async function processTaskIpc(
       const targetJid = data.chatJid;
 
       // Write stop signal
-      fs.writeFileSync(MONITOR_CONFIG, JSON.stringify({ stop: true }));
+      writeMonitorConfig({ stop: true });
 
       // Kill process if still running
       if (monitorProcess && monitorProcess.exitCode === null) {
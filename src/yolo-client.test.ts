@@ -0,0 +1,77 @@
+import fs from 'fs';
+import net from 'net';
+import os from 'os';
+import path from 'path';
+
+import { afterEach, beforeEach, describe, expect, it } from 'vitest';
+
+import { parseDetectOutput, requestDetection } from './yolo-client.js';
+
+describe('parseDetectOutput', () => {
+  it('skips RKNN log lines before the JSON result', () => {
+    const stdout =
+      'I RKNN: [10:00:00.000] RKNN Runtime Information\n' +
+      '{"success": true, "count": 0, "detections": [], "annotated_image": null}\n';
+    expect(parseDetectOutput(stdout)).toEqual({
+      success: true,
+      count: 0,
+      detections: [],
+      annotated_image: null,
+    });
+  });
+
+  it('returns null when there is no JSON line', () => {
+    expect(parseDetectOutput('Traceback (most recent call last):\n')).toBe(
+      null,
+    );
+  });
+});
+
+describe('requestDetection', () => {
+  let tmpDir: string;
+  let socketPath: string;
+  let server: net.Server;
+  let received: string[];
+
+  beforeEach(async () => {
+    tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), 'yolo-client-'));
+    socketPath = path.join(tmpDir, 'yolo.sock');
+    received = [];
+    server = net.createServer((conn) => {
+      conn.setEncoding('utf-8');
+      conn.on('data', (chunk: string) => {
+        received.push(chunk);
+        // Reply in two chunks to exercise line buffering
+        conn.write('{"success": true, "count": 1, ');
+        conn.write(
+          '"detections": [{"label": "person", "confidence": 0.9, "bbox": [1, 2, 3, 4]}], "annotated_image": null}\n',
+        );
+      });
+    });
+    await new Promise<void>((resolve) => server.listen(socketPath, resolve));
+  });
+
+  afterEach(async () => {
+    await new Promise<void>((resolve) => server.close(() => resolve()));
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  it('sends one JSON line and parses the response line', async () => {
+    const result = await requestDetection(
+      { image: '/tmp/photo.jpg', conf: 0.5 },
+      socketPath,
+    );
+    expect(JSON.parse(received.join(''))).toEqual({
+      image: '/tmp/photo.jpg',
+      conf: 0.5,
+    });
+    expect(result.success).toBe(true);
+    expect(result.detections?.[0].label).toBe('person');
+  });
+
+  it('rejects with ENOENT when no server is listening', async () => {
+    await expect(
+      requestDetection({ op: 'ping' }, path.join(tmpDir, 'missing.sock')),
+    ).rejects.toMatchObject({ code: 'ENOENT' });
+  });
+});
@@ -0,0 +1,184 @@
+import { ChildProcess, spawn, spawnSync } from 'child_process';
+import fs from 'fs';
+import net from 'net';
+import os from 'os';
+import path from 'path';
+
+import { logger } from './logger.js';
+
+/**
+ * Client for scripts/yolo-detect.py. Requests go to the long-lived
+ * `--serve` process over a Unix socket (model stays loaded on the NPU);
+ * if it isn't running, the server is started for next time and this call
+ * falls back to the one-shot CLI.
+ */
+
+export const YOLO_SOCKET = '/tmp/nanoclaw-yolo.sock';
+const YOLO_SCRIPT = path.join('scripts', 'yolo-detect.py');
+const REQUEST_TIMEOUT = 15000;
+const CLI_TIMEOUT = 30000;
+
+export interface YoloDetection {
+  label: string;
+  confidence: number;
+  bbox: [number, number, number, number];
+}
+
+export interface YoloResult {
+  success: boolean;
+  count?: number;
+  detections?: YoloDetection[];
+  annotated_image?: string | null;
+  /** Annotated JPEG, base64, when the request set return_image. */
+  image_b64?: string;
+  error?: string;
+}
+
+/** Exactly one of `image` (a file) or `camera` (a device) is the source. */
+export interface YoloRequest {
+  image?: string;
+  camera?: string;
+  /** Frames discarded before a camera capture, for auto-exposure. */
+  warmup?: number;
+  annotate?: string;
+  conf?: number;
+  nms?: number;
+  /** Return the annotated JPEG inline instead of (or as well as) a file. */
+  return_image?: boolean;
+  quality?: number;
+  max_side?: number;
+}
+
+let serverProcess: ChildProcess | null = null;
+
+/** Send one JSON-lines request to a running detection server. */
+export function requestDetection(
+  req: YoloRequest | { op: 'ping' },
+  socketPath: string = YOLO_SOCKET,
+  timeoutMs: number = REQUEST_TIMEOUT,
+): Promise<YoloResult> {
+  return new Promise((resolve, reject) => {
+    const socket = net.createConnection(socketPath);
+    let buffer = '';
+    let settled = false;
+    const finish = (err: Error | null, result?: YoloResult) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      socket.destroy();
+      if (err) reject(err);
+      else resolve(result as YoloResult);
+    };
+    const timer = setTimeout(
+      () => finish(new Error('YOLO server request timed out')),
+      timeoutMs,
+    );
+
+    socket.setEncoding('utf-8');
+    socket.on('connect', () => socket.write(JSON.stringify(req) + '\n'));
+    socket.on('data', (chunk: string) => {
+      buffer += chunk;
+      const newline = buffer.indexOf('\n');
+      if (newline === -1) return;
+      try {
+        finish(null, JSON.parse(buffer.slice(0, newline)) as YoloResult);
+      } catch (err) {
+        finish(err as Error);
+      }
+    });
+    socket.on('error', (err) => finish(err));
+    socket.on('close', () =>
+      finish(new Error('YOLO server closed connection without a response')),
+    );
+  });
+}
+
+/** Extract the JSON result from CLI stdout (RKNN may log there too). */
+export function parseDetectOutput(stdout: string): YoloResult | null {
+  const jsonLine = stdout
+    .split('\n')
+    .find((l: string) => l.trimStart().startsWith('{'));
+  if (!jsonLine) return null;
+  try {
+    return JSON.parse(jsonLine) as YoloResult;
+  } catch {
+    return null;
+  }
+}
+
+/** Start the detection server in the background unless already started. */
+export function startYoloServer(): void {
+  if (serverProcess && serverProcess.exitCode === null) return;
+  const logFd = fs.openSync(
+    path.join(process.cwd(), 'logs', 'yolo-server.log'),
+    'a',
+  );
+  serverProcess = spawn(
+    'python3',
+    ['-u', YOLO_SCRIPT, '--serve', YOLO_SOCKET],
+    { cwd: process.cwd(), stdio: ['ignore', logFd, logFd], detached: true },
+  );
+  serverProcess.unref();
+  fs.closeSync(logFd);
+  logger.info({ pid: serverProcess.pid }, 'YOLO detection server started');
+}
+
+function runDetectCli(req: YoloRequest): YoloResult {
+  const args = [YOLO_SCRIPT];
+  if (req.camera) {
+    args.push('--camera', req.camera);
+    if (req.warmup !== undefined) args.push('--warmup', String(req.warmup));
+  } else {
+    args.push('--image', req.image ?? '');
+  }
+  // The CLI can only write the annotated image to a file; read it back
+  // when the caller asked for it inline.
+  const inlinePath =
+    req.return_image && !req.annotate
+      ? path.join(os.tmpdir(), `nanoclaw-annotated-${Date.now()}.jpg`)
+      : undefined;
+  const annotate = req.annotate ?? inlinePath;
+  if (annotate) args.push('--annotate', annotate);
+  if (req.conf !== undefined) args.push('--conf', String(req.conf));
+  if (req.nms !== undefined) args.push('--nms', String(req.nms));
+  const result = spawnSync('python3', args, {
+    cwd: process.cwd(),
+    timeout: CLI_TIMEOUT,
+    encoding: 'utf-8',
+  });
+  const parsed = parseDetectOutput(result.stdout ?? '');
+  if (parsed) {
+    if (parsed.success && req.return_image && annotate) {
+      parsed.image_b64 = fs.readFileSync(annotate).toString('base64');
+    }
+    if (inlinePath) {
+      fs.rmSync(inlinePath, { force: true });
+      parsed.annotated_image = null;
+    }
+    return parsed;
+  }
+  logger.error(
+    { stderr: result.stderr, status: result.status },
+    'YOLO script failed',
+  );
+  return {
+    success: false,
+    error: result.stderr || `yolo-detect.py exited with ${result.status}`,
+  };
+}
+
+/** Detect via the persistent server, falling back to the one-shot CLI. */
+export async function detectImage(req: YoloRequest): Promise<YoloResult> {
+  try {
+    return await requestDetection(req);
+  } catch (err) {
+    const code = (err as NodeJS.ErrnoException).code;
+    // Only spawn a server when nobody is listening; a timeout means one is
+    // running but busy, and a second one would fight it for the socket.
+    if (code === 'ENOENT' || code === 'ECONNREFUSED') {
+      startYoloServer();
+    }
+    logger.debug({ err }, 'YOLO server unavailable, using one-shot detector');
+  }
+  return runDetectCli(req);
+}